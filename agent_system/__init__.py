@@ -5,7 +5,7 @@ Modular agent creation system for Retell AI
 """
 
 from .main import main, create_agent_automation
-from .user_input import collect_user_input
+from .user_input import collect_user_input, build_company_data, transform_form_data
 from .knowledge_base import create_knowledge_base
 from .llm_creation import create_llms
 from .agent_creation import create_agents, create_conversation_flow, create_main_router_agent
@@ -20,6 +20,8 @@ __all__ = [
     "main",
     "create_agent_automation",
     "collect_user_input",
+    "build_company_data",
+    "transform_form_data",
     "create_knowledge_base",
     "create_llms",
     "create_agents",
@@ -4,159 +4,42 @@ Agent Creation and Conversation Flow
 Handle agent creation and conversation flow setup
 """
 
-import requests
-from .config import RETELL_API_TOKEN, RETELL_URLS
+from .retell_client import get_retell_client
 from .llm_creation import generate_global_prompt
+from .payloads import JSON_HEADERS, render_agent_body, render_router_agent_body
 
 
-def create_agents(company_data, llm_data, knowledge_base_id):
-    """Create Retell agents and attach LLM IDs with knowledge base"""
-    print(f"🎯 Step 3: Creating LLM-based Agents")
-    
-    headers = {
-        "Authorization": f"Bearer {RETELL_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    company_name = company_data['company_name']
-    
-    # Create Office Hours Agent with enhanced configuration
-    office_agent_payload = {
-        "response_engine": {
-            "type": "retell-llm",
-            "llm_id": llm_data['office_hours']['llm_id'],
-            "version": 0
-        },
-        "voice_id": "11labs-Chloe",
-        "agent_name": f"{company_name} (Office Hours)",
-        "language": "en-US",
-        "channel": "voice",
-        "data_storage_setting": "everything",
-        "opt_in_signed_url": False,
-        "end_call_after_silence_ms": 150000,
-        "post_call_analysis_model": "gpt-4.1-mini",
-        "pii_config": {
-            "mode": "post_call",
-            "categories": []
-        },
-        "analysis_successful_prompt": "Evaluate whether the agent seems to have a successful call with the user, where the agent finishes the task, and the call was complete without being cutoff.",
-        "analysis_summary_prompt": "Write a 1-3 sentence summary of the call based on the call transcript. Should capture the important information and actions taken during the call.",
-        "enable_backchannel": True,
-        "backchannel_frequency": 0.4,
-        "backchannel_words": [
-            "yeah", "mm-hmm", "uh-huh", "okay", "alright", "got it", 
-            "perfect", "sounds good", "absolutely", "for sure", "understood", 
-            "okay great", "right", "gotcha"
-        ],
-        "max_call_duration_ms": 963000,
-        "knowledge_base_ids": [knowledge_base_id],
-        "kb_config": {
-            "top_k": 3,
-            "filter_score": 0.6
-        },
-        "boosted_keywords": [
-            "fire alarm", "fire sprinkler", "sprinkler inspection", "backflow", 
-            "backflow preventer", "standpipe", "extinguisher", "fire extinguisher", 
-            "extinguishers", "hydrant", "fire hydrant", "alarm panel", "pull station", 
-            "smoke detector", "duct detector", "monitoring", "central station", 
-            "NFPA", "NFPA 25", "NFPA 72", "AHJ", "impairment", "inspection", 
-            "testing", "maintenance", "ITM", "annual inspection", "quarterly inspection", 
-            "five-year", "flow test", "hydrostatic test", "riser", "FDC", 
-            "fire department connection", "emergency", "urgent", "after hours", 
-            "dispatch", "technician", "service call", "work order", "callback number", 
-            "site contact", "access code", "gate code", "lockbox", "landlord", 
-            "property manager", "suite", "unit", "building", "floor", "warehouse", 
-            "front entrance", "rear entrance", "loading dock", "cross street", 
-            "landmark", "zip code", "postal code", "pincode", "HVAC", "thermostat", 
-            "compressor", "condenser", "evaporator", "refrigerant", "Freon", 
-            "heat pump", "RTU", "rooftop unit", "air handler", "ductwork", 
-            "blower motor", "capacitor"
-        ],
-        "ambient_sound": "coffee-shop",
-        "normalize_for_speech": True,
-        "stt_mode": "accurate",
-        "allow_user_dtmf": False,
-        "user_dtmf_options": {},
-        "denoising_mode": "noise-and-background-speech-cancellation",
-        "interruption_sensitivity": 0.5
-    }
+def create_agent(label, company_data, llm_id, knowledge_base_id):
+    """Create a single LLM-based agent and return its agent_id"""
+    agent_name = f"{company_data['company_name']} ({label})"
+    body = render_agent_body(agent_name, llm_id, knowledge_base_id)
 
-    office_agent_response = requests.post(RETELL_URLS['agent'], headers=headers, json=office_agent_payload)
-    
-    if office_agent_response.status_code not in [200, 201]:
-        raise Exception(f"Office Hours Agent creation failed: {office_agent_response.text}")
+    response = get_retell_client().post('agent', data=body, headers=JSON_HEADERS)
     
-    office_agent_id = office_agent_response.json()["agent_id"]
-    print(f"   Office Hours Agent created: {office_agent_id} (version 0)")
+    if response.status_code not in [200, 201]:
+        raise Exception(f"{label} Agent creation failed: {response.text}")
     
-    # Create After Hours Agent with enhanced configuration
-    after_agent_payload = {
-        "response_engine": {
-            "type": "retell-llm",
-            "llm_id": llm_data['after_hours']['llm_id'],
-            "version": 0
-        },
-        "voice_id": "11labs-Chloe",
-        "agent_name": f"{company_name} (After Hours)",
-        "language": "en-US",
-        "channel": "voice",
-        "data_storage_setting": "everything",
-        "opt_in_signed_url": False,
-        "end_call_after_silence_ms": 150000,
-        "post_call_analysis_model": "gpt-4.1-mini",
-        "pii_config": {
-            "mode": "post_call",
-            "categories": []
-        },
-        "analysis_successful_prompt": "Evaluate whether the agent seems to have a successful call with the user, where the agent finishes the task, and the call was complete without being cutoff.",
-        "analysis_summary_prompt": "Write a 1-3 sentence summary of the call based on the call transcript. Should capture the important information and actions taken during the call.",
-        "enable_backchannel": True,
-        "backchannel_frequency": 0.4,
-        "backchannel_words": [
-            "yeah", "mm-hmm", "uh-huh", "okay", "alright", "got it", 
-            "perfect", "sounds good", "absolutely", "for sure", "understood", 
-            "okay great", "right", "gotcha"
-        ],
-        "max_call_duration_ms": 963000,
-        "knowledge_base_ids": [knowledge_base_id],
-        "kb_config": {
-            "top_k": 3,
-            "filter_score": 0.6
-        },
-        "boosted_keywords": [
-            "fire alarm", "fire sprinkler", "sprinkler inspection", "backflow", 
-            "backflow preventer", "standpipe", "extinguisher", "fire extinguisher", 
-            "extinguishers", "hydrant", "fire hydrant", "alarm panel", "pull station", 
-            "smoke detector", "duct detector", "monitoring", "central station", 
-            "NFPA", "NFPA 25", "NFPA 72", "AHJ", "impairment", "inspection", 
-            "testing", "maintenance", "ITM", "annual inspection", "quarterly inspection", 
-            "five-year", "flow test", "hydrostatic test", "riser", "FDC", 
-            "fire department connection", "emergency", "urgent", "after hours", 
-            "dispatch", "technician", "service call", "work order", "callback number", 
-            "site contact", "access code", "gate code", "lockbox", "landlord", 
-            "property manager", "suite", "unit", "building", "floor", "warehouse", 
-            "front entrance", "rear entrance", "loading dock", "cross street", 
-            "landmark", "zip code", "postal code", "pincode", "HVAC", "thermostat", 
-            "compressor", "condenser", "evaporator", "refrigerant", "Freon", 
-            "heat pump", "RTU", "rooftop unit", "air handler", "ductwork", 
-            "blower motor", "capacitor"
-        ],
-        "ambient_sound": "coffee-shop",
-        "normalize_for_speech": True,
-        "stt_mode": "accurate",
-        "allow_user_dtmf": False,
-        "user_dtmf_options": {},
-        "denoising_mode": "noise-and-background-speech-cancellation",
-        "interruption_sensitivity": 0.5
-    }
+    agent_id = response.json()["agent_id"]
+    print(f"   {label} Agent created: {agent_id} (version 0)")
+    return agent_id
 
-    after_agent_response = requests.post(RETELL_URLS['agent'], headers=headers, json=after_agent_payload)
-    
-    if after_agent_response.status_code not in [200, 201]:
-        raise Exception(f"After Hours Agent creation failed: {after_agent_response.text}")
+
+def create_office_hours_agent(company_data, llm_id, knowledge_base_id):
+    """Create the Office Hours agent attached to the Office Hours LLM"""
+    return create_agent("Office Hours", company_data, llm_id, knowledge_base_id)
+
+
+def create_after_hours_agent(company_data, llm_id, knowledge_base_id):
+    """Create the After Hours agent attached to the After Hours LLM"""
+    return create_agent("After Hours", company_data, llm_id, knowledge_base_id)
+
+
+def create_agents(company_data, llm_data, knowledge_base_id):
+    """Create Retell agents and attach LLM IDs with knowledge base"""
+    print(f"🎯 Step 3: Creating LLM-based Agents")
     
-    after_agent_id = after_agent_response.json()["agent_id"]
-    print(f"   After Hours Agent created: {after_agent_id} (version 0)")
+    office_agent_id = create_office_hours_agent(company_data, llm_data['office_hours']['llm_id'], knowledge_base_id)
+    after_agent_id = create_after_hours_agent(company_data, llm_data['after_hours']['llm_id'], knowledge_base_id)
     
     return {
         "office_hours": {
@@ -170,29 +53,11 @@ def create_agents(company_data, llm_data, knowledge_base_id):
     }
 
 
-def create_conversation_flow(company_data, llm_data, office_hours_agent_id, after_hours_agent_id):
-    """Create conversation flow with proper branch logic and agent transfers"""
-    print(f"🔄 Step 4: Creating Conversation Flow with Branch Logic")
-    
-    headers = {
-        "Authorization": f"Bearer {RETELL_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    company_name = company_data['company_name']
-    flow_name = f"{company_name} Flow"
-    
-    # Generate global prompt from template for conversation flow
-    global_prompt = generate_global_prompt(company_data)
-    
-    print(f"   Flow Name: {flow_name}")
-    print(f"   Global Prompt: {len(global_prompt)} chars")
-    print(f"   Office Hours Agent: {office_hours_agent_id}")
-    print(f"   After Hours Agent: {after_hours_agent_id}")
-    
+def build_conversation_flow_payload(company_data, global_prompt, office_hours_agent_id, after_hours_agent_id):
+    """Build the create-conversation-flow request body with branch logic and agent swaps"""
     # Using the exact structure that works with proper branch logic
-    payload = {
-        "conversation_flow_name": flow_name,
+    return {
+        "conversation_flow_name": f"{company_data['company_name']} Flow",
         "start_speaker": "agent",
         "start_node_id": "node-1766415486721",
         "global_prompt": global_prompt,
@@ -277,8 +142,26 @@ def create_conversation_flow(company_data, llm_data, office_hours_agent_id, afte
             }
         ]
     }
+
+
+def create_conversation_flow(company_data, llm_data, office_hours_agent_id, after_hours_agent_id, global_prompt=None):
+    """Create conversation flow with proper branch logic and agent transfers"""
+    print(f"🔄 Step 4: Creating Conversation Flow with Branch Logic")
+    
+    company_name = company_data['company_name']
+    flow_name = f"{company_name} Flow"
+    
+    # Generate global prompt from template unless the caller already rendered it
+    global_prompt = global_prompt or generate_global_prompt(company_data)
+    
+    print(f"   Flow Name: {flow_name}")
+    print(f"   Global Prompt: {len(global_prompt)} chars")
+    print(f"   Office Hours Agent: {office_hours_agent_id}")
+    print(f"   After Hours Agent: {after_hours_agent_id}")
+    
+    payload = build_conversation_flow_payload(company_data, global_prompt, office_hours_agent_id, after_hours_agent_id)
     
-    response = requests.post(RETELL_URLS['conversation_flow'], headers=headers, json=payload)
+    response = get_retell_client().post('conversation_flow', json=payload)
     
     if response.status_code in [200, 201]:
         response_data = response.json()
@@ -293,8 +176,13 @@ def create_conversation_flow(company_data, llm_data, office_hours_agent_id, afte
         return None
 
 
-def create_main_router_agent(company_data, conversation_flow_id):
-    """Create Main Router Agent that uses the conversation flow and create dashboard account"""
+def create_main_router_agent(company_data, conversation_flow_id, create_dashboard=True):
+    """
+    Create Main Router Agent that uses the conversation flow and create dashboard account
+    
+    Pass create_dashboard=False when the caller registers the dashboard itself
+    (e.g. as a separate step that runs alongside the phone number purchase).
+    """
     print(f"🎯 Step 5: Creating Main Router Agent")
     
     if not conversation_flow_id:
@@ -305,11 +193,6 @@ def create_main_router_agent(company_data, conversation_flow_id):
             "dashboard_result": None
         }
     
-    headers = {
-        "Authorization": f"Bearer {RETELL_API_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
     company_name = company_data['company_name']
     agent_name = f"{company_name} (Main Router)"
     
@@ -317,62 +200,9 @@ def create_main_router_agent(company_data, conversation_flow_id):
     print(f"   Using Conversation Flow: {conversation_flow_id}")
     
     # Create Main Router Agent with enhanced configuration
-    router_agent_payload = {
-        "response_engine": {
-            "type": "conversation-flow",
-            "conversation_flow_id": conversation_flow_id,
-            "version": 0
-        },
-        "voice_id": "11labs-Grace",
-        "agent_name": agent_name,
-        "language": "en-US",
-        "channel": "voice",
-        "data_storage_setting": "everything",
-        "opt_in_signed_url": False,
-        "end_call_after_silence_ms": 150000,
-        "post_call_analysis_model": "gpt-4.1-mini",
-        "pii_config": {
-            "mode": "post_call",
-            "categories": []
-        },
-        "analysis_successful_prompt": "Evaluate whether the agent seems to have a successful call with the user, where the agent finishes the task, and the call was complete without being cutoff.",
-        "analysis_summary_prompt": "Write a 1-3 sentence summary of the call based on the call transcript. Should capture the important information and actions taken during the call.",
-        "enable_backchannel": True,
-        "backchannel_frequency": 0.4,
-        "backchannel_words": [
-            "yeah", "mm-hmm", "uh-huh", "okay", "alright", "got it", 
-            "perfect", "sounds good", "absolutely", "for sure", "understood", 
-            "okay great", "right", "gotcha"
-        ],
-        "max_call_duration_ms": 963000,
-        "boosted_keywords": [
-            "fire alarm", "fire sprinkler", "sprinkler inspection", "backflow", 
-            "backflow preventer", "standpipe", "extinguisher", "fire extinguisher", 
-            "extinguishers", "hydrant", "fire hydrant", "alarm panel", "pull station", 
-            "smoke detector", "duct detector", "monitoring", "central station", 
-            "NFPA", "NFPA 25", "NFPA 72", "AHJ", "impairment", "inspection", 
-            "testing", "maintenance", "ITM", "annual inspection", "quarterly inspection", 
-            "five-year", "flow test", "hydrostatic test", "riser", "FDC", 
-            "fire department connection", "emergency", "urgent", "after hours", 
-            "dispatch", "technician", "service call", "work order", "callback number", 
-            "site contact", "access code", "gate code", "lockbox", "landlord", 
-            "property manager", "suite", "unit", "building", "floor", "warehouse", 
-            "front entrance", "rear entrance", "loading dock", "cross street", 
-            "landmark", "zip code", "postal code", "pincode", "HVAC", "thermostat", 
-            "compressor", "condenser", "evaporator", "refrigerant", "Freon", 
-            "heat pump", "RTU", "rooftop unit", "air handler", "ductwork", 
-            "blower motor", "capacitor"
-        ],
-        "ambient_sound": "coffee-shop",
-        "normalize_for_speech": True,
-        "stt_mode": "accurate",
-        "allow_user_dtmf": False,
-        "user_dtmf_options": {},
-        "denoising_mode": "noise-and-background-speech-cancellation",
-        "interruption_sensitivity": 0.5
-    }
+    router_agent_body = render_router_agent_body(agent_name, conversation_flow_id)
 
-    router_agent_response = requests.post(RETELL_URLS['agent'], headers=headers, json=router_agent_payload)
+    router_agent_response = get_retell_client().post('agent', data=router_agent_body, headers=JSON_HEADERS)
     
     if router_agent_response.status_code not in [200, 201]:
         print(f"   ⚠️  Main Router Agent creation failed: {router_agent_response.text}")
@@ -387,6 +217,13 @@ def create_main_router_agent(company_data, conversation_flow_id):
     print(f"   ✅ Main Router Agent created: {router_agent_id} (version 0)")
     print(f"   ✅ Agent Name: {agent_name}")
     
+    if not create_dashboard:
+        return {
+            "agent_id": router_agent_id,
+            "conversation_flow_id": conversation_flow_id,
+            "dashboard_result": None
+        }
+    
     # Immediately create dashboard account after agent creation
     print(f"\n🔧 Creating dashboard account for {company_name}...")
     
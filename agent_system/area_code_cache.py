@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Area Code Availability Cache
+Remember which area codes recently had no phone numbers in stock, shared
+across onboardings through a local JSON file or a Postgres table
+"""
+
+import json
+import os
+import re
+import threading
+import time
+
+from .config import (
+    AREA_CODE_CACHE_BACKEND, AREA_CODE_CACHE_FILE, AREA_CODE_FAILURE_TTL, AREA_CODE_SUCCESS_TTL
+)
+
+# create-phone-number statuses that mean "no stock for this area code"; auth,
+# rate-limit and server errors say nothing about availability and are not cached
+UNAVAILABLE_STATUS_CODES = (404, 409)
+
+# Validation statuses that count only when the error body says the stock ran out; any
+# other 400/422 (a malformed payload, a bad parameter) is a plain, uncached failure
+UNAVAILABLE_IF_BODY_MATCHES_STATUS_CODES = (400, 422)
+NO_INVENTORY_PATTERN = re.compile(
+    r"no (available )?(phone )?numbers?|numbers? (is |are )?(not |un)available|out of stock|inventory",
+    re.IGNORECASE
+)
+
+
+class FileAreaCodeCache:
+    """Area code results in a JSON file, rewritten atomically on every update"""
+
+    def __init__(self, path=AREA_CODE_CACHE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, area_codes):
+        """Return {area_code: {"last_success", "last_failure", "failures"}} for known codes"""
+        entries = self._load()
+        return {code: entries[code] for code in area_codes if code in entries}
+
+    def record(self, area_code, success, now=None):
+        with self._lock:
+            now = now or time.time()
+            entries = self._load()
+            entry = entries.get(area_code, {"last_success": None, "last_failure": None, "failures": 0})
+            if success:
+                entry.update(last_success=now, failures=0)
+            else:
+                entry.update(last_failure=now, failures=entry["failures"] + 1)
+            entries[area_code] = entry
+
+            # Drop entries too old to influence ordering so the file stays small
+            horizon = now - max(AREA_CODE_FAILURE_TTL, AREA_CODE_SUCCESS_TTL)
+            entries = {
+                code: e for code, e in entries.items()
+                if max(e["last_success"] or 0, e["last_failure"] or 0) >= horizon
+            }
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+
+
+class PostgresAreaCodeCache:
+    """Area code results in the area_code_availability table (see database_setup.sql)"""
+
+    def get(self, area_codes):
+        from .database import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    SELECT area_code,
+                           EXTRACT(EPOCH FROM last_success_at),
+                           EXTRACT(EPOCH FROM last_failure_at),
+                           failure_count
+                    FROM area_code_availability
+                    WHERE area_code = ANY(%s)
+                """, (list(area_codes),))
+                return {
+                    code: {
+                        "last_success": float(success) if success is not None else None,
+                        "last_failure": float(failure) if failure is not None else None,
+                        "failures": failures
+                    }
+                    for code, success, failure, failures in cur.fetchall()
+                }
+        finally:
+            conn.close()
+
+    def record(self, area_code, success, now=None):
+        from .database import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                if success:
+                    cur.execute("""
+                        INSERT INTO area_code_availability (area_code, last_success_at, failure_count, updated_at)
+                        VALUES (%s, to_timestamp(%s), 0, now())
+                        ON CONFLICT (area_code) DO UPDATE
+                        SET last_success_at = EXCLUDED.last_success_at, failure_count = 0, updated_at = now()
+                    """, (area_code, now or time.time()))
+                else:
+                    cur.execute("""
+                        INSERT INTO area_code_availability (area_code, last_failure_at, failure_count, updated_at)
+                        VALUES (%s, to_timestamp(%s), 1, now())
+                        ON CONFLICT (area_code) DO UPDATE
+                        SET last_failure_at = EXCLUDED.last_failure_at,
+                            failure_count = area_code_availability.failure_count + 1,
+                            updated_at = now()
+                    """, (area_code, now or time.time()))
+            conn.commit()
+        finally:
+            conn.close()
+
+
+class NullAreaCodeCache:
+    """Cache disabled: nothing is known, nothing is stored"""
+
+    def get(self, area_codes):
+        return {}
+
+    def record(self, area_code, success, now=None):
+        pass
+
+
+_cache = None
+
+
+def get_area_code_cache():
+    """Return the cache selected by AREA_CODE_CACHE_BACKEND (file, postgres or off)"""
+    global _cache
+    if _cache is None:
+        if AREA_CODE_CACHE_BACKEND == 'postgres':
+            _cache = PostgresAreaCodeCache()
+        elif AREA_CODE_CACHE_BACKEND == 'file':
+            _cache = FileAreaCodeCache()
+        else:
+            _cache = NullAreaCodeCache()
+    return _cache
+
+
+def is_recently_exhausted(entry, now):
+    """True if the area code failed within the TTL and has not succeeded since"""
+    last_failure = entry.get("last_failure")
+    if not last_failure or now - last_failure > AREA_CODE_FAILURE_TTL:
+        return False
+    last_success = entry.get("last_success")
+    return not last_success or last_success < last_failure
+
+
+def order_area_codes(area_codes, cache=None, now=None):
+    """
+    Order area codes for purchase attempts using recent results
+
+    Codes that recently ran out of stock are skipped; the rest keep their order so
+    the customer's own area code is still tried first. If every code is exhausted
+    they are all returned in their original order rather than giving up without
+    trying.
+
+    Returns:
+        tuple: (area codes to try in order, area codes skipped)
+    """
+    now = now or time.time()
+    unique_codes = list(dict.fromkeys(area_codes))
+
+    try:
+        entries = (cache or get_area_code_cache()).get(unique_codes)
+    except Exception as e:
+        print(f"   ⚠️  Area code cache unavailable, trying all area codes: {e}")
+        return unique_codes, []
+
+    exhausted = [code for code in unique_codes if is_recently_exhausted(entries.get(code, {}), now)]
+    to_try = [code for code in unique_codes if code not in exhausted]
+
+    if not to_try:
+        return unique_codes, []
+    return to_try, exhausted
+
+
+def is_no_inventory_response(status_code, body_text=None):
+    """Whether a create-phone-number failure says the area code has no numbers in stock"""
+    if status_code in UNAVAILABLE_STATUS_CODES:
+        return True
+    return (status_code in UNAVAILABLE_IF_BODY_MATCHES_STATUS_CODES
+            and bool(body_text) and NO_INVENTORY_PATTERN.search(body_text) is not None)
+
+
+def record_area_code_result(area_code, status_code, body_text=None, cache=None):
+    """Record a create-phone-number outcome; errors unrelated to stock are ignored"""
+    if status_code in [200, 201]:
+        success = True
+    elif is_no_inventory_response(status_code, body_text):
+        success = False
+    else:
+        return
+
+    try:
+        (cache or get_area_code_cache()).record(area_code, success)
+    except Exception as e:
+        print(f"   ⚠️  Could not update area code cache: {e}")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Area Code Index
+North American area codes with their region, time zone and nearby codes ranked by distance
+
+The index is precomputed from data/nanp_area_codes.csv into data/area_code_index.json,
+so a lookup is a single dict access. After editing the CSV, rebuild it with:
+
+    python -m agent_system.area_codes --rebuild
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+SOURCE_FILE = os.path.join(DATA_DIR, 'nanp_area_codes.csv')
+INDEX_FILE = os.path.join(DATA_DIR, 'area_code_index.json')
+# Copy bundled with the Vercel API, which cannot import agent_system
+WEB_INDEX_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'clara-onboarding-website', 'api', '_data', 'area_code_index.json'
+)
+
+# Nearby codes stored per area code. Same-country codes rank ahead of closer
+# cross-border ones, and overlays share a location so they come first.
+NEARBY_LIMIT = 12
+
+# Order of the values stored for each area code in the index file
+INDEX_FIELDS = ["region", "country", "time_zone", "nearby"]
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+def build_area_code_index(source_path=SOURCE_FILE, nearby_limit=NEARBY_LIMIT):
+    """Rank every area code's neighbours by distance and return the index dict"""
+    with open(source_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    points = {row['area_code']: (float(row['latitude']), float(row['longitude'])) for row in rows}
+    countries = {row['area_code']: row['country'] for row in rows}
+    codes = {}
+    for row in rows:
+        code = row['area_code']
+        lat, lon = points[code]
+        ranked = sorted(
+            (other for other in points if other != code),
+            key=lambda other: (
+                countries[other] != row['country'],
+                round(haversine_km(lat, lon, *points[other]), 1),
+                other
+            )
+        )
+        codes[code] = [row['region'], row['country'], row['time_zone'], ranked[:nearby_limit]]
+
+    return {"version": 1, "fields": INDEX_FIELDS, "codes": codes}
+
+
+def write_area_code_index(source_path=SOURCE_FILE, index_paths=(INDEX_FILE, WEB_INDEX_FILE), nearby_limit=NEARBY_LIMIT):
+    """Rebuild the index files from the source CSV (the web copy only if its directory exists)"""
+    index = build_area_code_index(source_path, nearby_limit)
+    for index_path in index_paths:
+        if not os.path.isdir(os.path.dirname(index_path)):
+            continue
+        with open(index_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, separators=(',', ':'), sort_keys=True)
+    return index
+
+
+_codes = None
+
+
+def load_area_code_index(index_path=INDEX_FILE):
+    """Load the index once per process; returns {area_code: [region, country, time_zone, nearby]}"""
+    global _codes
+    if _codes is None:
+        with open(index_path, encoding='utf-8') as f:
+            _codes = json.load(f)["codes"]
+    return _codes
+
+
+def get_area_code_info(area_code):
+    """Return {"area_code", "region", "country", "time_zone", "nearby"} or None if unknown"""
+    entry = load_area_code_index().get(str(area_code))
+    if entry is None:
+        return None
+    return {"area_code": str(area_code), **dict(zip(INDEX_FIELDS, entry))}
+
+
+def get_nearby_area_codes(area_code, limit=5):
+    """Closest area codes to area_code, nearest first; empty if the code is unknown"""
+    entry = load_area_code_index().get(str(area_code))
+    return entry[3][:limit] if entry else []
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Area code index tools")
+    parser.add_argument("--rebuild", action="store_true", help=f"rebuild {INDEX_FILE} from {SOURCE_FILE}")
+    parser.add_argument("area_code", nargs="?", help="area code to look up")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index = write_area_code_index()
+        print(f"✅ Area code index rebuilt: {len(index['codes'])} area codes")
+    if args.area_code:
+        print(json.dumps(get_area_code_info(args.area_code), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+Async Provisioning Pipeline
+asyncio twin of create_agent_automation built on aiohttp and asyncpg, so one
+process can drive many onboardings concurrently without a thread per job
+"""
+
+import asyncio
+import re
+import time
+
+import aiohttp
+import asyncpg
+
+from .config import (
+    DB_CONFIG, HTTP_TIMEOUTS, STEP_GRAPH_MAX_WORKERS, ASYNC_HTTP_CONNECTION_LIMIT,
+    ASYNC_DB_POOL_MIN_SIZE, ASYNC_DB_POOL_MAX_SIZE, ASYNC_ONBOARDING_CONCURRENCY, DEADLINE_DEFERRABLE_STEPS
+)
+from .retell_client import ENDPOINT_URLS, RetryPolicy, build_auth_headers, log_retry
+from .rate_limiter import reserve_call, record_throttled
+from .deadline import DeadlineExceeded, current_deadline
+from .circuit_breaker import get_circuit_breaker
+from .knowledge_base import normalize_knowledge_base_name, parse_sitemap_urls, build_knowledge_base_form
+from .llm_creation import generate_global_prompt, generate_office_hours_prompt, generate_after_hours_prompt
+from .agent_creation import build_conversation_flow_payload
+from .payloads import JSON_HEADERS, render_llm_body, render_agent_body, render_router_agent_body
+from .dashboard_creation import DASHBOARD_HEADERS, build_dashboard_payload, generate_credentials, sanitize_company_name
+from .phone_number import get_area_code_fallbacks, build_phone_number_payload
+from .area_code_cache import order_area_codes, record_area_code_result
+from .database import build_company_rows, company_save_sql, company_save_params
+from .main import build_final_result, print_final_result, print_troubleshooting_tips, track_progress
+from .step_graph import StepGraph
+
+
+# aiohttp >= 3.10 tells a connect timeout apart from a read timeout
+CONNECT_ERRORS = (aiohttp.ClientConnectorError,) + (
+    (aiohttp.ConnectionTimeoutError,) if hasattr(aiohttp, 'ConnectionTimeoutError') else ()
+)
+
+
+def _asyncpg_sql(query):
+    """Convert psycopg2 %s placeholders to asyncpg $n placeholders"""
+    counter = iter(range(1, query.count('%s') + 1))
+    return re.sub(r'%s', lambda _: f"${next(counter)}", query)
+
+
+class AsyncRetellClient:
+    """
+    aiohttp counterpart of retell_client.RetellClient
+
+    Same endpoint names, auth headers, per-endpoint timeouts, rate limits,
+    retries and circuit breakers, over one aiohttp session whose connector keeps connections alive
+    between calls.
+    """
+
+    def __init__(self, session=None, retry_policy=None):
+        self.session = session or create_http_session()
+        self.auth_headers = build_auth_headers()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeouts = {
+            endpoint: aiohttp.ClientTimeout(sock_connect=connect, sock_read=read)
+            for endpoint, (connect, read) in HTTP_TIMEOUTS.items()
+        }
+
+    async def post(self, endpoint, json=None, data=None, headers=None, authenticated=True):
+        """POST to a named endpoint and return (status_code, parsed JSON or None, response text)"""
+        request_headers = dict(self.auth_headers) if authenticated else {}
+        if headers:
+            request_headers.update(headers)
+
+        breaker = get_circuit_breaker(ENDPOINT_URLS[endpoint])
+        deadline = current_deadline()
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                # The file and postgres limiters block, so take the token off the event loop
+                wait = await asyncio.to_thread(reserve_call, endpoint)
+                if deadline is not None and wait >= deadline.remaining():
+                    raise DeadlineExceeded(deadline)
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                timeout = self.timeouts.get(endpoint, self.timeouts['default'])
+                if deadline is not None:
+                    connect, read = deadline.timeout((timeout.sock_connect, timeout.sock_read))
+                    timeout = aiohttp.ClientTimeout(total=deadline.remaining(), sock_connect=connect, sock_read=read)
+
+                async with self.session.post(
+                    ENDPOINT_URLS[endpoint], headers=request_headers, json=json, data=data, timeout=timeout
+                ) as response:
+                    retry_after = response.headers.get('Retry-After')
+                    if response.status == 429:
+                        await asyncio.to_thread(record_throttled, endpoint, retry_after)
+                    text = await response.text()
+                    try:
+                        body = await response.json(content_type=None) if text else None
+                    except ValueError:
+                        body = None
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                if not self.retry_policy.retries_error(endpoint, isinstance(e, CONNECT_ERRORS)):
+                    raise
+                delay = self.retry_policy.delay(attempt, started)
+                if delay is None:
+                    raise
+                log_retry(endpoint, f"failed ({type(e).__name__})", delay, attempt, self.retry_policy.attempts)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                # Ended without an outcome for the host (e.g. DeadlineExceeded, or the step was cancelled)
+                breaker.release()
+                raise
+
+            breaker.record_response(response.status)
+            if not self.retry_policy.retries_status(endpoint, response.status, retry_after):
+                return response.status, body, text
+            delay = self.retry_policy.delay(attempt, started, retry_after)
+            if delay is None:
+                return response.status, body, text
+            log_retry(endpoint, f"returned {response.status}", delay, attempt, self.retry_policy.attempts)
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def create_http_session():
+    """Create an aiohttp session with a bounded keep-alive connection pool"""
+    connector = aiohttp.TCPConnector(limit=ASYNC_HTTP_CONNECTION_LIMIT, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector)
+
+
+async def create_db_pool():
+    """Create an asyncpg connection pool from DB_CONFIG"""
+    return await asyncpg.create_pool(
+        min_size=ASYNC_DB_POOL_MIN_SIZE,
+        max_size=ASYNC_DB_POOL_MAX_SIZE,
+        **DB_CONFIG
+    )
+
+
+async def create_knowledge_base_async(client, website_url, knowledge_base_name):
+    """Create knowledge base from website sitemap"""
+    print(f"📚 Step 1: Creating Knowledge Base from {website_url}")
+    knowledge_base_name = normalize_knowledge_base_name(knowledge_base_name)
+
+    try:
+        status, body, text = await client.post('sitemap', json={"website_url": website_url})
+        if status not in [200, 201]:
+            detail = body.get('message', text) if isinstance(body, dict) else text
+            raise Exception(f"Sitemap listing failed: {status} - {detail}")
+        sitemap_urls = parse_sitemap_urls(body)
+
+        status, body, text = await client.post(
+            'knowledge_base', data=build_knowledge_base_form(knowledge_base_name, sitemap_urls)
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        raise Exception(f"Network error while creating knowledge base: {str(e)}")
+
+    if status not in [200, 201]:
+        detail = text
+        if isinstance(body, dict):
+            detail = body.get('message') or body.get('error') or body
+        raise Exception(f"Knowledge base creation failed: {status} - {detail}")
+
+    knowledge_base_id = body["knowledge_base_id"]
+    print(f"✅ Knowledge base created: {knowledge_base_id}")
+    return knowledge_base_id
+
+
+async def create_llm_async(client, label, general_prompt, knowledge_base_id):
+    """Create a single Retell LLM and return its llm_id"""
+    request_body = render_llm_body(general_prompt, knowledge_base_id)
+    status, body, text = await client.post('llm', data=request_body, headers=JSON_HEADERS)
+
+    if status not in [200, 201]:
+        print(f"   ❌ {label} LLM creation failed: {status} - {text}")
+        raise Exception(f"{label} LLM creation failed: {status} - {text}")
+
+    llm_id = body["llm_id"]
+    print(f"   ✅ {label} LLM created: {llm_id}")
+    return llm_id
+
+
+async def create_agent_async(client, label, company_data, llm_id, knowledge_base_id):
+    """Create a single LLM-based agent and return its agent_id"""
+    agent_name = f"{company_data['company_name']} ({label})"
+    request_body = render_agent_body(agent_name, llm_id, knowledge_base_id)
+    status, body, text = await client.post('agent', data=request_body, headers=JSON_HEADERS)
+
+    if status not in [200, 201]:
+        raise Exception(f"{label} Agent creation failed: {text}")
+
+    agent_id = body["agent_id"]
+    print(f"   {label} Agent created: {agent_id} (version 0)")
+    return agent_id
+
+
+async def create_conversation_flow_async(client, company_data, global_prompt, office_hours_agent_id, after_hours_agent_id):
+    """Create conversation flow with branch logic; returns None on failure"""
+    print(f"🔄 Step 4: Creating Conversation Flow with Branch Logic")
+    payload = build_conversation_flow_payload(company_data, global_prompt, office_hours_agent_id, after_hours_agent_id)
+    status, body, text = await client.post('conversation_flow', json=payload)
+
+    if status not in [200, 201]:
+        print(f"   ⚠️  Conversation Flow creation failed ({status}): {text}")
+        return None
+
+    flow_id = body.get('conversation_flow_id')
+    print(f"   ✅ Conversation Flow created: {flow_id}")
+    return flow_id
+
+
+async def create_main_router_agent_async(client, company_data, conversation_flow_id):
+    """Create Main Router Agent on the conversation flow; agent_id is None on failure"""
+    print(f"🎯 Step 5: Creating Main Router Agent")
+    router_agent_data = {
+        "agent_id": None,
+        "conversation_flow_id": conversation_flow_id,
+        "dashboard_result": None
+    }
+    if not conversation_flow_id:
+        print(f"   ⚠️  No conversation flow available, skipping Main Router Agent")
+        router_agent_data["conversation_flow_id"] = None
+        return router_agent_data
+
+    agent_name = f"{company_data['company_name']} (Main Router)"
+    request_body = render_router_agent_body(agent_name, conversation_flow_id)
+    status, body, text = await client.post('agent', data=request_body, headers=JSON_HEADERS)
+
+    if status not in [200, 201]:
+        print(f"   ⚠️  Main Router Agent creation failed: {text}")
+        return router_agent_data
+
+    router_agent_data["agent_id"] = body["agent_id"]
+    print(f"   ✅ Main Router Agent created: {router_agent_data['agent_id']} (version 0)")
+    return router_agent_data
+
+
+async def create_dashboard_account_async(client, company_name, agent_id_mr):
+    """Create dashboard account and register agent"""
+    email, password = generate_credentials(company_name)
+    try:
+        status, body, text = await client.post(
+            'dashboard_register', json=build_dashboard_payload(company_name, agent_id_mr),
+            headers=DASHBOARD_HEADERS, authenticated=False
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"❌ Dashboard creation error: {e}")
+        return {"success": False, "error": str(e), "email": email, "password": password}
+
+    if status not in [200, 201]:
+        print(f"❌ Dashboard creation failed: {status}")
+        return {"success": False, "error": f"HTTP {status}: {text}", "email": email, "password": password}
+
+    print("✅ Dashboard account created successfully!")
+    return {
+        "success": True,
+        "email": email,
+        "password": password,
+        "agent_id": agent_id_mr,
+        "company_name": sanitize_company_name(company_name),
+        "response": body or {}
+    }
+
+
+async def purchase_phone_number_async(client, company_name, area_code, main_router_agent_id):
+    """Purchase a phone number with area code fallback logic; returns None if none available"""
+    print(f"📞 Step 6: Purchasing Phone Number")
+    nickname = f"{company_name} Number"
+
+    # The cache may be a file or Postgres, so keep its blocking I/O off the event loop
+    area_codes_to_try, skipped_area_codes = await asyncio.to_thread(
+        order_area_codes, [area_code] + get_area_code_fallbacks(area_code)
+    )
+    if skipped_area_codes:
+        print(f"   Skipping recently exhausted area codes: {skipped_area_codes}")
+
+    for attempt_area_code in area_codes_to_try:
+        payload = build_phone_number_payload(nickname, attempt_area_code, main_router_agent_id)
+        status, body, text = await client.post('phone_number', json=payload)
+        await asyncio.to_thread(record_area_code_result, attempt_area_code, status, text)
+
+        if status in [200, 201]:
+            print(f"   ✅ Phone number purchased: {body.get('phone_number')} (area code {attempt_area_code})")
+            return {
+                "phone_number": body.get("phone_number"),
+                "phone_number_id": body.get("phone_number_id"),
+                "area_code_used": attempt_area_code,
+                "nickname": nickname,
+                "inbound_agent_id": main_router_agent_id
+            }
+        print(f"   ⚠️  Failed with area code {attempt_area_code}: {status} - {text}")
+
+    print(f"   ❌ Failed to purchase phone number with any area code")
+    return None
+
+
+async def save_company_data_async(db_pool, company_data, knowledge_base_id, agent_data, llm_data,
+                                  conversation_flow_id, router_agent_data, phone_data=None, dashboard_data=None,
+                                  global_prompt=None):
+    """Save all configuration to database in one statement (one round trip)"""
+    print(f"💾 Saving to database")
+    rows = build_company_rows(
+        company_data, knowledge_base_id, agent_data, llm_data,
+        conversation_flow_id, router_agent_data, phone_data, dashboard_data, global_prompt
+    )
+
+    async with db_pool.acquire() as conn:
+        await conn.execute(_asyncpg_sql(company_save_sql()), *company_save_params([rows]))
+
+    print(f"✅ All data saved to database")
+    return rows['company_id']
+
+
+def build_async_provisioning_graph(client, db_pool, max_workers=STEP_GRAPH_MAX_WORKERS):
+    """Async counterpart of main.build_provisioning_graph with the same steps and values"""
+
+    async def knowledge_base(company_data):
+        try:
+            return await create_knowledge_base_async(client, company_data['website_url'], company_data['company_name'])
+        except Exception as e:
+            print(f"❌ Knowledge base creation error: {e}")
+            raise Exception(f"Knowledge base creation failed: {e}")
+
+    async def office_hours_llm(company_data, knowledge_base_id):
+        prompt = generate_office_hours_prompt(company_data)
+        try:
+            llm_id = await create_llm_async(client, "Office Hours", prompt, knowledge_base_id)
+        except Exception as e:
+            raise Exception(f"LLM creation failed: {e}")
+        return {"llm_id": llm_id, "prompt": prompt}
+
+    async def after_hours_llm(company_data, knowledge_base_id):
+        prompt = generate_after_hours_prompt(company_data)
+        try:
+            llm_id = await create_llm_async(client, "After Hours", prompt, knowledge_base_id)
+        except Exception as e:
+            raise Exception(f"LLM creation failed: {e}")
+        return {"llm_id": llm_id, "prompt": prompt}
+
+    async def office_hours_agent(company_data, office_hours_llm, knowledge_base_id):
+        try:
+            return await create_agent_async(client, "Office Hours", company_data, office_hours_llm['llm_id'], knowledge_base_id)
+        except Exception as e:
+            raise Exception(f"Agent creation failed: {e}")
+
+    async def after_hours_agent(company_data, after_hours_llm, knowledge_base_id):
+        try:
+            return await create_agent_async(client, "After Hours", company_data, after_hours_llm['llm_id'], knowledge_base_id)
+        except Exception as e:
+            raise Exception(f"Agent creation failed: {e}")
+
+    async def global_prompt(company_data):
+        return generate_global_prompt(company_data)
+
+    async def conversation_flow(company_data, global_prompt, office_hours_agent_id, after_hours_agent_id):
+        try:
+            return await create_conversation_flow_async(
+                client, company_data, global_prompt, office_hours_agent_id, after_hours_agent_id
+            )
+        except Exception as e:
+            print(f"❌ Conversation flow creation error: {e}")
+            return None
+
+    async def main_router_agent(company_data, conversation_flow_id):
+        try:
+            return await create_main_router_agent_async(client, company_data, conversation_flow_id)
+        except Exception as e:
+            print(f"❌ Main router agent creation error: {e}")
+            return {"agent_id": None, "conversation_flow_id": conversation_flow_id, "dashboard_result": None}
+
+    async def dashboard(company_data, router_agent_data):
+        if not router_agent_data['agent_id']:
+            return None
+        return await create_dashboard_account_async(client, company_data['company_name'], router_agent_data['agent_id'])
+
+    async def phone_number(company_data, router_agent_data):
+        if not router_agent_data['agent_id']:
+            return None
+        try:
+            return await purchase_phone_number_async(
+                client, company_data['company_name'], company_data['area_code'], router_agent_data['agent_id']
+            )
+        except Exception as e:
+            print(f"❌ Phone number purchase error: {e}")
+            return None
+
+    async def database(company_data, global_prompt, knowledge_base_id, office_hours_llm, after_hours_llm,
+                       office_hours_agent_id, after_hours_agent_id, conversation_flow_id,
+                       router_agent_data, phone_data, dashboard_result):
+        agent_data = {
+            "office_hours": {"llm_id": office_hours_llm['llm_id'], "agent_id": office_hours_agent_id},
+            "after_hours": {"llm_id": after_hours_llm['llm_id'], "agent_id": after_hours_agent_id}
+        }
+        llm_data = {"office_hours": office_hours_llm, "after_hours": after_hours_llm}
+        try:
+            return await save_company_data_async(
+                db_pool, company_data, knowledge_base_id, agent_data, llm_data,
+                conversation_flow_id, router_agent_data, phone_data, dashboard_result, global_prompt
+            )
+        except Exception as e:
+            print(f"❌ Database save error: {e}")
+            print(f"   Agents created successfully but data not saved to database")
+            return None
+
+    graph = StepGraph(max_workers=max_workers)
+    graph.add_step("knowledge_base", knowledge_base,
+                   inputs=["company_data"], outputs=["knowledge_base_id"])
+    graph.add_step("global_prompt", global_prompt,
+                   inputs=["company_data"], outputs=["global_prompt"])
+    graph.add_step("office_hours_llm", office_hours_llm,
+                   inputs=["company_data", "knowledge_base_id"], outputs=["office_hours_llm"])
+    graph.add_step("after_hours_llm", after_hours_llm,
+                   inputs=["company_data", "knowledge_base_id"], outputs=["after_hours_llm"])
+    graph.add_step("office_hours_agent", office_hours_agent,
+                   inputs=["company_data", "office_hours_llm", "knowledge_base_id"],
+                   outputs=["office_hours_agent_id"])
+    graph.add_step("after_hours_agent", after_hours_agent,
+                   inputs=["company_data", "after_hours_llm", "knowledge_base_id"],
+                   outputs=["after_hours_agent_id"])
+    graph.add_step("conversation_flow", conversation_flow,
+                   inputs=["company_data", "global_prompt", "office_hours_agent_id", "after_hours_agent_id"],
+                   outputs=["conversation_flow_id"])
+    graph.add_step("main_router_agent", main_router_agent,
+                   inputs=["company_data", "conversation_flow_id"], outputs=["router_agent_data"])
+    graph.add_step("dashboard", dashboard,
+                   inputs=["company_data", "router_agent_data"], outputs=["dashboard_result"],
+                   defer_within=DEADLINE_DEFERRABLE_STEPS.get("dashboard"))
+    graph.add_step("phone_number", phone_number,
+                   inputs=["company_data", "router_agent_data"], outputs=["phone_data"])
+    graph.add_step("database", database,
+                   inputs=["company_data", "global_prompt", "knowledge_base_id", "office_hours_llm", "after_hours_llm",
+                           "office_hours_agent_id", "after_hours_agent_id", "conversation_flow_id",
+                           "router_agent_data", "phone_data", "dashboard_result"],
+                   outputs=["company_id"])
+    return graph
+
+
+async def create_agent_automation_async(company_data, client=None, db_pool=None, max_workers=STEP_GRAPH_MAX_WORKERS,
+                                        progress=None, checkpoint=None, deadline=None):
+    """
+    Async twin of create_agent_automation
+
+    Pass a shared AsyncRetellClient and db_pool when running many onboardings in one
+    process; otherwise a private client and pool are created and closed for this call.
+    progress, checkpoint and deadline work as in create_agent_automation.
+    """
+    own_client = client is None
+    own_pool = db_pool is None
+    client = client or AsyncRetellClient()
+    try:
+        db_pool = db_pool or await create_db_pool()
+
+        print(f"🚀 Starting Async Agent Creation for {company_data['company_name']}")
+        graph = build_async_provisioning_graph(client, db_pool, max_workers)
+        on_event = track_progress(progress, len(graph.steps), checkpoint) if progress else None
+        values, timing = await graph.run_async({"company_data": company_data}, on_event=on_event,
+                                               checkpoint=checkpoint, deadline=deadline)
+
+        final_result = build_final_result(values, timing)
+        print_final_result(final_result)
+        return final_result
+
+    except Exception as e:
+        print_troubleshooting_tips(e, company_data)
+        raise
+    finally:
+        if own_client:
+            await client.close()
+        if own_pool and db_pool is not None:
+            await db_pool.close()
+
+
+async def run_onboardings_async(companies, concurrency=ASYNC_ONBOARDING_CONCURRENCY):
+    """
+    Provision many companies on one event loop, sharing one AsyncRetellClient and DB pool
+
+    Returns one entry per company, in order: the final result dict, or the
+    exception that onboarding raised.
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async with AsyncRetellClient() as client:
+        db_pool = await create_db_pool()
+        try:
+            async def onboard(company_data):
+                async with slots:
+                    return await create_agent_automation_async(company_data, client=client, db_pool=db_pool)
+
+            return await asyncio.gather(*(onboard(c) for c in companies), return_exceptions=True)
+        finally:
+            await db_pool.close()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Bulk Onboarding
+Provision many companies from a CSV or JSONL file with bounded concurrency
+
+Usage:
+    python -m agent_system.bulk_onboarding companies.csv --workers 4
+    python -m agent_system.bulk_onboarding companies.jsonl --results batch1.results.jsonl
+
+Each processed row appends one JSON line to the results file. Re-running the
+same command resumes the batch: rows already recorded as succeeded are skipped,
+failed and invalid rows are attempted again.
+"""
+
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timezone
+
+from .config import BULK_ONBOARDING_WORKERS
+from .user_input import build_company_data
+from .main import create_agent_automation
+from .retell_client import warm_retell_client
+
+
+def iter_company_records(path):
+    """Yield (row_number, record) from a .csv or .jsonl file without loading it all"""
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row_number, record in enumerate(csv.DictReader(f), start=1):
+                yield row_number, record
+        return
+
+    with open(path, encoding='utf-8') as f:
+        row_number = 0
+        for line in f:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = {"_parse_error": f"Invalid JSON: {e}"}
+            if not isinstance(record, dict):
+                record = {"_parse_error": "Each JSONL line must be an object"}
+            yield row_number, record
+
+
+def row_key(row_number, company_name):
+    """Identify a row across runs by position and company name"""
+    return f"{row_number}:{(company_name or '').strip().lower()}"
+
+
+def load_succeeded_rows(results_path):
+    """Return the row keys already recorded as succeeded in a results file"""
+    succeeded = set()
+    if not os.path.exists(results_path):
+        return succeeded
+
+    with open(results_path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Torn last line from an interrupted run
+            if result.get('status') == 'succeeded':
+                succeeded.add(row_key(result['row'], result.get('company_name')))
+    return succeeded
+
+
+def onboard_row(row_number, record):
+    """Validate and provision one row; never raises, returns the result line"""
+    started = time.perf_counter()
+    result = {"row": row_number, "company_name": record.get('company_name')}
+
+    try:
+        if '_parse_error' in record:
+            raise ValueError(record['_parse_error'])
+        company_data = build_company_data(record)
+    except ValueError as e:
+        result.update(status="invalid", error=str(e))
+        return result
+
+    try:
+        final_result = create_agent_automation(company_data)
+        dashboard = final_result['dashboard_credentials'] or {}
+        result.update(
+            status="succeeded",
+            company_id=final_result['company_id'],
+            main_router_agent_id=final_result['main_router_agent_id'],
+            phone_number=final_result['phone_number'],
+            dashboard_email=dashboard.get('email') if dashboard.get('success') else None
+        )
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+
+    result["duration_ms"] = int((time.perf_counter() - started) * 1000)
+    return result
+
+
+def run_bulk_onboarding(input_path, results_path=None, workers=BULK_ONBOARDING_WORKERS, resume=True):
+    """
+    Provision every company in input_path, writing one result line per row
+
+    At most `workers` companies are provisioned at once, and at most twice that
+    many rows are read ahead, so arbitrarily large files stream in constant memory.
+
+    Returns:
+        dict: counts per status plus the results file path
+    """
+    results_path = results_path or f"{os.path.splitext(input_path)[0]}.results.jsonl"
+    succeeded = load_succeeded_rows(results_path) if resume else set()
+    summary = {"succeeded": 0, "failed": 0, "invalid": 0, "skipped": 0, "results_path": results_path}
+
+    print(f"📦 Bulk onboarding from {input_path} with {workers} workers")
+    print(f"   Results: {results_path}" + (f" ({len(succeeded)} rows already succeeded)" if succeeded else ""))
+
+    warm_retell_client()
+
+    with open(results_path, 'a' if resume else 'w', encoding='utf-8') as results_file, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="onboard") as pool:
+
+        def record_result(result):
+            result["finished_at"] = datetime.now(timezone.utc).isoformat()
+            results_file.write(json.dumps(result) + "\n")
+            results_file.flush()
+            summary[result['status']] += 1
+            icon = {"succeeded": "✅", "failed": "❌", "invalid": "⚠️ "}[result['status']]
+            print(f"{icon} Row {result['row']} ({result['company_name']}): {result['status']}"
+                  + (f" - {result['error']}" if result.get('error') else ""))
+
+        running = set()
+        for row_number, record in iter_company_records(input_path):
+            if row_key(row_number, record.get('company_name')) in succeeded:
+                summary["skipped"] += 1
+                continue
+
+            # Bound the read-ahead so a huge file never queues every row at once
+            while len(running) >= workers * 2:
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record_result(future.result())
+
+            running.add(pool.submit(onboard_row, row_number, record))
+
+        for future in wait(running).done:
+            record_result(future.result())
+
+    print(f"\n📦 Bulk onboarding finished: {summary['succeeded']} succeeded, {summary['failed']} failed, "
+          f"{summary['invalid']} invalid, {summary['skipped']} skipped (already succeeded)")
+    return summary
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Provision many companies from a CSV or JSONL file")
+    parser.add_argument("input", help="CSV (with a header row) or JSONL file, one company per row")
+    parser.add_argument("--workers", type=int, default=BULK_ONBOARDING_WORKERS,
+                        help=f"companies provisioned concurrently (default {BULK_ONBOARDING_WORKERS})")
+    parser.add_argument("--results", help="results JSONL path (default: <input>.results.jsonl)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="start over instead of skipping rows that already succeeded")
+    args = parser.parse_args()
+
+    summary = run_bulk_onboarding(args.input, args.results, args.workers, resume=not args.no_resume)
+    return 0 if summary['failed'] == 0 and summary['invalid'] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Circuit Breakers
+Stop calling an upstream host while it is failing
+
+Each upstream host the provisioning client calls (Retell, the dashboard register
+API) has a breaker shared by every thread of the process. While the host answers,
+the breaker is closed and calls go through. When too many recent calls failed it
+opens: calls raise CircuitOpen at once instead of waiting on timeouts and retries,
+so onboardings stop early and queue workers leave jobs queued. After
+CIRCUIT_BREAKER_OPEN_SECONDS it is half-open and lets a few trial calls through;
+their success closes it again, a failure reopens it.
+"""
+
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+from .config import (
+    CIRCUIT_BREAKER_FAILURE_RATE, CIRCUIT_BREAKER_MIN_CALLS, CIRCUIT_BREAKER_WINDOW,
+    CIRCUIT_BREAKER_OPEN_SECONDS, CIRCUIT_BREAKER_HALF_OPEN_PROBES, CIRCUIT_BREAKER_FAILURE_STATUS_CODES
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpen(Exception):
+    """A call was refused because the host's circuit is open; retry_in is seconds until it may be tried"""
+
+    def __init__(self, host, retry_in):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {host} after repeated failures; "
+                         f"calls resume in {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one upstream host"""
+
+    def __init__(self, host, failure_rate=CIRCUIT_BREAKER_FAILURE_RATE, min_calls=CIRCUIT_BREAKER_MIN_CALLS,
+                 window=CIRCUIT_BREAKER_WINDOW, open_seconds=CIRCUIT_BREAKER_OPEN_SECONDS,
+                 half_open_probes=CIRCUIT_BREAKER_HALF_OPEN_PROBES):
+        self.host = host
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+
+        self.state = CLOSED
+        self.opened_at = None
+        self.times_opened = 0
+        self._outcomes = deque()   # (time, failed) of calls in the last window, while closed
+        self._probes = []          # start times of trial calls in flight, while half-open
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Let a call through or raise CircuitOpen"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                retry_in = self.opened_at + self.open_seconds - now
+                if retry_in > 0:
+                    raise CircuitOpen(self.host, retry_in)
+                self.state = HALF_OPEN
+                self._probes = []
+                self._probe_successes = 0
+                print(f"🔌 Circuit for {self.host} half-open, sending trial calls")
+            if self.state == HALF_OPEN:
+                # A trial call that never reported back (e.g. its step was cancelled)
+                # stops counting after open_seconds
+                self._probes = [started for started in self._probes if now - started < self.open_seconds]
+                if len(self._probes) >= self.half_open_probes:
+                    raise CircuitOpen(self.host, min(self._probes) + self.open_seconds - now)
+                self._probes.append(now)
+
+    def release(self):
+        """
+        Give back the trial slot of a call that ended without an outcome
+
+        For calls let through by before_call that then never reached the host,
+        e.g. DeadlineExceeded while waiting for the rate limit, so a half-open
+        circuit isn't left with its trial slots taken.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes.pop(0)
+
+    def record_success(self):
+        self._record(False)
+
+    def record_failure(self):
+        self._record(True)
+
+    def record_response(self, status_code):
+        """Record a call that got a response; CIRCUIT_BREAKER_FAILURE_STATUS_CODES count as failures"""
+        self._record(status_code in CIRCUIT_BREAKER_FAILURE_STATUS_CODES)
+
+    def _record(self, failed):
+        with self._lock:
+            now = time.monotonic()
+            if self.state == HALF_OPEN:
+                if self._probes:
+                    self._probes.pop(0)
+                if failed:
+                    self._open(now, "a trial call failed")
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    print(f"🔌 Circuit for {self.host} closed, calls flowing again")
+            elif self.state == CLOSED:
+                self._outcomes.append((now, failed))
+                while self._outcomes and now - self._outcomes[0][0] > self.window:
+                    self._outcomes.popleft()
+                failures = sum(1 for _, call_failed in self._outcomes if call_failed)
+                calls = len(self._outcomes)
+                if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                    self._open(now, f"{failures}/{calls} calls failed in {self.window:g}s")
+            # Calls let through before the circuit opened don't change an open circuit
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self.opened_at = now
+        self.times_opened += 1
+        self._outcomes.clear()
+        self._probes = []
+        print(f"🔌 Circuit for {self.host} opened ({reason}); failing calls fast for {self.open_seconds:g}s")
+
+    def retry_in(self):
+        """Seconds until an open circuit lets a trial call through (0 when not open)"""
+        with self._lock:
+            if self.state != OPEN:
+                return 0.0
+            return max(0.0, self.opened_at + self.open_seconds - time.monotonic())
+
+    def stats(self):
+        """State, recent call counts and time until the next trial call"""
+        with self._lock:
+            failures = sum(1 for _, failed in self._outcomes if failed)
+            return {
+                'state': self.state,
+                'recent_calls': len(self._outcomes),
+                'recent_failures': failures,
+                'times_opened': self.times_opened,
+                'retry_in': round(max(0.0, self.opened_at + self.open_seconds - time.monotonic()), 1)
+                            if self.state == OPEN else 0
+            }
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(url):
+    """Return the process-wide breaker for url's host, creating it on first use"""
+    host = urlsplit(url).netloc or url
+    with _breakers_lock:
+        if host not in _breakers:
+            _breakers[host] = CircuitBreaker(host)
+        return _breakers[host]
+
+
+def circuit_stats():
+    """Stats of every breaker created so far, by host"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.stats() for breaker in breakers}
+
+
+def open_circuits():
+    """Breakers refusing calls right now (open and not yet due a trial call)"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return [breaker for breaker in breakers if breaker.retry_in() > 0]
+
+
+def check_circuits():
+    """Raise CircuitOpen for the longest-open circuit, if any is refusing calls"""
+    circuits = open_circuits()
+    if circuits:
+        breaker = max(circuits, key=lambda circuit: circuit.retry_in())
+        raise CircuitOpen(breaker.host, breaker.retry_in())
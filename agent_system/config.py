@@ -22,6 +22,15 @@ DB_CONFIG = {
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD')
 }
+# Connection pool behind get_db_connection() (agent_system.database): connections kept open,
+# the most open at once, and seconds to wait for a free one before giving up
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv('DB_POOL_ACQUIRE_TIMEOUT', 10))
+# Idle connections are checked with SELECT 1 before reuse after CHECK_AFTER seconds, and
+# closed (down to MIN_SIZE) after MAX_IDLE seconds
+DB_POOL_CHECK_AFTER = float(os.getenv('DB_POOL_CHECK_AFTER', 30))
+DB_POOL_MAX_IDLE = float(os.getenv('DB_POOL_MAX_IDLE', 300))
 
 # Time Zone Options
 TIMEZONE_OPTIONS = {
@@ -37,12 +46,176 @@ RETELL_URLS = {
     'knowledge_base': "https://api.retellai.com/create-knowledge-base",
     'llm': "https://api.retellai.com/create-retell-llm",
     'agent': "https://api.retellai.com/create-agent",
-    'conversation_flow': "https://api.retellai.com/create-conversation-flow"
+    'conversation_flow': "https://api.retellai.com/create-conversation-flow",
+    'phone_number': "https://api.retellai.com/create-phone-number"
 }
 
+# Dashboard Registration API
+DASHBOARD_REGISTER_URL = "https://clara-answering-services.justclara.ai/api/auth/register"
+
 # Template Files
 TEMPLATE_FILES = {
     'global': 'prompts/global_prompt_template.txt',
     'office_hours': 'prompts/office_hours_prompt_template.txt',
     'after_hours': 'prompts/after_hours_prompt_template.txt'
-}
\ No newline at end of file
+}
+
+# Provisioning Concurrency
+# Upper bound on provisioning steps running at the same time for one onboarding
+STEP_GRAPH_MAX_WORKERS = int(os.getenv('STEP_GRAPH_MAX_WORKERS', 4))
+
+
+# Provisioning Deadline (agent_system.deadline)
+# Seconds one onboarding may take end to end, or 0 for no deadline. Each Retell call's
+# timeouts and retries are cut to what remains, and no step starts after it passes
+PROVISIONING_DEADLINE = float(os.getenv('PROVISIONING_DEADLINE', 0))
+# Non-critical steps left for later when fewer than this many seconds remain at their start
+DEADLINE_DEFERRABLE_STEPS = {
+    'dashboard': 30
+}
+
+
+# Async Pipeline (agent_system.async_pipeline)
+ASYNC_HTTP_CONNECTION_LIMIT = int(os.getenv('ASYNC_HTTP_CONNECTION_LIMIT', 100))
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 1))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 10))
+ASYNC_ONBOARDING_CONCURRENCY = int(os.getenv('ASYNC_ONBOARDING_CONCURRENCY', 50))
+
+
+# Shared HTTP Client (agent_system.retell_client)
+# (connect, read) timeouts in seconds per endpoint; list-sitemap and knowledge base
+# creation crawl the customer's website, so they get the longest read timeouts
+HTTP_TIMEOUTS = {
+    'default': (5, 30),
+    'sitemap': (5, 60),
+    'knowledge_base': (5, 120),
+    'llm': (5, 30),
+    'agent': (5, 30),
+    'conversation_flow': (5, 30),
+    'phone_number': (5, 45),
+    'dashboard_register': (5, 30)
+}
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))
+HTTP_WARM_CONNECTIONS = int(os.getenv('HTTP_WARM_CONNECTIONS', 2))
+
+
+# Retell Rate Limits (agent_system.rate_limiter)
+# Token bucket per endpoint: (requests per minute, burst). Calls wait for a token before
+# they are sent; endpoints not listed are not limited
+RETELL_RATE_LIMITS = {
+    'sitemap': (30, 5),
+    'knowledge_base': (20, 3),
+    'llm': (60, 10),
+    'agent': (60, 10),
+    'conversation_flow': (30, 5),
+    'phone_number': (20, 3)
+}
+# Backend: 'memory' (threads in one process), 'file' (processes on one host, through a
+# locked state file), 'postgres' (every host, retell_rate_limits table) or 'off'
+RETELL_RATE_LIMIT_BACKEND = os.getenv('RETELL_RATE_LIMIT_BACKEND', 'memory').lower()
+RETELL_RATE_LIMIT_FILE = os.getenv('RETELL_RATE_LIMIT_FILE', '.retell_rate_limits.json')
+
+
+# Retell Retries (agent_system.retell_client)
+# 429, 5xx, connection errors and timeouts are retried with doubling, jittered delays from
+# RETRY_BASE up to RETRY_MAX_DELAY seconds (or the response's Retry-After), at most
+# RETRY_ATTEMPTS tries per call, giving up once retrying would pass RETRY_BUDGET seconds
+RETELL_RETRY_ATTEMPTS = int(os.getenv('RETELL_RETRY_ATTEMPTS', 4))
+RETELL_RETRY_BASE = float(os.getenv('RETELL_RETRY_BASE', 1))
+RETELL_RETRY_MAX_DELAY = float(os.getenv('RETELL_RETRY_MAX_DELAY', 15))
+RETELL_RETRY_BUDGET = float(os.getenv('RETELL_RETRY_BUDGET', 60))
+RETELL_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# Endpoints safe to replay after a read timeout or a 5xx. The others create something
+# (a phone number, agent, LLM...), so a call Retell may already have run is only retried
+# when it never connected, or on a 429/503 that carries Retry-After
+RETELL_IDEMPOTENT_ENDPOINTS = ('sitemap',)
+# Responses that say the request was turned away unprocessed when they carry Retry-After
+RETELL_RETRY_AFTER_STATUS_CODES = (429, 503)
+
+
+# Circuit Breakers (agent_system.circuit_breaker)
+# One breaker per upstream host. It opens when at least FAILURE_RATE of the calls in the
+# last WINDOW seconds failed (5xx, connection errors, timeouts), once MIN_CALLS were made;
+# calls then fail at once for OPEN_SECONDS, after which HALF_OPEN_PROBES trial calls decide
+# whether it closes again
+CIRCUIT_BREAKER_FAILURE_RATE = float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', 0.5))
+CIRCUIT_BREAKER_MIN_CALLS = int(os.getenv('CIRCUIT_BREAKER_MIN_CALLS', 6))
+CIRCUIT_BREAKER_WINDOW = float(os.getenv('CIRCUIT_BREAKER_WINDOW', 60))
+CIRCUIT_BREAKER_OPEN_SECONDS = float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 30))
+CIRCUIT_BREAKER_HALF_OPEN_PROBES = int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_PROBES', 1))
+CIRCUIT_BREAKER_FAILURE_STATUS_CODES = (500, 502, 503, 504)
+
+
+# Bulk Onboarding (agent_system.bulk_onboarding)
+# Companies provisioned at the same time; each one also runs up to STEP_GRAPH_MAX_WORKERS steps
+BULK_ONBOARDING_WORKERS = int(os.getenv('BULK_ONBOARDING_WORKERS', 4))
+
+
+# Tenant Import / Export (agent_system.tenant_transfer)
+# Records copied into Postgres and merged per transaction when importing
+TENANT_IMPORT_CHUNK_SIZE = int(os.getenv('TENANT_IMPORT_CHUNK_SIZE', 5000))
+
+
+# Area Code Availability Cache (agent_system.area_code_cache)
+# Backend: 'file' (JSON file below), 'postgres' (area_code_availability table) or 'off'
+AREA_CODE_CACHE_BACKEND = os.getenv('AREA_CODE_CACHE_BACKEND', 'file').lower()
+AREA_CODE_CACHE_FILE = os.getenv('AREA_CODE_CACHE_FILE', '.area_code_cache.json')
+# Seconds an out-of-stock area code is skipped, and a successful purchase is remembered
+AREA_CODE_FAILURE_TTL = int(os.getenv('AREA_CODE_FAILURE_TTL', 6 * 60 * 60))
+AREA_CODE_SUCCESS_TTL = int(os.getenv('AREA_CODE_SUCCESS_TTL', 24 * 60 * 60))
+
+
+# Phone Number Purchase
+# Nearby area codes (from agent_system/data/area_code_index.json) tried after the customer's own
+PHONE_NUMBER_FALLBACK_COUNT = int(os.getenv('PHONE_NUMBER_FALLBACK_COUNT', 5))
+
+
+# Local Agent Server (local_agent_server.py, agent_system.worker_pool)
+# Onboardings provisioned at once, and how many more may wait before new ones get 429
+LOCAL_SERVER_WORKERS = int(os.getenv('LOCAL_SERVER_WORKERS', 4))
+LOCAL_SERVER_MAX_QUEUE = int(os.getenv('LOCAL_SERVER_MAX_QUEUE', 20))
+# Retry-After seconds sent with a 429 before any job has finished to estimate from
+LOCAL_SERVER_RETRY_AFTER = int(os.getenv('LOCAL_SERVER_RETRY_AFTER', 30))
+
+
+# Creation Job Store (agent_system.job_store)
+# Backend: 'memory' (per process), 'sqlite' (file below) or 'postgres' (creation_jobs table)
+JOB_STORE_BACKEND = os.getenv('JOB_STORE_BACKEND', 'memory').lower()
+JOB_STORE_SQLITE_PATH = os.getenv('JOB_STORE_SQLITE_PATH', '.creation_jobs.sqlite3')
+# Jobs not updated for this many seconds are evicted; the memory backend also keeps at most MAX_ENTRIES
+JOB_STORE_TTL = int(os.getenv('JOB_STORE_TTL', 7 * 24 * 60 * 60))
+JOB_STORE_MAX_ENTRIES = int(os.getenv('JOB_STORE_MAX_ENTRIES', 10000))
+# How often the sqlite and postgres backends re-read a job while a status stream waits on it
+JOB_STORE_WATCH_INTERVAL = float(os.getenv('JOB_STORE_WATCH_INTERVAL', 0.5))
+
+
+# Status Streams (GET /creation-status/{id}/events on local_agent_server.py)
+# Seconds one stream stays open before the browser reconnects, and between keep-alive comments
+STATUS_STREAM_TIMEOUT = int(os.getenv('STATUS_STREAM_TIMEOUT', 600))
+STATUS_STREAM_HEARTBEAT = int(os.getenv('STATUS_STREAM_HEARTBEAT', 15))
+
+
+# Idempotency Keys (agent_system.idempotency)
+# Creation IDs are an HMAC of the request's key, so nobody can derive a job's ID from
+# company details alone; set a dedicated secret, or the Retell token is used
+IDEMPOTENCY_SECRET = os.getenv('IDEMPOTENCY_SECRET') or RETELL_API_TOKEN or ''
+# Seconds /onboard waits between checks on a duplicate request's shared job
+ONBOARD_WAIT_INTERVAL = int(os.getenv('ONBOARD_WAIT_INTERVAL', 60))
+# Seconds /onboard waits for its job in all before answering 504 with the creation_id to poll
+ONBOARD_WAIT_TIMEOUT = int(os.getenv('ONBOARD_WAIT_TIMEOUT', 900))
+
+
+# Provisioning Job Queue (agent_system.provisioning_queue)
+# 'local' runs local_agent_server jobs on its own worker pool; 'postgres' queues them in
+# the provisioning_jobs table for `python -m agent_system.provisioning_queue` workers
+# ('postgres' needs JOB_STORE_BACKEND=postgres so the server sees the workers' progress)
+PROVISIONING_QUEUE_BACKEND = os.getenv('PROVISIONING_QUEUE_BACKEND', 'local').lower()
+PROVISIONING_WORKERS = int(os.getenv('PROVISIONING_WORKERS', 4))
+# Seconds a claimed job stays locked without a heartbeat before another worker may take it
+PROVISIONING_JOB_LEASE = int(os.getenv('PROVISIONING_JOB_LEASE', 300))
+PROVISIONING_JOB_HEARTBEAT = int(os.getenv('PROVISIONING_JOB_HEARTBEAT', 30))
+PROVISIONING_JOB_MAX_ATTEMPTS = int(os.getenv('PROVISIONING_JOB_MAX_ATTEMPTS', 3))
+# Retry delay doubles per attempt from RETRY_BASE up to RETRY_MAX seconds, with jitter
+PROVISIONING_JOB_RETRY_BASE = int(os.getenv('PROVISIONING_JOB_RETRY_BASE', 30))
+PROVISIONING_JOB_RETRY_MAX = int(os.getenv('PROVISIONING_JOB_RETRY_MAX', 15 * 60))
+PROVISIONING_WORKER_POLL_INTERVAL = float(os.getenv('PROVISIONING_WORKER_POLL_INTERVAL', 2))
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Creation Jobs
+Run one onboarding and record its progress in the job store under a creation ID
+
+Every finished step's outputs are saved on the job as a checkpoint. When the job
+fails, resume_creation_job() (or a retry of the same request) runs it again from
+the checkpoint, reusing the knowledge base, LLMs, agents, flow and phone number
+already created instead of making new ones.
+"""
+
+import time
+
+from .main import create_agent_automation
+from .job_store import get_job_store
+from .deadline import default_deadline
+
+
+def format_creation_result(result):
+    """Shape a create_agent_automation result for the web interface"""
+    dashboard_creds = result.get('dashboard_credentials', {})
+    return {
+        'success': True,
+        'phone_number': result.get('phone_number', '+1 (555) 000-0000'),
+        'dashboard_email': dashboard_creds.get('email', 'support@company.justclara.ai') if dashboard_creds else 'support@company.justclara.ai',
+        'dashboard_password': dashboard_creds.get('password', 'company@321') if dashboard_creds else 'company@321',
+        'company_id': result.get('company_id'),
+        'agent_id': result.get('main_router_agent_id'),
+        'deferred_steps': result.get('deferred_steps', [])
+    }
+
+
+def get_troubleshooting_tips(error_msg):
+    """Troubleshooting tips shown with a failed creation"""
+    error_msg = error_msg.lower()
+    if "deadline" in error_msg:
+        return [
+            "Resume the job to finish the remaining steps",
+            "Steps that already finished are not repeated"
+        ]
+    elif "circuit open" in error_msg:
+        return [
+            "Retell or the dashboard service is failing right now",
+            "Resume the job in a few minutes; steps that already finished are not repeated"
+        ]
+    elif "too long" in error_msg:
+        return [
+            "Use a shorter company name (max 50 characters)",
+            "Remove special characters from company name",
+            "Try using abbreviations or acronyms"
+        ]
+    elif "sitemap" in error_msg:
+        return [
+            "Check if your website has a valid sitemap.xml",
+            "Verify the website URL is accessible",
+            "Try using a different website URL"
+        ]
+    elif "unauthorized" in error_msg:
+        return [
+            "Check Retell API token configuration",
+            "Verify API token has proper permissions",
+            "Contact support for API access issues"
+        ]
+    return [
+        "Check your internet connection",
+        "Verify all form fields are filled correctly",
+        "Try again in a few minutes",
+        "Contact support if the problem persists"
+    ]
+
+
+class ProgressRecorder:
+    """
+    Progress callback for create_agent_automation that stores step events on a job
+    
+    The job record gains per-step status and timing (steps), the steps running
+    right now (running_steps), the resource IDs created so far (resources) and
+    the step outputs to resume from (checkpoint), saved as each step finishes.
+    """
+    
+    def __init__(self, store, creation_id, checkpoint=None):
+        self.store = store
+        self.creation_id = creation_id
+        self.steps = {}
+        self.resources = {}
+        self.checkpoint = dict(checkpoint or {})
+        self.progress = 0
+    
+    def __call__(self, event):
+        name = event['step']
+        if event['phase'] == 'started':
+            self.steps[name] = {'status': 'running', 'started_ms': event['elapsed_ms']}
+            message = f"Running step: {name.replace('_', ' ')}..."
+        elif event['phase'] == 'skipped':
+            self.steps[name] = {'status': 'skipped'}
+            message = f"Reusing step: {name.replace('_', ' ')}"
+        elif event['phase'] == 'deferred':
+            self.steps[name] = {'status': 'deferred'}
+            message = f"Deferred step: {name.replace('_', ' ')} (not enough time left)"
+        else:
+            self.steps[name] = dict(
+                self.steps.get(name, {}),
+                status='completed' if event['phase'] == 'finished' else 'failed',
+                finished_ms=event['elapsed_ms'],
+                duration_ms=event['duration_ms']
+            )
+            if 'error' in event:
+                self.steps[name]['error'] = event['error']
+            message = f"{'Finished' if event['phase'] == 'finished' else 'Failed'} step: {name.replace('_', ' ')}"
+        self.resources = event['resources']
+        self.checkpoint = event['checkpoint']
+        self.progress = event['progress']
+        
+        try:
+            self.store.update(self.creation_id, progress=self.progress, message=message, **self.snapshot())
+        except Exception as e:
+            print(f"⚠️  Could not record progress for {self.creation_id}: {e}")
+    
+    def snapshot(self):
+        """Step, running-step, resource and checkpoint fields to carry into the job's final record"""
+        return {
+            'steps': {name: dict(step) for name, step in self.steps.items()},
+            'running_steps': [name for name, step in self.steps.items() if step['status'] == 'running'],
+            'resources': dict(self.resources),
+            'checkpoint': dict(self.checkpoint)
+        }
+
+
+def resumable_company_data(record):
+    """Company data to resume a job record with; raises ValueError if the job can't be resumed"""
+    if record is None:
+        raise ValueError("Creation ID not found")
+    if record['status'] != 'error':
+        raise ValueError(f"Only failed jobs can be resumed (job is {record['status']})")
+    if not record.get('company_data'):
+        raise ValueError("Job has no saved company data to resume from")
+    return record['company_data']
+
+
+def run_creation_job(creation_id, company_data, retry_in=None, store=None, deadline=None):
+    """
+    Provision one company and record in_progress, then completed or error
+
+    Steps checkpointed on the job by an earlier attempt are reused, not run again.
+    The run is bounded by deadline, or by PROVISIONING_DEADLINE when none is given.
+    Exceptions are recorded and re-raised. When retry_in is given the job will
+    be attempted again, so it is recorded as queued rather than failed.
+
+    Returns:
+        dict: the formatted result stored with the completed job
+    """
+    if store is None:
+        store = get_job_store()
+    checkpoint = (store.get(creation_id) or {}).get('checkpoint') or {}
+    recorder = ProgressRecorder(store, creation_id, checkpoint)
+    if checkpoint:
+        print(f"🔁 Resuming agent creation for {creation_id} from {len(checkpoint)} checkpointed outputs")
+    else:
+        print(f"🚀 Starting agent creation for {creation_id}")
+
+    store.put(creation_id, {
+        'status': 'in_progress',
+        'progress': 0,
+        'message': 'Resuming agent creation...' if checkpoint else 'Starting agent creation...',
+        'company_data': company_data,
+        'checkpoint': checkpoint,
+        'timestamp': time.time()
+    })
+
+    try:
+        result = create_agent_automation(company_data, progress=recorder, checkpoint=checkpoint,
+                                         deadline=deadline or default_deadline())
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Agent creation failed for {creation_id}: {error_msg}")
+        if retry_in is not None:
+            store.put(creation_id, {
+                'status': 'queued',
+                'progress': 0,
+                'message': f"Attempt failed, retrying in {retry_in}s: {error_msg}",
+                'company_data': company_data,
+                'timestamp': time.time(),
+                **recorder.snapshot()
+            })
+        else:
+            store.put(creation_id, {
+                'status': 'error',
+                'progress': 0,
+                'message': error_msg,
+                'troubleshooting_tips': get_troubleshooting_tips(error_msg),
+                'company_data': company_data,
+                'timestamp': time.time(),
+                **recorder.snapshot()
+            })
+        raise
+
+    formatted_result = format_creation_result(result)
+    store.put(creation_id, {
+        'status': 'completed',
+        'progress': 100,
+        'message': '🎉 Agent creation completed successfully!',
+        'result': formatted_result,
+        'timestamp': time.time(),
+        **recorder.snapshot()
+    })
+    print(f"✅ Agent creation completed for {creation_id}")
+    return formatted_result
+
+
+def resume_creation_job(creation_id, store=None):
+    """
+    Run a failed job again from its checkpoint, in this thread
+
+    Raises ValueError if the job is unknown, not failed, or has no saved company data.
+    """
+    if store is None:
+        store = get_job_store()
+    company_data = resumable_company_data(store.get(creation_id))
+    # start_once keeps the failed record's checkpoint, and lets only one of
+    # several concurrent resumes through
+    _, started = store.start_once(creation_id, {
+        'status': 'queued',
+        'progress': 0,
+        'message': 'Resuming agent creation...',
+        'timestamp': time.time()
+    })
+    if not started:
+        raise ValueError("Job is already being resumed")
+    return run_creation_job(creation_id, company_data, store=store)
@@ -4,9 +4,15 @@ Dashboard Creation Module
 Automatically creates dashboard accounts and registers agents
 """
 
-import requests
-import json
 import re
+from .retell_client import get_retell_client
+
+DASHBOARD_HEADERS = {
+    "accept": "application/json, text/plain, */*",
+    "content-type": "application/json",
+    "origin": "https://voice.justclara.ai",
+    "referer": "https://voice.justclara.ai/"
+}
 
 
 def sanitize_company_name(company_name):
@@ -24,6 +30,17 @@ def generate_credentials(company_name):
     return email, password
 
 
+def build_dashboard_payload(company_name, agent_id_mr):
+    """Build the dashboard register request body"""
+    email, password = generate_credentials(company_name)
+    return {
+        "email": email,
+        "password": password,
+        "agentId": agent_id_mr,
+        "companyName": sanitize_company_name(company_name)
+    }
+
+
 def create_dashboard_account(company_name, agent_id_mr):
     """
     Create dashboard account and register agent
@@ -42,31 +59,17 @@ def create_dashboard_account(company_name, agent_id_mr):
         email, password = generate_credentials(company_name)
         sanitized_name = sanitize_company_name(company_name)
         
-        # API endpoint
-        url = "https://clara-answering-services.justclara.ai/api/auth/register"
-        
-        # Headers
-        headers = {
-            "accept": "application/json, text/plain, */*",
-            "content-type": "application/json",
-            "origin": "https://voice.justclara.ai",
-            "referer": "https://voice.justclara.ai/"
-        }
-        
         # Request body
-        payload = {
-            "email": email,
-            "password": password,
-            "agentId": agent_id_mr,
-            "companyName": sanitized_name
-        }
+        payload = build_dashboard_payload(company_name, agent_id_mr)
         
         print(f"📡 Registering dashboard account...")
         print(f"   Email: {email}")
         print(f"   Agent ID: {agent_id_mr}")
         
-        # Make API request
-        response = requests.post(url, headers=headers, json=payload)
+        # Make API request (not a Retell endpoint, so no Retell auth headers)
+        response = get_retell_client().post(
+            'dashboard_register', json=payload, headers=DASHBOARD_HEADERS, authenticated=False
+        )
         
         if response.status_code == 200 or response.status_code == 201:
             print("✅ Dashboard account created successfully!")
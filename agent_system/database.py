@@ -2,125 +2,420 @@
 """
 Database Operations
 Handle all database connections and operations
+
+Connections come from one pool per process (see ConnectionPool), so the job store,
+queue, caches and company saves reuse open connections instead of paying a new
+TLS and auth handshake each time.
 """
 
+import os
+import threading
+import time
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
 import uuid
 import json
 from datetime import datetime
-from .config import DB_CONFIG
+from .config import (
+    DB_CONFIG, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_ACQUIRE_TIMEOUT,
+    DB_POOL_CHECK_AFTER, DB_POOL_MAX_IDLE
+)
+
+
+class PoolTimeout(Exception):
+    """No pooled connection came free within the acquire timeout"""
+    pass
+
+
+class PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose close() hands it back to its pool instead of closing it"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        self.pid = os.getpid()
+        self.checked_out = False
+
+    def close(self):
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of Postgres connections with a size limit and health checks
+
+    acquire() reuses the most recently returned connection, after a SELECT 1 if it
+    sat idle for check_after seconds, and opens a new one while fewer than max_size
+    are open; otherwise it waits up to acquire_timeout for one to come back.
+    Returned connections are rolled back and taken out of autocommit, or discarded
+    when that fails, and idle ones beyond min_size are closed after max_idle
+    seconds. After a fork the child starts with an empty pool and leaves the
+    parent's connections, whose sockets it shares, untouched.
+    """
+
+    def __init__(self, connect_kwargs=None, min_size=DB_POOL_MIN_SIZE, max_size=DB_POOL_MAX_SIZE,
+                 acquire_timeout=DB_POOL_ACQUIRE_TIMEOUT, check_after=DB_POOL_CHECK_AFTER,
+                 max_idle=DB_POOL_MAX_IDLE):
+        self.connect_kwargs = connect_kwargs or DB_CONFIG
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self._cond = threading.Condition()
+        self._inherited = []
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = []  # (connection, returned at), most recently returned last
+        self._size = 0
+
+    def _check_fork(self):
+        if self._pid != os.getpid():
+            # Closing these would end the parent's sessions too; keep them referenced instead
+            self._inherited.extend(conn for conn, _ in self._idle)
+            self._reset()
+
+    def acquire(self, timeout=None):
+        """Take a connection; close() on it returns it to the pool. Raises PoolTimeout when none comes free"""
+        give_up = time.monotonic() + (self.acquire_timeout if timeout is None else timeout)
+        while True:
+            with self._cond:
+                self._check_fork()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = give_up - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeout(f"No database connection free after waiting "
+                                          f"{self.acquire_timeout:g}s ({self.max_size} in use)")
+                    self._cond.wait(remaining)
+                    self._check_fork()
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = psycopg2.connect(connection_factory=PooledConnection, **self.connect_kwargs)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                conn.pool = self
+            elif not self._healthy(conn, returned_at):
+                self._discard(conn)
+                continue
+            conn.checked_out = True
+            return conn
+
+    def _healthy(self, conn, returned_at):
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        conn.pool = None
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def release(self, conn):
+        """Return a connection taken with acquire(); closing it does the same"""
+        if not conn.checked_out:
+            return
+        conn.checked_out = False
+        if conn.pid != os.getpid():
+            self._inherited.append(conn)
+            return
+        try:
+            if conn.closed:
+                raise psycopg2.InterfaceError("connection already closed")
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+        except Exception:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            self._idle.append((conn, now))
+            while self._size - len(stale) > self.min_size and self._idle and now - self._idle[0][1] > self.max_idle:
+                stale.append(self._idle.pop(0)[0])
+            self._cond.notify()
+        for idle_conn in stale:
+            self._discard(idle_conn)
+
+    def close_all(self):
+        """Close every idle connection; connections in use close when returned"""
+        with self._cond:
+            self._check_fork()
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        with self._cond:
+            self._check_fork()
+            return {'open': self._size, 'idle': len(self._idle), 'in_use': self._size - len(self._idle),
+                    'max_size': self.max_size}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    """Return the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
 
 
 def get_db_connection():
-    """Create database connection"""
-    return psycopg2.connect(**DB_CONFIG)
+    """Take a database connection from the shared pool; close() returns it to the pool"""
+    return get_db_pool().acquire()
 
 
-def save_company_data(company_data, knowledge_base_id, agent_data, llm_data, conversation_flow_id, router_agent_data, phone_data=None, dashboard_data=None):
-    """Save all configuration to database"""
-    print(f"💾 Saving to database")
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (Unix milliseconds, rand_a) of the last key handed out
+
+
+def uuid7():
+    """
+    Time-ordered UUID (RFC 9562 version 7) for new primary keys
+
+    The first 48 bits are the Unix time in milliseconds, so new rows land on the
+    right-hand edge of the uuid primary key indexes instead of on random pages.
+    Keys from one process strictly increase: within a millisecond the 12-bit
+    rand_a field counts up from a random start. The rest stays random.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        last_ms, counter = _uuid7_last
+        if ms > last_ms:
+            # Random start in the lower half leaves room to count up
+            counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        else:
+            # Same millisecond, or the clock stepped back: keep counting from the last key
+            ms, counter = last_ms, counter + 1
+            if counter > 0xFFF:
+                ms, counter = last_ms + 1, 0
+        _uuid7_last = (ms, counter)
+
+    rand_b = int.from_bytes(os.urandom(8), 'big') & 0x3FFFFFFFFFFFFFFF
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
+# Columns of the companies, company_agent_configs and company_prompts rows built by build_company_rows
+COMPANY_COLUMNS = (
+    "id", "company_name", "office_address", "business_hours",
+    "contact_number", "area_code", "website_url", "time_zone", "knowledge_base_id",
+    "post_call_summary_sms", "post_call_summary_email",
+    "summary_sms_number", "summary_email_address",
+    "needs_prompt_regeneration", "created_at", "updated_at"
+)
+
+AGENT_CONFIG_COLUMNS = (
+    "id", "company_id", "llm_id_oh", "llm_id_ah",
+    "agent_id_oh", "agent_id_ah", "agent_id_mr",
+    "conversation_flow_id", "retell_phone_number", "retell_phone_number_id",
+    "dashboard_email", "dashboard_password",
+    "status", "created_at", "updated_at"
+)
+
+PROMPTS_COLUMNS = (
+    "company_id", "global_prompt", "office_hours_prompt",
+    "after_hours_prompt", "created_at", "updated_at"
+)
+
+# Companies per save statement, keeping its parameters well under Postgres' 65535
+SAVE_BATCH_SIZE = 500
+
+
+def company_save_sql(count=1):
+    """
+    One statement inserting count companies with their agent configs and prompts
+
+    Parameters are every company row, then every agent config row, then every
+    prompts row (see company_save_params). Returns (company_id, agent_config_id) rows.
+    """
+    def insert(table, columns):
+        row = "(" + ", ".join(["%s"] * len(columns)) + ")"
+        return f"INSERT INTO {table} ({', '.join(columns)}) VALUES {', '.join([row] * count)}"
+
+    return f"""
+        WITH company AS (
+            {insert('companies', COMPANY_COLUMNS)}
+            RETURNING id
+        ), agent_config AS (
+            {insert('company_agent_configs', AGENT_CONFIG_COLUMNS)}
+            RETURNING id, company_id
+        ), prompts AS (
+            {insert('company_prompts', PROMPTS_COLUMNS)}
+        )
+        SELECT agent_config.company_id, agent_config.id AS agent_config_id
+        FROM agent_config JOIN company ON company.id = agent_config.company_id
+    """
+
+
+def company_save_params(rows_list):
+    """Flatten build_company_rows results into company_save_sql(len(rows_list)) parameters"""
+    return (
+        [value for rows in rows_list for value in rows['company']]
+        + [value for rows in rows_list for value in rows['agent_config']]
+        + [value for rows in rows_list for value in rows['prompts']]
+    )
+
+
+def build_company_rows(company_data, knowledge_base_id, agent_data, llm_data, conversation_flow_id, router_agent_data, phone_data=None, dashboard_data=None, global_prompt=None):
+    """Build the parameter tuples for the companies, company_agent_configs and company_prompts inserts"""
+    company_id = str(uuid7())
+    now = datetime.now()
+    
+    # Save company with knowledge base ID
+    business_hours_json = {
+        "description": company_data['business_hours'],
+        "timezone": f"America/{company_data['time_place']}",
+        "note": "Converted from text input"
+    }
     
+    company_row = (
+        company_id,
+        company_data['company_name'],
+        company_data['office_address'],
+        json.dumps(business_hours_json),
+        company_data['contact_number'],
+        company_data['area_code'],
+        company_data['website_url'],
+        f"America/{company_data['time_place']}",
+        knowledge_base_id,
+        company_data['post_call_summary_sms'],
+        company_data['post_call_summary_email'],
+        company_data['summary_sms_number'],
+        company_data['summary_email_address'],
+        False,
+        now,
+        now
+    )
+    
+    # Save agent configuration with Main Router Agent and phone number
+    config_row = (
+        str(uuid7()),
+        company_id,
+        agent_data['office_hours']['llm_id'],
+        agent_data['after_hours']['llm_id'],
+        agent_data['office_hours']['agent_id'],
+        agent_data['after_hours']['agent_id'],
+        router_agent_data['agent_id'],
+        conversation_flow_id,
+        phone_data['phone_number'] if phone_data else None,
+        phone_data['phone_number_id'] if phone_data else None,
+        dashboard_data['email'] if dashboard_data and dashboard_data.get('success') else None,
+        dashboard_data['password'] if dashboard_data and dashboard_data.get('success') else None,
+        'active',
+        now,
+        now
+    )
+    
+    # Save prompts (reuse the global prompt rendered for the conversation flow when given)
+    if global_prompt is None:
+        from .llm_creation import generate_global_prompt
+        global_prompt = generate_global_prompt(company_data)
+    prompts_row = (
+        company_id,
+        global_prompt,
+        llm_data['office_hours']['prompt'],
+        llm_data['after_hours']['prompt'],
+        now,
+        now
+    )
+    
+    return {
+        "company_id": company_id,
+        "company": company_row,
+        "agent_config": config_row,
+        "prompts": prompts_row
+    }
+
+
+def save_company_rows(rows_list):
+    """
+    Insert many companies (build_company_rows results) with their agent configs and prompts
+
+    Each SAVE_BATCH_SIZE companies are one statement, so a single company is
+    saved in one database round trip; several statements share one transaction.
+
+    Returns:
+        list: {"company_id", "agent_config_id"} per company, in the order given
+    """
+    batches = [rows_list[i:i + SAVE_BATCH_SIZE] for i in range(0, len(rows_list), SAVE_BATCH_SIZE)]
+    saved = {}
+
     conn = get_db_connection()
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            company_id = str(uuid.uuid4())
-            now = datetime.now()
-            
-            # Save company with knowledge base ID
-            business_hours_json = {
-                "description": company_data['business_hours'],
-                "timezone": f"America/{company_data['time_place']}",
-                "note": "Converted from text input"
-            }
-            
-            cur.execute("""
-                INSERT INTO companies (
-                    id, company_name, office_address, business_hours, 
-                    contact_number, area_code, website_url, time_zone, knowledge_base_id,
-                    post_call_summary_sms, post_call_summary_email, 
-                    summary_sms_number, summary_email_address,
-                    needs_prompt_regeneration, created_at, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING *
-            """, (
-                company_id,
-                company_data['company_name'],
-                company_data['office_address'],
-                json.dumps(business_hours_json),
-                company_data['contact_number'],
-                company_data['area_code'],
-                company_data['website_url'],
-                f"America/{company_data['time_place']}",
-                knowledge_base_id,
-                company_data['post_call_summary_sms'],
-                company_data['post_call_summary_email'],
-                company_data['summary_sms_number'],
-                company_data['summary_email_address'],
-                False,
-                now,
-                now
-            ))
-            
-            company = dict(cur.fetchone())
-            
-            # Save agent configuration with Main Router Agent and phone number
-            config_id = str(uuid.uuid4())
-            cur.execute("""
-                INSERT INTO company_agent_configs (
-                    id, company_id, llm_id_oh, llm_id_ah, 
-                    agent_id_oh, agent_id_ah, agent_id_mr,
-                    conversation_flow_id, retell_phone_number, retell_phone_number_id,
-                    dashboard_email, dashboard_password,
-                    status, created_at, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                config_id,
-                company_id,
-                agent_data['office_hours']['llm_id'],
-                agent_data['after_hours']['llm_id'],
-                agent_data['office_hours']['agent_id'],
-                agent_data['after_hours']['agent_id'],
-                router_agent_data['agent_id'],
-                conversation_flow_id,
-                phone_data['phone_number'] if phone_data else None,
-                phone_data['phone_number_id'] if phone_data else None,
-                dashboard_data['email'] if dashboard_data and dashboard_data.get('success') else None,
-                dashboard_data['password'] if dashboard_data and dashboard_data.get('success') else None,
-                'active',
-                now,
-                now
-            ))
-            
-            # Save prompts
-            from .llm_creation import generate_global_prompt
-            global_prompt = generate_global_prompt(company_data)
-            cur.execute("""
-                INSERT INTO company_prompts (
-                    company_id, global_prompt, office_hours_prompt, 
-                    after_hours_prompt, created_at, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-            """, (
-                company_id,
-                global_prompt,
-                llm_data['office_hours']['prompt'],
-                llm_data['after_hours']['prompt'],
-                now,
-                now
-            ))
-            
+        # One statement is atomic on its own, so skip the BEGIN and COMMIT round trips
+        conn.autocommit = len(batches) == 1
+        with conn.cursor() as cur:
+            for batch in batches:
+                cur.execute(company_save_sql(len(batch)), company_save_params(batch))
+                saved.update((str(company_id), str(config_id)) for company_id, config_id in cur.fetchall())
+        if not conn.autocommit:
             conn.commit()
-            print(f"✅ All data saved to database")
-            if phone_data:
-                print(f"✅ Phone number {phone_data['phone_number']} saved to database")
-            if dashboard_data and dashboard_data.get('success'):
-                print(f"✅ Dashboard credentials saved to database")
-            
-            return company_id
-            
+    finally:
+        # The pool rolls back a failed transaction and resets autocommit, discarding
+        # a broken connection instead of raising over the original error
+        conn.close()
+
+    return [
+        {"company_id": rows['company_id'], "agent_config_id": saved[rows['company_id']]}
+        for rows in rows_list
+    ]
+
+
+def save_company_data(company_data, knowledge_base_id, agent_data, llm_data, conversation_flow_id, router_agent_data, phone_data=None, dashboard_data=None, global_prompt=None):
+    """Save all configuration to database"""
+    print(f"💾 Saving to database")
+    
+    rows = build_company_rows(
+        company_data, knowledge_base_id, agent_data, llm_data,
+        conversation_flow_id, router_agent_data, phone_data, dashboard_data, global_prompt
+    )
+    
+    try:
+        company_id = save_company_rows([rows])[0]['company_id']
     except Exception as e:
-        conn.rollback()
         print(f"❌ Database error: {e}")
         raise
-    finally:
-        conn.close()
\ No newline at end of file
+    
+    print(f"✅ All data saved to database")
+    if phone_data:
+        print(f"✅ Phone number {phone_data['phone_number']} saved to database")
+    if dashboard_data and dashboard_data.get('success'):
+        print(f"✅ Dashboard credentials saved to database")
+    
+    return company_id
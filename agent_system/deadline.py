@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Provisioning Deadline
+An end-to-end time budget for one onboarding
+
+The StepGraph makes the deadline current while each step runs, so every
+Retell call inside the step cuts its timeouts and retries to the time that
+is left without the deadline being passed down through every module. No
+step starts once the deadline has passed, and the step that was running when
+it did is named in the DeadlineExceeded error.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import PROVISIONING_DEADLINE
+
+_current = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The provisioning deadline ran out; step names the step it ran out in, if known"""
+
+    def __init__(self, deadline, step=None, started=True):
+        self.step = step
+        if step is None:
+            message = f"Provisioning deadline of {deadline.seconds:g}s ran out"
+        elif started:
+            message = f"Provisioning deadline of {deadline.seconds:g}s ran out during step '{step}'"
+        else:
+            message = f"Provisioning deadline of {deadline.seconds:g}s ran out before step '{step}' could start"
+        super().__init__(message)
+
+
+class Deadline:
+    """
+    A point in time an onboarding must finish by
+
+    Also records which steps were deferred for lack of time (deferred) and
+    which were still running when the deadline passed (overran).
+    """
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self.deferred = []
+        self.overran = []
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        """Seconds left, negative once the deadline has passed"""
+        return self.expires_at - time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, timeout):
+        """
+        Cut a requests-style timeout (seconds, or a (connect, read) tuple) to the time left
+
+        Raises DeadlineExceeded when no time is left to make the call at all.
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(self)
+        if isinstance(timeout, tuple):
+            return tuple(min(part, remaining) for part in timeout)
+        return min(timeout, remaining)
+
+    def defer(self, step):
+        with self._lock:
+            self.deferred.append(step)
+
+    def overran_in(self, step):
+        with self._lock:
+            self.overran.append(step)
+
+
+def default_deadline():
+    """A fresh Deadline of PROVISIONING_DEADLINE seconds, or None when it is 0 (no deadline)"""
+    return Deadline(PROVISIONING_DEADLINE) if PROVISIONING_DEADLINE > 0 else None
+
+
+def current_deadline():
+    """The deadline of the step running in this thread or task, or None"""
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make deadline current for the calls made inside the block"""
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Idempotency Keys
+Map onboarding requests to one creation ID so duplicates share a single job
+
+A request's key is its Idempotency-Key header, or a hash of its normalized company
+data when the client sends none. The creation ID is derived from the key, so a
+double-clicked submit or a client retry finds the job the first request started
+(see start_once() in agent_system.job_store) instead of provisioning again.
+"""
+
+import hashlib
+import hmac
+import json
+import re
+
+from .config import IDEMPOTENCY_SECRET
+
+# Longest Idempotency-Key header accepted
+MAX_KEY_LENGTH = 255
+
+
+def normalize_company_data(company_data):
+    """Company data with case and whitespace differences folded away, as canonical JSON"""
+    def normalize(value):
+        if isinstance(value, str):
+            return re.sub(r'\s+', ' ', value).strip().casefold()
+        if isinstance(value, dict):
+            return {key: normalize(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(item) for item in value]
+        return value
+
+    return json.dumps(normalize(company_data), sort_keys=True, separators=(',', ':'))
+
+
+def idempotency_key(header_value, company_data):
+    """The request's Idempotency-Key header, else a SHA-256 of its normalized company data"""
+    if header_value and header_value.strip():
+        key = header_value.strip()
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+        return f"header:{key}"
+    digest = hashlib.sha256(normalize_company_data(company_data).encode('utf-8')).hexdigest()
+    return f"company:{digest}"
+
+
+def job_id_for_key(key, prefix="creation"):
+    """Creation ID for an idempotency key: the same key always maps to the same job"""
+    digest = hmac.new(IDEMPOTENCY_SECRET.encode('utf-8'), key.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{prefix}_{digest[:32]}"
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Creation Job Store
+Status records for onboarding jobs, keyed by creation ID, in memory, SQLite or Postgres
+
+Every backend looks jobs up by primary key and evicts jobs that have not been
+updated within JOB_STORE_TTL, so polling stays O(1) and storage stays bounded.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .config import (
+    JOB_STORE_BACKEND, JOB_STORE_SQLITE_PATH, JOB_STORE_TTL, JOB_STORE_MAX_ENTRIES,
+    JOB_STORE_WATCH_INTERVAL
+)
+
+# Durable backends purge expired jobs at most this often, piggybacked on writes
+PURGE_INTERVAL = 60
+
+# Fields a restarted job keeps from its failed record, so it can resume from
+# the steps that already finished (see agent_system.creation_jobs)
+RESUME_FIELDS = ('company_data', 'checkpoint')
+
+
+def new_job_id(prefix="creation"):
+    """Return a collision-free job ID"""
+    return f"{prefix}_{uuid.uuid4().hex}"
+
+
+def poll_for_update(store, job_id, since, timeout, interval=JOB_STORE_WATCH_INTERVAL):
+    """wait_for_update() for stores other processes write to: re-read the job every interval"""
+    deadline = time.monotonic() + timeout
+    while True:
+        record = store.get(job_id)
+        if record is None or record.get('timestamp') != since:
+            return record
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return record
+        time.sleep(min(interval, remaining))
+
+
+class MemoryJobStore:
+    """
+    Jobs in a per-process dict ordered by last update
+
+    The least recently updated job sits at the front, so evicting by age or by
+    size only ever pops from the front.
+    """
+
+    def __init__(self, ttl=JOB_STORE_TTL, max_entries=JOB_STORE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+
+    def put(self, job_id, record):
+        """Create or replace a job's record"""
+        with self._lock:
+            now = time.time()
+            self._jobs[job_id] = (now, dict(record, timestamp=now))
+            self._jobs.move_to_end(job_id)
+            self._evict(now)
+            self._changed.notify_all()
+
+    def start_once(self, job_id, record, restart_statuses=('error',)):
+        """
+        Create a job unless one is already live under job_id
+
+        Returns (record, started): the new record and True, or the existing job's
+        record and False. Jobs whose status is in restart_statuses are replaced,
+        keeping their RESUME_FIELDS.
+        """
+        with self._lock:
+            now = time.time()
+            entry = self._jobs.get(job_id)
+            if entry is not None and entry[0] >= now - self.ttl:
+                if entry[1]['status'] not in restart_statuses:
+                    return dict(entry[1]), False
+                record = dict({f: entry[1][f] for f in RESUME_FIELDS if f in entry[1]}, **record)
+            self._jobs[job_id] = (now, dict(record, timestamp=now))
+            self._jobs.move_to_end(job_id)
+            self._evict(now)
+            self._changed.notify_all()
+            return dict(self._jobs[job_id][1]), True
+
+    def update(self, job_id, **fields):
+        """Merge fields into an existing job; returns False if the job is unknown"""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None:
+                return False
+            now = time.time()
+            self._jobs[job_id] = (now, dict(entry[1], **fields, timestamp=now))
+            self._jobs.move_to_end(job_id)
+            self._evict(now)
+            self._changed.notify_all()
+            return True
+
+    def get(self, job_id):
+        """Return a copy of the job's record, or None if unknown or expired"""
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            if entry is None or entry[0] < time.time() - self.ttl:
+                return None
+            return dict(entry[1])
+
+    def wait_for_update(self, job_id, since, timeout):
+        """
+        Block until the job's record is newer than timestamp since, or timeout seconds pass
+
+        Returns the current record either way, or None once the job is unknown.
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while True:
+                entry = self._jobs.get(job_id)
+                if entry is None or entry[1]['timestamp'] != since:
+                    return dict(entry[1]) if entry else None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return dict(entry[1])
+                self._changed.wait(remaining)
+
+    def delete(self, job_id):
+        """Remove a job if present"""
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._changed.notify_all()
+
+    def purge_expired(self, now=None):
+        """Drop expired jobs and return how many were removed"""
+        with self._lock:
+            return self._evict(now or time.time())
+
+    def _evict(self, now):
+        removed = 0
+        horizon = now - self.ttl
+        while self._jobs:
+            updated_at, _ = next(iter(self._jobs.values()))
+            if updated_at >= horizon and len(self._jobs) <= self.max_entries:
+                break
+            self._jobs.popitem(last=False)
+            removed += 1
+        return removed
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+class SQLiteJobStore:
+    """Jobs in a local SQLite file, shared by processes on the same host"""
+
+    def __init__(self, path=JOB_STORE_SQLITE_PATH, ttl=JOB_STORE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_purge = 0
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS creation_jobs (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_creation_jobs_updated_at ON creation_jobs(updated_at)")
+
+    def put(self, job_id, record):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO creation_jobs (id, data, updated_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(dict(record, timestamp=now)), now)
+            )
+        self._maybe_purge(now)
+
+    def start_once(self, job_id, record, restart_statuses=('error',)):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT data FROM creation_jobs WHERE id = ? AND updated_at >= ?", (job_id, now - self.ttl)
+                ).fetchone()
+                existing = json.loads(row[0]) if row else None
+                started = existing is None or existing['status'] in restart_statuses
+                if started:
+                    carried = {f: existing[f] for f in RESUME_FIELDS if f in existing} if existing else {}
+                    record = dict(carried, **dict(record, timestamp=now))
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO creation_jobs (id, data, updated_at) VALUES (?, ?, ?)",
+                        (job_id, json.dumps(record), now)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._maybe_purge(now)
+        return (record, True) if started else (existing, False)
+
+    def update(self, job_id, **fields):
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front so concurrent
+            # read-modify-writes from other processes can't interleave
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM creation_jobs WHERE id = ?", (job_id,)).fetchone()
+                if row is not None:
+                    record = dict(json.loads(row[0]), **fields, timestamp=now)
+                    self._conn.execute(
+                        "UPDATE creation_jobs SET data = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(record), now, job_id)
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._maybe_purge(now)
+        return row is not None
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM creation_jobs WHERE id = ? AND updated_at >= ?",
+                (job_id, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def wait_for_update(self, job_id, since, timeout):
+        return poll_for_update(self, job_id, since, timeout)
+
+    def delete(self, job_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM creation_jobs WHERE id = ?", (job_id,))
+
+    def purge_expired(self, now=None):
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM creation_jobs WHERE updated_at < ?", ((now or time.time()) - self.ttl,)
+            )
+        return cursor.rowcount
+
+    def _maybe_purge(self, now):
+        if now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            self.purge_expired(now)
+
+
+class PostgresJobStore:
+    """Jobs in the creation_jobs table (see database_setup.sql), shared across hosts"""
+
+    def __init__(self, ttl=JOB_STORE_TTL):
+        self.ttl = ttl
+        self._last_purge = 0
+
+    def _execute(self, query, params, fetch=False):
+        from .database import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                result = cur.fetchone() if fetch else cur.rowcount
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    def put(self, job_id, record):
+        now = time.time()
+        self._execute("""
+            INSERT INTO creation_jobs (id, data, updated_at)
+            VALUES (%s, %s::jsonb, to_timestamp(%s))
+            ON CONFLICT (id) DO UPDATE SET data = EXCLUDED.data, updated_at = EXCLUDED.updated_at
+        """, (job_id, json.dumps(dict(record, timestamp=now)), now))
+        self._maybe_purge(now)
+
+    def start_once(self, job_id, record, restart_statuses=('error',)):
+        while True:
+            now = time.time()
+            expired = now - self.ttl
+            # The conflict branch only overwrites restartable or expired jobs, so of
+            # several concurrent duplicates exactly one gets a row back. A restarted
+            # (unexpired) job keeps its RESUME_FIELDS.
+            inserted = self._execute("""
+                INSERT INTO creation_jobs (id, data, updated_at)
+                VALUES (%s, %s::jsonb, to_timestamp(%s))
+                ON CONFLICT (id) DO UPDATE
+                SET data = CASE
+                        WHEN creation_jobs.updated_at < to_timestamp(%s) THEN '{}'::jsonb
+                        ELSE (SELECT coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+                              FROM jsonb_each(creation_jobs.data) WHERE key = ANY(%s))
+                    END || EXCLUDED.data,
+                    updated_at = EXCLUDED.updated_at
+                WHERE creation_jobs.data->>'status' = ANY(%s)
+                   OR creation_jobs.updated_at < to_timestamp(%s)
+                RETURNING data
+            """, (job_id, json.dumps(dict(record, timestamp=now)), now, expired, list(RESUME_FIELDS),
+                  list(restart_statuses), expired), fetch=True)
+            self._maybe_purge(now)
+            if inserted:
+                return inserted[0], True
+            existing = self.get(job_id)
+            if existing is not None:
+                return existing, False
+            # Deleted between the two statements; try again
+
+    def update(self, job_id, **fields):
+        now = time.time()
+        # jsonb || merges top-level keys in one statement, no read-modify-write race
+        updated = self._execute("""
+            UPDATE creation_jobs SET data = data || %s::jsonb, updated_at = to_timestamp(%s)
+            WHERE id = %s
+        """, (json.dumps(dict(fields, timestamp=now)), now, job_id))
+        self._maybe_purge(now)
+        return updated > 0
+
+    def get(self, job_id):
+        row = self._execute("""
+            SELECT data FROM creation_jobs
+            WHERE id = %s AND updated_at >= to_timestamp(%s)
+        """, (job_id, time.time() - self.ttl), fetch=True)
+        return row[0] if row else None
+
+    def wait_for_update(self, job_id, since, timeout):
+        return poll_for_update(self, job_id, since, timeout)
+
+    def delete(self, job_id):
+        self._execute("DELETE FROM creation_jobs WHERE id = %s", (job_id,))
+
+    def purge_expired(self, now=None):
+        return self._execute(
+            "DELETE FROM creation_jobs WHERE updated_at < to_timestamp(%s)",
+            ((now or time.time()) - self.ttl,)
+        )
+
+    def _maybe_purge(self, now):
+        if now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            try:
+                self.purge_expired(now)
+            except Exception as e:
+                print(f"⚠️  Could not purge expired creation jobs: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """Return the store selected by JOB_STORE_BACKEND (memory, sqlite or postgres)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if JOB_STORE_BACKEND == 'postgres':
+                    _store = PostgresJobStore()
+                elif JOB_STORE_BACKEND == 'sqlite':
+                    _store = SQLiteJobStore()
+                else:
+                    _store = MemoryJobStore()
+    return _store
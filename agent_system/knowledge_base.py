@@ -6,14 +6,11 @@ Handle knowledge base creation from website sitemaps
 
 import requests
 import json
-from .config import RETELL_API_TOKEN, ORG_ID, RETELL_URLS
+from .retell_client import get_retell_client
 
 
-def create_knowledge_base(website_url, knowledge_base_name):
-    """Create knowledge base from website sitemap"""
-    print(f"📚 Step 1: Creating Knowledge Base from {website_url}")
-    
-    # Validate and truncate knowledge base name if too long
+def normalize_knowledge_base_name(knowledge_base_name):
+    """Validate and truncate knowledge base name if too long"""
     max_kb_name_length = 50  # Conservative limit
     if len(knowledge_base_name) > max_kb_name_length:
         original_name = knowledge_base_name
@@ -21,19 +18,48 @@ def create_knowledge_base(website_url, knowledge_base_name):
         print(f"   ⚠️  Knowledge base name truncated from '{original_name}' to '{knowledge_base_name}'")
     
     print(f"   Knowledge base name: '{knowledge_base_name}' ({len(knowledge_base_name)} chars)")
+    return knowledge_base_name
+
+
+def parse_sitemap_urls(sitemap_data):
+    """Extract the URL list from a list-sitemap response body"""
+    # Handle response format
+    if isinstance(sitemap_data, list):
+        sitemap_urls = sitemap_data
+    elif isinstance(sitemap_data, dict) and "urls" in sitemap_data:
+        sitemap_urls = sitemap_data["urls"]
+    else:
+        raise Exception(f"Unexpected sitemap response format: {sitemap_data}")
     
-    # List website sitemap
-    sitemap_headers = {
-        "Authorization": f"Bearer {RETELL_API_TOKEN}",
-        "Content-Type": "application/json"
+    if not sitemap_urls:
+        raise Exception("No URLs found in sitemap - please check if the website has a valid sitemap")
+    
+    print(f"   Found {len(sitemap_urls)} URLs in sitemap")
+    return sitemap_urls
+
+
+def build_knowledge_base_form(knowledge_base_name, sitemap_urls):
+    """Build the multipart form fields for create-knowledge-base"""
+    return {
+        "knowledge_base_name": knowledge_base_name,
+        "knowledge_base_texts": json.dumps([]),
+        "knowledge_base_urls": json.dumps(sitemap_urls),
+        "enable_auto_refresh": "false",
+        "auto_crawling_paths": json.dumps([])
     }
+
+
+def create_knowledge_base(website_url, knowledge_base_name):
+    """Create knowledge base from website sitemap"""
+    print(f"📚 Step 1: Creating Knowledge Base from {website_url}")
+    
+    knowledge_base_name = normalize_knowledge_base_name(knowledge_base_name)
     
-    # Add orgid header only if ORG_ID is provided
-    if ORG_ID:
-        sitemap_headers["orgid"] = ORG_ID
+    client = get_retell_client()
     
+    # List website sitemap
     try:
-        sitemap_response = requests.post(RETELL_URLS['sitemap'], headers=sitemap_headers, json={"website_url": website_url})
+        sitemap_response = client.post('sitemap', json={"website_url": website_url})
         
         if sitemap_response.status_code not in [200, 201]:
             error_msg = f"Sitemap listing failed: {sitemap_response.status_code}"
@@ -44,20 +70,7 @@ def create_knowledge_base(website_url, knowledge_base_name):
                 error_msg += f" - {sitemap_response.text}"
             raise Exception(error_msg)
         
-        sitemap_data = sitemap_response.json()
-        
-        # Handle response format
-        if isinstance(sitemap_data, list):
-            sitemap_urls = sitemap_data
-        elif isinstance(sitemap_data, dict) and "urls" in sitemap_data:
-            sitemap_urls = sitemap_data["urls"]
-        else:
-            raise Exception(f"Unexpected sitemap response format: {sitemap_data}")
-        
-        if not sitemap_urls:
-            raise Exception("No URLs found in sitemap - please check if the website has a valid sitemap")
-        
-        print(f"   Found {len(sitemap_urls)} URLs in sitemap")
+        sitemap_urls = parse_sitemap_urls(sitemap_response.json())
         
     except requests.exceptions.RequestException as e:
         raise Exception(f"Network error while fetching sitemap: {str(e)}")
@@ -68,24 +81,10 @@ def create_knowledge_base(website_url, knowledge_base_name):
             raise Exception(f"Error processing sitemap: {str(e)}")
     
     # Create knowledge base
-    kb_headers = {
-        "Authorization": f"Bearer {RETELL_API_TOKEN}"
-    }
-    
-    # Add orgid header only if ORG_ID is provided
-    if ORG_ID:
-        kb_headers["orgid"] = ORG_ID
-    
-    kb_form_data = {
-        "knowledge_base_name": knowledge_base_name,
-        "knowledge_base_texts": json.dumps([]),
-        "knowledge_base_urls": json.dumps(sitemap_urls),
-        "enable_auto_refresh": "false",
-        "auto_crawling_paths": json.dumps([])
-    }
+    kb_form_data = build_knowledge_base_form(knowledge_base_name, sitemap_urls)
     
     try:
-        kb_response = requests.post(RETELL_URLS['knowledge_base'], headers=kb_headers, data=kb_form_data)
+        kb_response = client.post('knowledge_base', data=kb_form_data)
         
         if kb_response.status_code not in [200, 201]:
             error_msg = f"Knowledge base creation failed: {kb_response.status_code}"
@@ -4,183 +4,413 @@ Main Entry Point - Agent Creation Automation
 Complete end-to-end Retell AI agent creation with knowledge base integration
 """
 
+import threading
+
 from .user_input import collect_user_input
+from .config import STEP_GRAPH_MAX_WORKERS, DEADLINE_DEFERRABLE_STEPS
 from .knowledge_base import create_knowledge_base
-from .llm_creation import create_llms
-from .agent_creation import create_agents, create_conversation_flow, create_main_router_agent
+from .llm_creation import generate_global_prompt, create_office_hours_llm, create_after_hours_llm
+from .agent_creation import (
+    create_office_hours_agent, create_after_hours_agent,
+    create_conversation_flow, create_main_router_agent
+)
+from .dashboard_creation import create_dashboard_account, display_dashboard_credentials
 from .phone_number import purchase_phone_number
 from .database import save_company_data
+from .step_graph import StepGraph
+from .retell_client import warm_retell_client
+
+
+def step_knowledge_base(company_data):
+    """Step 1: Create knowledge base from sitemap"""
+    knowledge_base_name = company_data['company_name']  # Use just the company name
+    try:
+        return create_knowledge_base(company_data['website_url'], knowledge_base_name)
+    except Exception as e:
+        error_msg = str(e)
+        if "too long" in error_msg.lower():
+            print(f"❌ Knowledge base name is too long. Please use a shorter company name.")
+            print(f"   Current name: '{knowledge_base_name}' ({len(knowledge_base_name)} characters)")
+            print(f"   Maximum recommended: 50 characters")
+        elif "sitemap" in error_msg.lower():
+            print(f"❌ Website sitemap error: {error_msg}")
+            print(f"   Please check if {company_data['website_url']} has a valid sitemap")
+        elif "unauthorized" in error_msg.lower():
+            print(f"❌ API Authorization error: {error_msg}")
+            print(f"   Please check your Retell API token in the configuration")
+        else:
+            print(f"❌ Knowledge base creation error: {error_msg}")
+        raise Exception(f"Knowledge base creation failed: {error_msg}")
+
+
+def _run_llm_step(create_llm, company_data, knowledge_base_id):
+    """Step 2: Create one LLM (office hours and after hours run in parallel)"""
+    try:
+        return create_llm(company_data, knowledge_base_id)
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ LLM creation error: {error_msg}")
+        if "unauthorized" in error_msg.lower():
+            print(f"   Please check your Retell API token")
+        elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
+            print(f"   API quota exceeded - please try again later")
+        raise Exception(f"LLM creation failed: {error_msg}")
+
+
+def step_office_hours_llm(company_data, knowledge_base_id):
+    """Step 2a: Create the Office Hours LLM"""
+    return _run_llm_step(create_office_hours_llm, company_data, knowledge_base_id)
+
+
+def step_after_hours_llm(company_data, knowledge_base_id):
+    """Step 2b: Create the After Hours LLM"""
+    return _run_llm_step(create_after_hours_llm, company_data, knowledge_base_id)
+
+
+def _run_agent_step(create_agent, company_data, llm, knowledge_base_id):
+    """Step 3: Create one LLM-based agent (they will be auto-published)"""
+    try:
+        return create_agent(company_data, llm['llm_id'], knowledge_base_id)
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Agent creation error: {error_msg}")
+        if "llm_id" in error_msg.lower():
+            print(f"   LLM ID issue - please check if LLMs were created successfully")
+        raise Exception(f"Agent creation failed: {error_msg}")
+
+
+def step_office_hours_agent(company_data, office_hours_llm, knowledge_base_id):
+    """Step 3a: Create the Office Hours agent"""
+    return _run_agent_step(create_office_hours_agent, company_data, office_hours_llm, knowledge_base_id)
+
+
+def step_after_hours_agent(company_data, after_hours_llm, knowledge_base_id):
+    """Step 3b: Create the After Hours agent"""
+    return _run_agent_step(create_after_hours_agent, company_data, after_hours_llm, knowledge_base_id)
+
+
+def step_global_prompt(company_data):
+    """Render the global prompt once for the conversation flow and the database"""
+    return generate_global_prompt(company_data)
+
+
+def step_conversation_flow(company_data, global_prompt, office_hours_llm, after_hours_llm,
+                           office_hours_agent_id, after_hours_agent_id):
+    """Step 4: Create conversation flow with published agent IDs for transfers"""
+    llm_data = {"office_hours": office_hours_llm, "after_hours": after_hours_llm}
+    try:
+        return create_conversation_flow(
+            company_data, llm_data, office_hours_agent_id, after_hours_agent_id, global_prompt=global_prompt
+        )
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Conversation flow creation error: {error_msg}")
+        print(f"   Continuing without conversation flow...")
+        return None
+
+
+def step_main_router_agent(company_data, conversation_flow_id):
+    """Step 5: Create Main Router Agent (uses conversation flow, will be auto-published)"""
+    try:
+        return create_main_router_agent(company_data, conversation_flow_id, create_dashboard=False)
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Main router agent creation error: {error_msg}")
+        print(f"   Continuing without main router agent...")
+        return {
+            "agent_id": None,
+            "conversation_flow_id": conversation_flow_id,
+            "dashboard_result": None
+        }
+
+
+def step_dashboard(company_data, router_agent_data):
+    """Step 5b: Create the dashboard account for the router agent (runs alongside step 6)"""
+    if not router_agent_data['agent_id']:
+        return None
+    
+    print(f"\n🔧 Creating dashboard account for {company_data['company_name']}...")
+    dashboard_result = create_dashboard_account(company_data['company_name'], router_agent_data['agent_id'])
+    display_dashboard_credentials(dashboard_result)
+    return dashboard_result
 
 
-def create_agent_automation(company_data):
-    """Main orchestration function - Complete agent creation lifecycle"""
+def step_phone_number(company_data, router_agent_data):
+    """Step 6: Purchase phone number with area code fallback and inbound agent assignment"""
+    if not router_agent_data['agent_id']:
+        return None
+    
+    try:
+        return purchase_phone_number(
+            company_data['company_name'], 
+            company_data['area_code'],
+            router_agent_data['agent_id']  # Pass main router agent ID for inbound calls
+        )
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Phone number purchase error: {error_msg}")
+        print(f"   Continuing without phone number...")
+        return None
+
+
+def step_save(company_data, global_prompt, knowledge_base_id, office_hours_llm, after_hours_llm,
+              office_hours_agent_id, after_hours_agent_id, conversation_flow_id,
+              router_agent_data, phone_data, dashboard_result):
+    """Step 7: Save to database (including phone number and dashboard data)"""
+    agent_data = {
+        "office_hours": {"llm_id": office_hours_llm['llm_id'], "agent_id": office_hours_agent_id},
+        "after_hours": {"llm_id": after_hours_llm['llm_id'], "agent_id": after_hours_agent_id}
+    }
+    llm_data = {"office_hours": office_hours_llm, "after_hours": after_hours_llm}
+    try:
+        return save_company_data(
+            company_data, 
+            knowledge_base_id, 
+            agent_data, 
+            llm_data, 
+            conversation_flow_id, 
+            router_agent_data,
+            phone_data,
+            dashboard_result,
+            global_prompt
+        )
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Database save error: {error_msg}")
+        print(f"   Agents created successfully but data not saved to database")
+        return None
+
+
+def build_provisioning_graph(max_workers=STEP_GRAPH_MAX_WORKERS):
+    """
+    Declare the provisioning steps and the values they exchange
+    
+    Independent steps overlap: the two LLMs, the two agents, and the dashboard
+    registration and phone number purchase each run side by side. Dashboard
+    registration is left for later when a deadline leaves too little time for it.
+    """
+    graph = StepGraph(max_workers=max_workers)
+    graph.add_step("knowledge_base", step_knowledge_base,
+                   inputs=["company_data"], outputs=["knowledge_base_id"])
+    graph.add_step("global_prompt", step_global_prompt,
+                   inputs=["company_data"], outputs=["global_prompt"])
+    graph.add_step("office_hours_llm", step_office_hours_llm,
+                   inputs=["company_data", "knowledge_base_id"], outputs=["office_hours_llm"])
+    graph.add_step("after_hours_llm", step_after_hours_llm,
+                   inputs=["company_data", "knowledge_base_id"], outputs=["after_hours_llm"])
+    graph.add_step("office_hours_agent", step_office_hours_agent,
+                   inputs=["company_data", "office_hours_llm", "knowledge_base_id"],
+                   outputs=["office_hours_agent_id"])
+    graph.add_step("after_hours_agent", step_after_hours_agent,
+                   inputs=["company_data", "after_hours_llm", "knowledge_base_id"],
+                   outputs=["after_hours_agent_id"])
+    graph.add_step("conversation_flow", step_conversation_flow,
+                   inputs=["company_data", "global_prompt", "office_hours_llm", "after_hours_llm",
+                           "office_hours_agent_id", "after_hours_agent_id"],
+                   outputs=["conversation_flow_id"])
+    graph.add_step("main_router_agent", step_main_router_agent,
+                   inputs=["company_data", "conversation_flow_id"], outputs=["router_agent_data"])
+    graph.add_step("dashboard", step_dashboard,
+                   inputs=["company_data", "router_agent_data"], outputs=["dashboard_result"],
+                   defer_within=DEADLINE_DEFERRABLE_STEPS.get("dashboard"))
+    graph.add_step("phone_number", step_phone_number,
+                   inputs=["company_data", "router_agent_data"], outputs=["phone_data"])
+    graph.add_step("database", step_save,
+                   inputs=["company_data", "global_prompt", "knowledge_base_id", "office_hours_llm", "after_hours_llm",
+                           "office_hours_agent_id", "after_hours_agent_id", "conversation_flow_id",
+                           "router_agent_data", "phone_data", "dashboard_result"],
+                   outputs=["company_id"])
+    return graph
+
+
+def print_timing_summary(timing):
+    """Print per-step durations and the critical path"""
+    print(f"\n⏱️  Step Timings (wall {timing['wall_ms']}ms, serial {timing['serial_ms']}ms)")
+    for name, step in sorted(timing['steps'].items(), key=lambda item: item[1]['started_ms']):
+        print(f"   {name}: {step['duration_ms']}ms (started at +{step['started_ms']}ms)")
+    if timing['skipped']:
+        print(f"   Reused from checkpoint: {', '.join(timing['skipped'])}")
+    if timing['deferred']:
+        print(f"   Deferred for lack of time: {', '.join(timing['deferred'])}")
+    print(f"   Critical path ({timing['critical_path_ms']}ms): {' → '.join(timing['critical_path'])}")
+
+
+def build_final_result(values, timing):
+    """Collect the resource IDs from a finished provisioning graph run"""
+    router_agent_data = values['router_agent_data']
+    phone_data = values['phone_data']
+    
+    return {
+        "company_id": values['company_id'],
+        "knowledge_base_id": values['knowledge_base_id'],
+        "conversation_flow_id": values['conversation_flow_id'],
+        "main_router_agent_id": router_agent_data['agent_id'],
+        "office_hours_agent_id": values['office_hours_agent_id'],
+        "after_hours_agent_id": values['after_hours_agent_id'],
+        "office_hours_llm_id": values['office_hours_llm']['llm_id'],
+        "after_hours_llm_id": values['after_hours_llm']['llm_id'],
+        "phone_number": phone_data['phone_number'] if phone_data else None,
+        "phone_number_id": phone_data['phone_number_id'] if phone_data else None,
+        "dashboard_credentials": values['dashboard_result'],
+        "deferred_steps": timing['deferred'],
+        "timing": timing
+    }
+
+
+def resource_ids(outputs):
+    """Pick the created resource IDs out of step outputs, named as in build_final_result"""
+    ids = {}
+    for name, value in outputs.items():
+        if value is None:
+            continue
+        if name in ("knowledge_base_id", "office_hours_agent_id", "after_hours_agent_id",
+                    "conversation_flow_id", "company_id"):
+            ids[name] = value
+        elif name in ("office_hours_llm", "after_hours_llm"):
+            ids[f"{name}_id"] = value['llm_id']
+        elif name == "router_agent_data":
+            ids["main_router_agent_id"] = value['agent_id']
+        elif name == "phone_data":
+            ids["phone_number"] = value['phone_number']
+            ids["phone_number_id"] = value['phone_number_id']
+        elif name == "dashboard_result" and value.get('success'):
+            ids["dashboard_email"] = value['email']
+    return ids
+
+
+def checkpoint_values(outputs):
+    """
+    Step outputs worth saving for a resume
+    
+    Steps that failed softly (returned None, or a router without an agent) are
+    left out so a resumed run tries them again.
+    """
+    return {
+        name: value for name, value in outputs.items()
+        if value is not None and not (name == "router_agent_data" and not value['agent_id'])
+    }
+
+
+def track_progress(progress, total_steps, checkpoint=None):
+    """
+    Wrap a progress callback as a StepGraph on_event handler
+    
+    progress receives each step event plus completed_steps, total_steps, a
+    progress percentage, the resource IDs created so far and the checkpoint:
+    every step output saved so far (starting from checkpoint), to persist for
+    a resume. Events are delivered one at a time, in order.
+    """
+    lock = threading.Lock()
+    completed = set()
+    resources = {}
+    saved = dict(checkpoint or {})
+    
+    def on_event(event):
+        with lock:
+            if event['phase'] in ("finished", "skipped", "deferred"):
+                completed.add(event['step'])
+                resources.update(resource_ids(event['outputs']))
+                saved.update(checkpoint_values(event['outputs']))
+            progress_event = {key: value for key, value in event.items() if key != "outputs"}
+            progress_event.update({
+                "completed_steps": len(completed),
+                "total_steps": total_steps,
+                "progress": int(len(completed) * 100 / total_steps),
+                "resources": dict(resources),
+                "checkpoint": dict(saved)
+            })
+            progress(progress_event)
+    
+    return on_event
+
+
+def print_final_result(final_result):
+    """Print the created resources and dashboard credentials"""
+    dashboard_result = final_result['dashboard_credentials']
+    
+    print(f"\n🎉 AGENT CREATION COMPLETE!")
+    print(f"Company ID: {final_result['company_id']}")
+    print(f"Knowledge Base ID: {final_result['knowledge_base_id']}")
+    print(f"Conversation Flow ID: {final_result['conversation_flow_id'] or 'Not created'}")
+    print(f"Main Router Agent ID: {final_result['main_router_agent_id'] or 'Not created'}")
+    print(f"Office Hours Agent ID: {final_result['office_hours_agent_id']}")
+    print(f"After Hours Agent ID: {final_result['after_hours_agent_id']}")
+    if final_result['phone_number']:
+        print(f"📞 Phone Number: {final_result['phone_number']}")
+        print(f"📞 Phone Number ID: {final_result['phone_number_id']}")
+    if dashboard_result and dashboard_result.get('success'):
+        print(f"🎯 Dashboard Account: {dashboard_result['email']}")
+        print(f"🔑 Dashboard Password: {dashboard_result['password']}")
+    elif "dashboard" in final_result['deferred_steps']:
+        print(f"⏭️  Dashboard account deferred: the provisioning deadline was too close to create it")
+    print_timing_summary(final_result['timing'])
+
+
+def print_troubleshooting_tips(error, company_data):
+    """Print troubleshooting tips for a failed agent creation"""
+    print(f"❌ Agent creation failed: {error}")
+    print(f"\n🔍 Troubleshooting Tips:")
+    error_msg = str(error).lower()
+    if "deadline" in error_msg:
+        print(f"   • Resume the job to finish the remaining steps; finished steps are not repeated")
+        print(f"   • Raise PROVISIONING_DEADLINE if onboardings regularly need longer")
+    elif "circuit open" in error_msg:
+        print(f"   • An upstream service is failing; calls to it were stopped early")
+        print(f"   • Resume the job once it recovers; finished steps are not repeated")
+    elif "knowledge base" in error_msg and "too long" in error_msg:
+        print(f"   • Use a shorter company name (max 30-40 characters)")
+        print(f"   • Current company name: '{company_data.get('company_name', 'Unknown')}'")
+    elif "sitemap" in error_msg:
+        print(f"   • Check if your website has a valid sitemap.xml")
+        print(f"   • Verify the website URL is accessible: {company_data.get('website_url', 'Unknown')}")
+    elif "unauthorized" in error_msg or "token" in error_msg:
+        print(f"   • Check your Retell API token in agent_system/config.py")
+        print(f"   • Ensure the token has proper permissions")
+    elif "quota" in error_msg or "limit" in error_msg:
+        print(f"   • API quota exceeded - wait and try again later")
+        print(f"   • Check your Retell account usage limits")
+    else:
+        print(f"   • Check your internet connection")
+        print(f"   • Verify all configuration settings in agent_system/config.py")
+        print(f"   • Check Retell API service status")
+
+
+def create_agent_automation(company_data, max_workers=STEP_GRAPH_MAX_WORKERS, progress=None, checkpoint=None,
+                            deadline=None):
+    """
+    Main orchestration function - Complete agent creation lifecycle
+    
+    progress, if given, is called at the start and end of every step (see track_progress).
+    checkpoint holds step outputs saved by an earlier, failed run; the resources
+    they name are reused instead of created again. deadline (an
+    agent_system.deadline.Deadline) bounds the whole run, and every Retell call in it.
+    """
     try:
         print("🚀 Starting Complete Agent Creation Automation")
         print("=" * 60)
         
-        # Step 1: Create knowledge base from sitemap
-        knowledge_base_name = company_data['company_name']  # Use just the company name
-        try:
-            knowledge_base_id = create_knowledge_base(company_data['website_url'], knowledge_base_name)
-        except Exception as e:
-            error_msg = str(e)
-            if "too long" in error_msg.lower():
-                print(f"❌ Knowledge base name is too long. Please use a shorter company name.")
-                print(f"   Current name: '{knowledge_base_name}' ({len(knowledge_base_name)} characters)")
-                print(f"   Maximum recommended: 50 characters")
-            elif "sitemap" in error_msg.lower():
-                print(f"❌ Website sitemap error: {error_msg}")
-                print(f"   Please check if {company_data['website_url']} has a valid sitemap")
-            elif "unauthorized" in error_msg.lower():
-                print(f"❌ API Authorization error: {error_msg}")
-                print(f"   Please check your Retell API token in the configuration")
-            else:
-                print(f"❌ Knowledge base creation error: {error_msg}")
-            raise Exception(f"Knowledge base creation failed: {error_msg}")
-        
-        # Step 2: Create LLMs with conversation flows
-        try:
-            llm_data = create_llms(company_data, knowledge_base_id)
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ LLM creation error: {error_msg}")
-            if "unauthorized" in error_msg.lower():
-                print(f"   Please check your Retell API token")
-            elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
-                print(f"   API quota exceeded - please try again later")
-            raise Exception(f"LLM creation failed: {error_msg}")
-        
-        # Step 3: Create LLM-based agents (they will be auto-published)
-        try:
-            agent_data = create_agents(company_data, llm_data, knowledge_base_id)
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Agent creation error: {error_msg}")
-            if "llm_id" in error_msg.lower():
-                print(f"   LLM ID issue - please check if LLMs were created successfully")
-            raise Exception(f"Agent creation failed: {error_msg}")
-        
-        # Step 4: Create conversation flow with published agent IDs for transfers
-        try:
-            conversation_flow_id = create_conversation_flow(
-                company_data, 
-                llm_data, 
-                agent_data['office_hours']['agent_id'],
-                agent_data['after_hours']['agent_id']
-            )
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Conversation flow creation error: {error_msg}")
-            print(f"   Continuing without conversation flow...")
-            conversation_flow_id = None
-        
-        # Step 5: Create Main Router Agent (uses conversation flow, will be auto-published)
-        # Dashboard account is created immediately after agent creation
-        try:
-            router_agent_data = create_main_router_agent(company_data, conversation_flow_id)
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Main router agent creation error: {error_msg}")
-            print(f"   Continuing without main router agent...")
-            router_agent_data = {
-                "agent_id": None,
-                "conversation_flow_id": conversation_flow_id,
-                "dashboard_result": None
-            }
-        
-        # Extract dashboard result from router agent creation
-        dashboard_result = router_agent_data.get('dashboard_result')
-        
-        # Step 6: Purchase phone number with area code fallback and inbound agent assignment
-        phone_data = None
-        if router_agent_data['agent_id']:
-            try:
-                phone_data = purchase_phone_number(
-                    company_data['company_name'], 
-                    company_data['area_code'],
-                    router_agent_data['agent_id']  # Pass main router agent ID for inbound calls
-                )
-            except Exception as e:
-                error_msg = str(e)
-                print(f"❌ Phone number purchase error: {error_msg}")
-                print(f"   Continuing without phone number...")
-                phone_data = None
-        
-        # Step 7: Save to database (including phone number and dashboard data)
-        try:
-            company_id = save_company_data(
-                company_data, 
-                knowledge_base_id, 
-                agent_data, 
-                llm_data, 
-                conversation_flow_id, 
-                router_agent_data,
-                phone_data,
-                dashboard_result
-            )
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Database save error: {error_msg}")
-            print(f"   Agents created successfully but data not saved to database")
-            company_id = None
+        graph = build_provisioning_graph(max_workers)
+        on_event = track_progress(progress, len(graph.steps), checkpoint) if progress else None
+        values, timing = graph.run({"company_data": company_data}, on_event=on_event, checkpoint=checkpoint,
+                                   deadline=deadline)
         
         # Return final agent IDs
-        final_result = {
-            "company_id": company_id,
-            "knowledge_base_id": knowledge_base_id,
-            "conversation_flow_id": conversation_flow_id,
-            "main_router_agent_id": router_agent_data['agent_id'],
-            "office_hours_agent_id": agent_data['office_hours']['agent_id'],
-            "after_hours_agent_id": agent_data['after_hours']['agent_id'],
-            "office_hours_llm_id": agent_data['office_hours']['llm_id'],
-            "after_hours_llm_id": agent_data['after_hours']['llm_id'],
-            "phone_number": phone_data['phone_number'] if phone_data else None,
-            "phone_number_id": phone_data['phone_number_id'] if phone_data else None,
-            "dashboard_credentials": dashboard_result
-        }
-        
-        print(f"\n🎉 AGENT CREATION COMPLETE!")
-        print(f"Company ID: {company_id}")
-        print(f"Knowledge Base ID: {knowledge_base_id}")
-        print(f"Conversation Flow ID: {conversation_flow_id or 'Not created'}")
-        print(f"Main Router Agent ID: {router_agent_data['agent_id'] or 'Not created'}")
-        print(f"Office Hours Agent ID: {agent_data['office_hours']['agent_id']}")
-        print(f"After Hours Agent ID: {agent_data['after_hours']['agent_id']}")
-        if phone_data:
-            print(f"📞 Phone Number: {phone_data['phone_number']}")
-            print(f"📞 Phone Number ID: {phone_data['phone_number_id']}")
-        if dashboard_result and dashboard_result.get('success'):
-            print(f"🎯 Dashboard Account: {dashboard_result['email']}")
-            print(f"🔑 Dashboard Password: {dashboard_result['password']}")
+        final_result = build_final_result(values, timing)
+        print_final_result(final_result)
         
         return final_result
         
     except Exception as e:
-        print(f"❌ Agent creation failed: {e}")
-        print(f"\n🔍 Troubleshooting Tips:")
-        error_msg = str(e).lower()
-        if "knowledge base" in error_msg and "too long" in error_msg:
-            print(f"   • Use a shorter company name (max 30-40 characters)")
-            print(f"   • Current company name: '{company_data.get('company_name', 'Unknown')}'")
-        elif "sitemap" in error_msg:
-            print(f"   • Check if your website has a valid sitemap.xml")
-            print(f"   • Verify the website URL is accessible: {company_data.get('website_url', 'Unknown')}")
-        elif "unauthorized" in error_msg or "token" in error_msg:
-            print(f"   • Check your Retell API token in agent_system/config.py")
-            print(f"   • Ensure the token has proper permissions")
-        elif "quota" in error_msg or "limit" in error_msg:
-            print(f"   • API quota exceeded - wait and try again later")
-            print(f"   • Check your Retell account usage limits")
-        else:
-            print(f"   • Check your internet connection")
-            print(f"   • Verify all configuration settings in agent_system/config.py")
-            print(f"   • Check Retell API service status")
+        print_troubleshooting_tips(e, company_data)
         raise
 
 
 def main():
     """Main entry point"""
     try:
+        # Open Retell connections while the user is still typing
+        warm_retell_client()
+        
         # Collect input
         company_data = collect_user_input()
         
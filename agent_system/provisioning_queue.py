@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Provisioning Job Queue
+Postgres-backed onboarding queue drained by any number of worker processes
+
+Jobs live in the provisioning_jobs table (see database_setup.sql). Workers claim
+one job at a time with FOR UPDATE SKIP LOCKED, so concurrent workers on any
+number of hosts never block on or double-claim a row. A claimed job holds a
+lease that the worker extends with heartbeats; if the worker dies the lease
+runs out and another worker picks the job up again. Failed attempts are
+retried with exponential backoff up to the job's max_attempts. While an upstream's
+circuit is open (see agent_system.circuit_breaker) workers stop claiming jobs, and
+a job stopped by the open circuit goes back to the queue without using an attempt.
+
+Usage:
+    python -m agent_system.provisioning_queue --workers 4
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import threading
+
+from .config import (
+    PROVISIONING_WORKERS, PROVISIONING_JOB_LEASE, PROVISIONING_JOB_HEARTBEAT,
+    PROVISIONING_JOB_MAX_ATTEMPTS, PROVISIONING_JOB_RETRY_BASE, PROVISIONING_JOB_RETRY_MAX,
+    PROVISIONING_WORKER_POLL_INTERVAL
+)
+from .database import get_db_connection
+from .job_store import get_job_store, new_job_id
+from .creation_jobs import run_creation_job
+from .user_input import transform_form_data
+from .retell_client import warm_retell_client
+from .circuit_breaker import open_circuits
+
+CLAIM_SQL = """
+    WITH next_job AS (
+        SELECT id FROM provisioning_jobs
+        WHERE (status = 'queued' AND run_after <= now())
+           OR (status = 'running' AND lease_expires_at < now() AND attempts < max_attempts)
+        ORDER BY run_after, created_at
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    UPDATE provisioning_jobs AS job
+    SET status = 'running',
+        attempts = job.attempts + 1,
+        locked_by = %s,
+        lease_expires_at = now() + make_interval(secs => %s),
+        updated_at = now()
+    FROM next_job
+    WHERE job.id = next_job.id
+    RETURNING job.id, job.payload, job.attempts, job.max_attempts
+"""
+
+
+def retry_delay(attempt, base=PROVISIONING_JOB_RETRY_BASE, maximum=PROVISIONING_JOB_RETRY_MAX):
+    """Seconds before retrying after the given failed attempt: doubling backoff with jitter"""
+    delay = min(maximum, base * 2 ** (attempt - 1))
+    return int(random.uniform(delay / 2, delay))
+
+
+class ProvisioningQueue:
+    """Enqueue, claim and settle jobs in the provisioning_jobs table"""
+
+    def _execute(self, query, params=(), fetch=None):
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                if fetch == 'one':
+                    result = cur.fetchone()
+                elif fetch == 'all':
+                    result = cur.fetchall()
+                else:
+                    result = cur.rowcount
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    def enqueue(self, payload, job_id=None, max_attempts=PROVISIONING_JOB_MAX_ATTEMPTS):
+        """
+        Add a job; payload is {"company_data": {...}} or {"form": {...}} for raw web form data
+
+        Enqueueing a job_id that is queued, running or succeeded again is a no-op, so
+        callers can retry safely; a failed job is reset and queued for a fresh run.
+        """
+        job_id = job_id or new_job_id()
+        self._execute("""
+            INSERT INTO provisioning_jobs (id, payload, max_attempts)
+            VALUES (%s, %s::jsonb, %s)
+            ON CONFLICT (id) DO UPDATE
+            SET status = 'queued', payload = EXCLUDED.payload, max_attempts = EXCLUDED.max_attempts,
+                attempts = 0, run_after = now(), last_error = NULL, result = NULL, updated_at = now()
+            WHERE provisioning_jobs.status = 'failed'
+        """, (job_id, json.dumps(payload), max_attempts))
+        return job_id
+
+    def claim(self, worker_id, lease=PROVISIONING_JOB_LEASE):
+        """Lock the next ready job for worker_id; returns a job dict or None"""
+        row = self._execute(CLAIM_SQL, (worker_id, lease), fetch='one')
+        if row is None:
+            return None
+        job_id, payload, attempts, max_attempts = row
+        return {"id": job_id, "payload": payload, "attempts": attempts, "max_attempts": max_attempts}
+
+    def heartbeat(self, job_id, worker_id, lease=PROVISIONING_JOB_LEASE):
+        """Extend the lease; False means the worker no longer holds the job"""
+        return self._execute("""
+            UPDATE provisioning_jobs
+            SET lease_expires_at = now() + make_interval(secs => %s), updated_at = now()
+            WHERE id = %s AND locked_by = %s AND status = 'running'
+        """, (lease, job_id, worker_id)) > 0
+
+    def complete(self, job_id, worker_id, result=None):
+        """Mark a job succeeded"""
+        return self._execute("""
+            UPDATE provisioning_jobs
+            SET status = 'succeeded', result = %s::jsonb, last_error = NULL,
+                locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+            WHERE id = %s AND locked_by = %s
+        """, (json.dumps(result), job_id, worker_id)) > 0
+
+    def fail(self, job_id, worker_id, error, retry_in=None):
+        """Requeue a failed job after retry_in seconds, or mark it failed when retry_in is None"""
+        return self._execute("""
+            UPDATE provisioning_jobs
+            SET status = %s, run_after = now() + make_interval(secs => %s), last_error = %s,
+                locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+            WHERE id = %s AND locked_by = %s
+        """, ('failed' if retry_in is None else 'queued', retry_in or 0, str(error)[:2000], job_id, worker_id)) > 0
+
+    def defer(self, job_id, worker_id, error, retry_in):
+        """Requeue a job after retry_in seconds without counting the attempt against it"""
+        return self._execute("""
+            UPDATE provisioning_jobs
+            SET status = 'queued', attempts = greatest(attempts - 1, 0),
+                run_after = now() + make_interval(secs => %s), last_error = %s,
+                locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+            WHERE id = %s AND locked_by = %s
+        """, (retry_in, str(error)[:2000], job_id, worker_id)) > 0
+
+    def reap_expired(self):
+        """Fail jobs whose worker died on their last attempt; returns their ids"""
+        rows = self._execute("""
+            UPDATE provisioning_jobs
+            SET status = 'failed', last_error = 'Worker lease expired on the final attempt',
+                locked_by = NULL, lease_expires_at = NULL, updated_at = now()
+            WHERE status = 'running' AND lease_expires_at < now() AND attempts >= max_attempts
+            RETURNING id
+        """, fetch='all')
+        return [row[0] for row in rows]
+
+    def stats(self):
+        """Job counts per status"""
+        rows = self._execute("SELECT status, count(*) FROM provisioning_jobs GROUP BY status", fetch='all')
+        counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def queued_count(self):
+        """Jobs waiting for a worker, including those backing off before a retry"""
+        return self._execute("SELECT count(*) FROM provisioning_jobs WHERE status = 'queued'", fetch='one')[0]
+
+
+def start_heartbeat(queue, job_id, worker_id, interval=PROVISIONING_JOB_HEARTBEAT):
+    """Extend the job's lease every interval seconds until the returned event is set"""
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(interval):
+            try:
+                if not queue.heartbeat(job_id, worker_id):
+                    print(f"⚠️  [{worker_id}] Lost the lease on {job_id}; another worker may rerun it")
+                    return
+            except Exception as e:
+                print(f"⚠️  [{worker_id}] Heartbeat failed for {job_id}: {e}")
+
+    threading.Thread(target=beat, name=f"{worker_id}-heartbeat", daemon=True).start()
+    return stop
+
+
+def process_job(queue, job, worker_id):
+    """Run one claimed job and settle it as succeeded, retried or failed"""
+    payload = job["payload"]
+    retry_in = retry_delay(job["attempts"]) if job["attempts"] < job["max_attempts"] else None
+    print(f"👷 [{worker_id}] Claimed {job['id']} (attempt {job['attempts']}/{job['max_attempts']})")
+
+    stop_heartbeat = start_heartbeat(queue, job["id"], worker_id)
+    try:
+        company_data = payload.get("company_data") or transform_form_data(payload["form"])
+        result = run_creation_job(job["id"], company_data, retry_in=retry_in)
+    except Exception as e:
+        circuits = open_circuits()
+        if circuits:
+            # The upstream is down, not the job: wait for it without using an attempt
+            wait = int(max(breaker.retry_in() for breaker in circuits)) + 1
+            queue.defer(job["id"], worker_id, e, wait)
+            get_job_store().update(job["id"], status='queued',
+                                   message=f"Waiting for {', '.join(b.host for b in circuits)} to recover, retrying in {wait}s")
+            print(f"🔌 [{worker_id}] {job['id']} stopped by an open circuit, requeued in {wait}s")
+            return False
+        queue.fail(job["id"], worker_id, e, retry_in)
+        print(f"❌ [{worker_id}] {job['id']} failed"
+              + (f", retrying in {retry_in}s" if retry_in is not None else ", no attempts left"))
+        return False
+    finally:
+        stop_heartbeat.set()
+
+    queue.complete(job["id"], worker_id, result)
+    return True
+
+
+def run_worker(queue=None, worker_id=None, stop=None, poll_interval=PROVISIONING_WORKER_POLL_INTERVAL):
+    """Claim and process jobs until stop is set, sleeping poll_interval when the queue is empty"""
+    queue = queue or ProvisioningQueue()
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    stop = stop or threading.Event()
+
+    while not stop.is_set():
+        circuits = open_circuits()
+        if circuits:
+            # Leave jobs queued instead of starting onboardings that would fail
+            stop.wait(min(poll_interval, min(breaker.retry_in() for breaker in circuits)))
+            continue
+
+        try:
+            job = queue.claim(worker_id)
+        except Exception as e:
+            print(f"⚠️  [{worker_id}] Could not claim a job: {e}")
+            stop.wait(poll_interval)
+            continue
+
+        if job is None:
+            try:
+                for job_id in queue.reap_expired():
+                    print(f"❌ [{worker_id}] {job_id} abandoned by its worker on the final attempt")
+                    get_job_store().update(job_id, status='error', message='Agent creation was interrupted')
+            except Exception as e:
+                print(f"⚠️  [{worker_id}] Could not reap expired jobs: {e}")
+            stop.wait(poll_interval)
+            continue
+
+        process_job(queue, job, worker_id)
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Run provisioning queue workers")
+    parser.add_argument("--workers", type=int, default=PROVISIONING_WORKERS,
+                        help=f"jobs processed concurrently by this process (default {PROVISIONING_WORKERS})")
+    parser.add_argument("--poll-interval", type=float, default=PROVISIONING_WORKER_POLL_INTERVAL,
+                        help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    warm_retell_client()
+
+    queue = ProvisioningQueue()
+    stop = threading.Event()
+    host = f"{socket.gethostname()}:{os.getpid()}"
+    threads = [
+        threading.Thread(target=run_worker, args=(queue, f"{host}:{index}", stop, args.poll_interval),
+                         name=f"provision-{index}", daemon=True)
+        for index in range(args.workers)
+    ]
+    print(f"👷 Starting {args.workers} provisioning workers on {host}")
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+    except KeyboardInterrupt:
+        print(f"\n🛑 Stopping workers after their current jobs (Ctrl+C again to abandon them)")
+        stop.set()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
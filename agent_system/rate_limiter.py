@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Retell Rate Limiter
+Pace Retell calls per endpoint with token buckets shared by every provisioning worker
+
+Each endpoint in RETELL_RATE_LIMITS has its own bucket that refills at its
+requests-per-minute rate up to its burst size. A call takes a token before it
+is sent; when the bucket is empty it takes the next token due and sleeps until
+then, so concurrent onboardings queue in arrival order at the allowed rate
+instead of failing with 429s. The buckets live in memory (threads of one
+process), a locked file (processes on one host) or Postgres (every host).
+A 429 that slips through anyway empties the bucket for its Retry-After time,
+pausing every worker sharing it.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from .config import RETELL_RATE_LIMITS, RETELL_RATE_LIMIT_BACKEND, RETELL_RATE_LIMIT_FILE
+
+# Waits at least this long are worth a log line
+LOG_WAIT_SECONDS = 1
+
+
+def take_token(tokens, refilled_at, now, per_minute, burst):
+    """
+    Refill a bucket up to now and take one token from it
+
+    The bucket may go negative: each waiting caller holds a token that is not
+    due yet. Returns (tokens left, seconds until the taken token is due).
+    """
+    rate = per_minute / 60
+    tokens = min(burst, tokens + (now - refilled_at) * rate) - 1
+    return tokens, max(0.0, -tokens / rate)
+
+
+def drain_bucket(tokens, refilled_at, now, per_minute, burst, seconds):
+    """Refill a bucket up to now, then empty it so the next token is due in seconds"""
+    rate = per_minute / 60
+    return min(min(burst, tokens + (now - refilled_at) * rate), 1 - seconds * rate)
+
+
+def retry_after_seconds(value, default=None):
+    """Seconds from a Retry-After header (delta seconds or an HTTP date), else default"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class MemoryRateLimiter:
+    """Buckets in a dict, shared by the threads of one process"""
+
+    def __init__(self, limits=RETELL_RATE_LIMITS):
+        self.limits = limits
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, endpoint):
+        """Take a token for endpoint; returns the seconds to wait before sending"""
+        if endpoint not in self.limits:
+            return 0.0
+        per_minute, burst = self.limits[endpoint]
+        with self._lock:
+            now = time.monotonic()
+            tokens, refilled_at = self._buckets.get(endpoint, (burst, now))
+            tokens, wait = take_token(tokens, refilled_at, now, per_minute, burst)
+            self._buckets[endpoint] = (tokens, now)
+        return wait
+
+    def throttle(self, endpoint, seconds=None):
+        """Hold back endpoint's next call for seconds (default: one token's worth) after a 429"""
+        if endpoint not in self.limits:
+            return
+        per_minute, burst = self.limits[endpoint]
+        seconds = 60 / per_minute if seconds is None else seconds
+        with self._lock:
+            now = time.monotonic()
+            tokens, refilled_at = self._buckets.get(endpoint, (burst, now))
+            self._buckets[endpoint] = (drain_bucket(tokens, refilled_at, now, per_minute, burst, seconds), now)
+
+
+class FileRateLimiter:
+    """Buckets in a JSON file under an exclusive file lock, shared by processes on one host"""
+
+    def __init__(self, path=RETELL_RATE_LIMIT_FILE, limits=RETELL_RATE_LIMITS):
+        self.path = path
+        self.limits = limits
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _buckets(self):
+        """Yield {endpoint: [tokens, refilled_at]} with the file locked, and write it back"""
+        with self._lock, open(f"{self.path}.lock", 'a+b') as lock_file:
+            _lock_file(lock_file)
+            try:
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        buckets = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    buckets = {}
+                yield buckets
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(buckets, f)
+                os.replace(tmp_path, self.path)
+            finally:
+                _unlock_file(lock_file)
+
+    def reserve(self, endpoint):
+        if endpoint not in self.limits:
+            return 0.0
+        per_minute, burst = self.limits[endpoint]
+        with self._buckets() as buckets:
+            now = time.time()
+            tokens, refilled_at = buckets.get(endpoint, (burst, now))
+            tokens, wait = take_token(tokens, refilled_at, now, per_minute, burst)
+            buckets[endpoint] = [tokens, now]
+        return wait
+
+    def throttle(self, endpoint, seconds=None):
+        if endpoint not in self.limits:
+            return
+        per_minute, burst = self.limits[endpoint]
+        seconds = 60 / per_minute if seconds is None else seconds
+        with self._buckets() as buckets:
+            now = time.time()
+            tokens, refilled_at = buckets.get(endpoint, (burst, now))
+            buckets[endpoint] = [drain_bucket(tokens, refilled_at, now, per_minute, burst, seconds), now]
+
+
+class PostgresRateLimiter:
+    """
+    Buckets in the retell_rate_limits table (see database_setup.sql), shared by every host
+
+    Each call is one upsert that refills, takes the token and returns the
+    balance; concurrent callers serialize on the endpoint's row lock only.
+    """
+
+    def __init__(self, limits=RETELL_RATE_LIMITS):
+        self.limits = limits
+
+    def _execute(self, query, params):
+        from .database import get_db_connection
+
+        conn = get_db_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                result = cur.fetchone()
+            conn.commit()
+            return result
+        finally:
+            conn.close()
+
+    def reserve(self, endpoint):
+        if endpoint not in self.limits:
+            return 0.0
+        per_minute, burst = self.limits[endpoint]
+        rate = per_minute / 60
+        tokens, = self._execute("""
+            INSERT INTO retell_rate_limits (endpoint, tokens, refilled_at)
+            VALUES (%s, %s, now())
+            ON CONFLICT (endpoint) DO UPDATE
+            SET tokens = least(%s, retell_rate_limits.tokens
+                               + %s * extract(epoch FROM now() - retell_rate_limits.refilled_at)::float8) - 1,
+                refilled_at = now()
+            RETURNING tokens
+        """, (endpoint, burst - 1, burst, rate))
+        return max(0.0, -tokens / rate)
+
+    def throttle(self, endpoint, seconds=None):
+        if endpoint not in self.limits:
+            return
+        per_minute, burst = self.limits[endpoint]
+        rate = per_minute / 60
+        seconds = 60 / per_minute if seconds is None else seconds
+        self._execute("""
+            INSERT INTO retell_rate_limits (endpoint, tokens, refilled_at)
+            VALUES (%s, %s, now())
+            ON CONFLICT (endpoint) DO UPDATE
+            SET tokens = least(EXCLUDED.tokens, %s, retell_rate_limits.tokens
+                               + %s * extract(epoch FROM now() - retell_rate_limits.refilled_at)::float8),
+                refilled_at = now()
+            RETURNING tokens
+        """, (endpoint, 1 - seconds * rate, burst, rate))
+
+
+class NullRateLimiter:
+    """Rate limiting disabled: calls are sent immediately"""
+
+    def reserve(self, endpoint):
+        return 0.0
+
+    def throttle(self, endpoint, seconds=None):
+        pass
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                pass  # LK_LOCK gives up after 10 seconds; keep waiting
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the limiter selected by RETELL_RATE_LIMIT_BACKEND (memory, file, postgres or off)"""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                if RETELL_RATE_LIMIT_BACKEND == 'postgres':
+                    _limiter = PostgresRateLimiter()
+                elif RETELL_RATE_LIMIT_BACKEND == 'file':
+                    _limiter = FileRateLimiter()
+                elif RETELL_RATE_LIMIT_BACKEND == 'memory':
+                    _limiter = MemoryRateLimiter()
+                else:
+                    _limiter = NullRateLimiter()
+    return _limiter
+
+
+def reserve_call(endpoint, limiter=None):
+    """
+    Take a token for a call to endpoint; returns the seconds to wait before sending it
+
+    Endpoints without a configured limit, and limiter errors, never hold a call back.
+    """
+    try:
+        wait = (limiter or get_rate_limiter()).reserve(endpoint)
+    except Exception as e:
+        print(f"   ⚠️  Rate limiter unavailable, sending '{endpoint}' call unpaced: {e}")
+        return 0.0
+    if wait >= LOG_WAIT_SECONDS:
+        print(f"   ⏳ Pacing '{endpoint}' call for {wait:.1f}s to stay under the Retell rate limit")
+    return wait
+
+
+def wait_for_slot(endpoint, limiter=None):
+    """Block until a call to endpoint may be sent"""
+    wait = reserve_call(endpoint, limiter)
+    if wait > 0:
+        time.sleep(wait)
+
+
+def record_throttled(endpoint, retry_after=None, limiter=None):
+    """Hold back every worker's calls to endpoint after a 429 (retry_after: the response's Retry-After header)"""
+    seconds = retry_after_seconds(retry_after)
+    print(f"   ⚠️  Retell rate limited '{endpoint}' calls"
+          + (f"; pausing them for {seconds:.1f}s" if seconds is not None else ""))
+    try:
+        (limiter or get_rate_limiter()).throttle(endpoint, seconds)
+    except Exception as e:
+        print(f"   ⚠️  Could not record rate limit for '{endpoint}': {e}")
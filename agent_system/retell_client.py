@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Retell API Client
+Shared keep-alive HTTP client for Retell and the other provisioning upstreams
+"""
+
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+from .config import (
+    RETELL_API_TOKEN, ORG_ID, RETELL_URLS, DASHBOARD_REGISTER_URL,
+    HTTP_TIMEOUTS, HTTP_POOL_MAXSIZE, HTTP_WARM_CONNECTIONS,
+    RETELL_RETRY_ATTEMPTS, RETELL_RETRY_BASE, RETELL_RETRY_MAX_DELAY, RETELL_RETRY_BUDGET,
+    RETELL_RETRY_STATUS_CODES, RETELL_IDEMPOTENT_ENDPOINTS, RETELL_RETRY_AFTER_STATUS_CODES
+)
+from .rate_limiter import reserve_call, record_throttled, retry_after_seconds
+from .deadline import DeadlineExceeded, current_deadline
+from .circuit_breaker import get_circuit_breaker
+
+# Every endpoint the provisioning modules call, keyed by the name used in HTTP_TIMEOUTS
+ENDPOINT_URLS = {
+    **RETELL_URLS,
+    'dashboard_register': DASHBOARD_REGISTER_URL
+}
+
+
+def build_auth_headers(api_token=RETELL_API_TOKEN, org_id=ORG_ID):
+    """Authorization headers sent with every Retell request"""
+    headers = {"Authorization": f"Bearer {api_token}"}
+    if org_id:
+        headers["orgid"] = org_id
+    return headers
+
+
+class RetryPolicy:
+    """
+    When to retry a failed call, and how long to wait first
+
+    Only transient failures are retried: RETELL_RETRY_STATUS_CODES responses
+    (rate limits and gateway errors), connection errors and timeouts. Other
+    responses are returned to the caller as they are.
+
+    Calls to endpoints outside idempotent_endpoints create something upstream,
+    and a read timeout or a 5xx doesn't say whether it was created. Those calls
+    are retried only when the request never went out (the connection failed)
+    or was refused with a retry_after_status_codes response naming Retry-After.
+    """
+
+    def __init__(self, attempts=RETELL_RETRY_ATTEMPTS, base=RETELL_RETRY_BASE,
+                 max_delay=RETELL_RETRY_MAX_DELAY, budget=RETELL_RETRY_BUDGET,
+                 status_codes=RETELL_RETRY_STATUS_CODES, idempotent_endpoints=RETELL_IDEMPOTENT_ENDPOINTS,
+                 retry_after_status_codes=RETELL_RETRY_AFTER_STATUS_CODES):
+        self.attempts = attempts
+        self.base = base
+        self.max_delay = max_delay
+        self.budget = budget
+        self.status_codes = status_codes
+        self.idempotent_endpoints = idempotent_endpoints
+        self.retry_after_status_codes = retry_after_status_codes
+
+    def retries_error(self, endpoint, connect_failed):
+        """Whether a call that raised may be sent again (connect_failed: it never reached the server)"""
+        return connect_failed or endpoint in self.idempotent_endpoints
+
+    def retries_status(self, endpoint, status_code, retry_after=None):
+        """Whether a call answered with status_code may be sent again"""
+        if status_code not in self.status_codes:
+            return False
+        if endpoint in self.idempotent_endpoints:
+            return True
+        return status_code in self.retry_after_status_codes and retry_after is not None
+
+    def delay(self, attempt, started, retry_after=None):
+        """
+        Seconds to wait before retrying after the given failed attempt, or None to give up
+
+        A Retry-After header is honored as sent; otherwise the delay doubles per
+        attempt, with jitter so workers that failed together don't retry together.
+        No retry starts once the call has spent its budget, counted from started,
+        or when the wait would outlast the current provisioning deadline.
+        """
+        if attempt >= self.attempts:
+            return None
+        delay = retry_after_seconds(retry_after)
+        if delay is None:
+            delay = min(self.max_delay, self.base * 2 ** (attempt - 1))
+            delay = random.uniform(delay / 2, delay)
+        if time.monotonic() - started + delay > self.budget:
+            return None
+        deadline = current_deadline()
+        if deadline is not None and delay >= deadline.remaining():
+            return None
+        return delay
+
+
+def connect_failed(error):
+    """Whether a requests exception was raised before the request reached the server"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        # Resets after sending show up as ProtocolError; only a failed connect is safe
+        reason = getattr(error.args[0], 'reason', error.args[0])
+        return isinstance(reason, (urllib3.exceptions.NewConnectionError, urllib3.exceptions.ConnectTimeoutError))
+    return False
+
+
+def log_retry(endpoint, reason, delay, attempt, attempts):
+    """Announce a retry of a failed call"""
+    print(f"   🔁 '{endpoint}' call {reason}; retrying in {delay:.1f}s (attempt {attempt + 1}/{attempts})")
+
+
+class RetellClient:
+    """
+    Pooled HTTP client shared by every provisioning module
+
+    One requests.Session holds keep-alive connections per host, so consecutive
+    calls reuse an open TLS connection instead of paying a new handshake each.
+    Auth headers are built once and each endpoint has its own (connect, read) timeout.
+    Calls wait for the endpoint's rate limit (see agent_system.rate_limiter) before
+    they are sent, and transient failures are retried (see RetryPolicy). Inside a
+    provisioning step with a deadline, timeouts are cut to the time left. Calls to
+    a host whose circuit is open fail at once (see agent_system.circuit_breaker).
+    """
+
+    def __init__(self, api_token=RETELL_API_TOKEN, org_id=ORG_ID, pool_maxsize=HTTP_POOL_MAXSIZE,
+                 retry_policy=None):
+        self.auth_headers = build_auth_headers(api_token, org_id)
+        self.urls = dict(ENDPOINT_URLS)
+        self.timeouts = dict(HTTP_TIMEOUTS)
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def post(self, endpoint, json=None, data=None, headers=None, authenticated=True, timeout=None):
+        """
+        POST to a named endpoint (a key of ENDPOINT_URLS)
+
+        Args:
+            endpoint (str): Endpoint name, e.g. 'llm' or 'dashboard_register'
+            json / data: Request body, passed through to requests
+            headers (dict): Extra headers merged over the auth headers
+            authenticated (bool): Send the Retell auth headers (False for non-Retell hosts)
+            timeout: Override the endpoint's default (connect, read) timeout
+
+        Returns:
+            requests.Response: the first non-retryable response, or the last one
+            once retries run out
+
+        Raises:
+            requests.exceptions.ConnectionError / Timeout: when retries run out on them,
+                or at once when a create call may already have reached Retell
+            DeadlineExceeded: when the current deadline leaves no time for the call,
+                including its wait for the rate limit
+            CircuitOpen: when the endpoint's host is failing, before or between retries
+        """
+        request_headers = dict(self.auth_headers) if authenticated else {}
+        if headers:
+            request_headers.update(headers)
+
+        breaker = get_circuit_breaker(self.urls[endpoint])
+        deadline = current_deadline()
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            breaker.before_call()
+            try:
+                wait = reserve_call(endpoint)
+                if deadline is not None and wait >= deadline.remaining():
+                    raise DeadlineExceeded(deadline)
+                time.sleep(wait)
+                call_timeout = timeout or self.timeouts.get(endpoint, self.timeouts['default'])
+                if deadline is not None:
+                    call_timeout = deadline.timeout(call_timeout)
+                response = self.session.post(
+                    self.urls[endpoint],
+                    json=json,
+                    data=data,
+                    headers=request_headers,
+                    timeout=call_timeout
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                breaker.record_failure()
+                if not self.retry_policy.retries_error(endpoint, connect_failed(e)):
+                    raise
+                delay = self.retry_policy.delay(attempt, started)
+                if delay is None:
+                    raise
+                log_retry(endpoint, f"failed ({type(e).__name__})", delay, attempt, self.retry_policy.attempts)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                # Ended without an outcome for the host (e.g. DeadlineExceeded before sending)
+                breaker.release()
+                raise
+
+            breaker.record_response(response.status_code)
+            if response.status_code == 429:
+                record_throttled(endpoint, response.headers.get('Retry-After'))
+            retry_after = response.headers.get('Retry-After')
+            if not self.retry_policy.retries_status(endpoint, response.status_code, retry_after):
+                return response
+            delay = self.retry_policy.delay(attempt, started, retry_after)
+            if delay is None:
+                return response
+            log_retry(endpoint, f"returned {response.status_code}", delay, attempt, self.retry_policy.attempts)
+            response.close()
+            time.sleep(delay)
+
+    def warm(self, connections=HTTP_WARM_CONNECTIONS):
+        """
+        Open keep-alive connections to every upstream host ahead of the first real call
+
+        Sends `connections` concurrent HEAD requests per host; the responses are
+        ignored, only the pooled TLS connections they leave behind matter.
+        """
+        hosts = sorted({f"{urlsplit(url).scheme}://{urlsplit(url).netloc}/" for url in self.urls.values()})
+        threads = []
+        for host in hosts:
+            for _ in range(connections):
+                thread = threading.Thread(target=self._touch, args=(host,), daemon=True)
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+    def _touch(self, url):
+        try:
+            self.session.head(url, timeout=self.timeouts['default'], allow_redirects=False)
+        except requests.exceptions.RequestException:
+            pass
+
+    def close(self):
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_retell_client():
+    """Return the process-wide RetellClient, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = RetellClient()
+    return _client
+
+
+def warm_retell_client(background=True):
+    """Warm the shared client's connections, in a background thread by default"""
+    client = get_retell_client()
+    if background:
+        threading.Thread(target=client.warm, name="retell-warm", daemon=True).start()
+    else:
+        client.warm()
+    return client
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Step Graph Executor
+Run provisioning steps as a dependency graph on a bounded thread pool
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from .deadline import DeadlineExceeded, deadline_scope
+
+
+class StepGraphError(Exception):
+    """Invalid step graph definition"""
+    pass
+
+
+class Step:
+    """A single provisioning step with declared inputs and outputs"""
+
+    def __init__(self, name, func, inputs=(), outputs=(), defer_within=None):
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs) or (name,)
+        self.defer_within = defer_within
+
+    def bind_outputs(self, values, result):
+        """Store the step's return value under its declared output names"""
+        if len(self.outputs) == 1:
+            values[self.outputs[0]] = result
+            return
+
+        if not isinstance(result, dict):
+            raise StepGraphError(f"Step '{self.name}' must return a dict with keys {list(self.outputs)}")
+        for output in self.outputs:
+            if output not in result:
+                raise StepGraphError(f"Step '{self.name}' did not return output '{output}'")
+            values[output] = result[output]
+
+
+class StepGraph:
+    """
+    Dependency graph of steps
+
+    Each step declares the values it reads (inputs) and the values it produces
+    (outputs). A step starts as soon as every one of its inputs is available, so
+    independent steps run at the same time on a pool of at most max_workers threads.
+    run_async() does the same for coroutine steps on the running event loop.
+
+    Both accept an on_event callback, called with a dict when each step starts,
+    finishes or fails: step, phase ("started", "finished" or "failed"),
+    elapsed_ms since the graph started, plus duration_ms once the step ends and
+    the step's outputs when it finished. "started" may fire from worker threads,
+    so callbacks must be thread-safe.
+
+    Both also accept a checkpoint: output values saved from an earlier run. Steps
+    whose outputs are all in it, and whose dependencies were restored too, are
+    not run again; they report phase "skipped" with their restored outputs.
+
+    Given a Deadline (see agent_system.deadline), each step runs with it as the
+    current deadline, no step starts after it passes, and a step that fails
+    after it passed raises DeadlineExceeded naming the step. Steps added with
+    defer_within are not run when fewer seconds than that remain: their
+    outputs are None and they report phase "deferred".
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max_workers
+        self.steps = {}
+
+    def add_step(self, name, func, inputs=(), outputs=(), defer_within=None):
+        """Register a step; func is called with its inputs as keyword arguments"""
+        if name in self.steps:
+            raise StepGraphError(f"Duplicate step name: '{name}'")
+        self.steps[name] = Step(name, func, inputs, outputs, defer_within)
+        return self
+
+    def dependencies(self, initial_names=()):
+        """Map each step name to the set of step names it depends on"""
+        producers = {}
+        for step in self.steps.values():
+            for output in step.outputs:
+                if output in producers or output in initial_names:
+                    raise StepGraphError(f"Value '{output}' is produced more than once")
+                producers[output] = step.name
+
+        deps = {}
+        for step in self.steps.values():
+            deps[step.name] = set()
+            for name in step.inputs:
+                if name in producers:
+                    deps[step.name].add(producers[name])
+                elif name not in initial_names:
+                    raise StepGraphError(f"Step '{step.name}' needs '{name}' but nothing provides it")
+
+        # Reject cycles up front so run() can never stall
+        order = self._topological_order(deps)
+        if len(order) != len(deps):
+            raise StepGraphError("Step graph contains a cycle")
+
+        return deps
+
+    def _topological_order(self, deps):
+        order = []
+        placed = set()
+        pending = dict(deps)
+        while pending:
+            ready = [name for name, d in pending.items() if d <= placed]
+            if not ready:
+                break
+            for name in ready:
+                order.append(name)
+                placed.add(name)
+                del pending[name]
+        return order
+
+    def restorable(self, deps, checkpoint):
+        """Names of steps whose outputs are all in checkpoint and whose dependencies are restorable too"""
+        restored = set()
+        for name in self._topological_order(deps):
+            if deps[name] <= restored and all(output in checkpoint for output in self.steps[name].outputs):
+                restored.add(name)
+        return restored
+
+    def _restore(self, deps, checkpoint, values, pending, done, emit):
+        """Load checkpointed outputs into values and mark their steps done, in declaration order"""
+        restored = self.restorable(deps, checkpoint or {})
+        for name in [n for n in self.steps if n in restored]:
+            for output in self.steps[name].outputs:
+                values[output] = checkpoint[output]
+            del pending[name]
+            done.add(name)
+            emit(name, "skipped", values=values)
+        return restored
+
+    def run(self, initial=None, on_event=None, checkpoint=None, deadline=None):
+        """
+        Execute the graph
+
+        Returns:
+            tuple: (values, timing) where values holds the initial values plus every
+            step output, and timing holds per-step and critical-path timings in ms.
+
+        The first exception raised by a step is re-raised unchanged once the steps
+        already running have finished (their outcomes are still reported to
+        on_event); steps that have not started are cancelled.
+        """
+        values = dict(initial or {})
+        deps = self.dependencies(values.keys())
+        pending = {name: set(d) for name, d in deps.items()}
+        done = set()
+        running = {}
+        step_times = {}
+
+        graph_start = time.perf_counter()
+        emit = self._emitter(on_event, step_times, graph_start)
+        restored = self._restore(deps, checkpoint, values, pending, done, emit)
+
+        def call(step):
+            self._refuse_late_start(step, deadline)
+            started = time.perf_counter()
+            emit(step.name, "started", started)
+            try:
+                with deadline_scope(deadline):
+                    return step.func(**{name: values[name] for name in step.inputs})
+            except Exception as e:
+                raise self._deadline_error(step, deadline, e)
+            finally:
+                step_times[step.name] = (started, time.perf_counter())
+                self._note_overrun(step, deadline)
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="step")
+        try:
+            while pending or running:
+                # Submit every step whose dependencies are satisfied, in declaration order
+                for name in self._take_ready(pending, done, values, deadline, emit):
+                    running[pool.submit(call, self.steps[name])] = name
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        emit(name, "failed", error=error)
+                        # Report what the steps already running made before giving up
+                        for other in wait(running).done:
+                            self._settle(running.pop(other), other, values, done, emit)
+                        raise error
+                    self._settle(name, future, values, done, emit)
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        wall_ms = int((time.perf_counter() - graph_start) * 1000)
+        return values, self._timing(deps, step_times, graph_start, wall_ms, restored, deadline)
+
+    async def run_async(self, initial=None, on_event=None, checkpoint=None, deadline=None):
+        """
+        Execute a graph of coroutine steps on the running event loop
+
+        Same contract as run(); at most max_workers steps are awaited at once.
+        """
+        values = dict(initial or {})
+        deps = self.dependencies(values.keys())
+        pending = {name: set(d) for name, d in deps.items()}
+        done = set()
+        running = {}
+        step_times = {}
+        slots = asyncio.Semaphore(self.max_workers)
+
+        graph_start = time.perf_counter()
+        emit = self._emitter(on_event, step_times, graph_start)
+        restored = self._restore(deps, checkpoint, values, pending, done, emit)
+
+        async def call(step):
+            async with slots:
+                self._refuse_late_start(step, deadline)
+                started = time.perf_counter()
+                emit(step.name, "started", started)
+                try:
+                    with deadline_scope(deadline):
+                        return await step.func(**{name: values[name] for name in step.inputs})
+                except Exception as e:
+                    raise self._deadline_error(step, deadline, e)
+                finally:
+                    step_times[step.name] = (started, time.perf_counter())
+                    self._note_overrun(step, deadline)
+
+        try:
+            while pending or running:
+                for name in self._take_ready(pending, done, values, deadline, emit):
+                    running[asyncio.ensure_future(call(self.steps[name]))] = name
+                if not running:
+                    continue
+
+                finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    name = running.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        emit(name, "failed", error=error)
+                        if running:
+                            others, _ = await asyncio.wait(running)
+                            for other in others:
+                                self._settle(running.pop(other), other, values, done, emit)
+                        raise error
+                    self._settle(name, task, values, done, emit)
+        finally:
+            # Let steps that already started finish, matching run()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        wall_ms = int((time.perf_counter() - graph_start) * 1000)
+        return values, self._timing(deps, step_times, graph_start, wall_ms, restored, deadline)
+
+    def _take_ready(self, pending, done, values, deadline, emit):
+        """
+        Take the steps whose dependencies are satisfied off pending, in declaration order
+
+        Deferrable steps short of time are completed on the spot with None outputs,
+        which may make more steps ready.
+        """
+        ready = []
+        while True:
+            names = [n for n in self.steps if n in pending and pending[n] <= done]
+            if not names:
+                return ready
+            for name in names:
+                del pending[name]
+                step = self.steps[name]
+                if deadline is None or step.defer_within is None or deadline.remaining() >= step.defer_within:
+                    ready.append(name)
+                    continue
+                for output in step.outputs:
+                    values[output] = None
+                done.add(name)
+                deadline.defer(name)
+                emit(name, "deferred", values=values)
+
+    def _refuse_late_start(self, step, deadline):
+        """Raise DeadlineExceeded instead of starting a step after the deadline passed"""
+        if deadline is None or not deadline.expired():
+            return
+        if deadline.overran:
+            raise DeadlineExceeded(deadline, deadline.overran[0])
+        raise DeadlineExceeded(deadline, step.name, started=False)
+
+    def _deadline_error(self, step, deadline, error):
+        """The error to raise for a failed step: DeadlineExceeded naming it if time ran out"""
+        if deadline is None or not deadline.expired() or (isinstance(error, DeadlineExceeded) and error.step):
+            return error
+        named = DeadlineExceeded(deadline, step.name)
+        named.__cause__ = error
+        return named
+
+    def _note_overrun(self, step, deadline):
+        """Remember a step that was still running when the deadline passed"""
+        if deadline is not None and deadline.expired():
+            deadline.overran_in(step.name)
+
+    def _settle(self, name, future, values, done, emit):
+        """Record a finished step's outputs, or report its failure"""
+        error = future.exception()
+        if error is not None:
+            emit(name, "failed", error=error)
+            return
+        self.steps[name].bind_outputs(values, future.result())
+        done.add(name)
+        emit(name, "finished", values=values)
+
+    def _emitter(self, on_event, step_times, graph_start):
+        """Build the emit(name, phase, ...) helper shared by run() and run_async()"""
+        def emit(name, phase, started=None, values=None, error=None):
+            if on_event is None:
+                return
+            event = {"step": name, "phase": phase}
+            if phase == "started":
+                event["elapsed_ms"] = int((started - graph_start) * 1000)
+            elif phase in ("skipped", "deferred"):
+                event["elapsed_ms"] = int((time.perf_counter() - graph_start) * 1000)
+            else:
+                # A step refused for lack of time fails without ever starting
+                now = time.perf_counter()
+                step_started, step_finished = step_times.get(name, (now, now))
+                event["elapsed_ms"] = int((step_finished - graph_start) * 1000)
+                event["duration_ms"] = int((step_finished - step_started) * 1000)
+            if values is not None:
+                event["outputs"] = {output: values[output] for output in self.steps[name].outputs}
+            if error is not None:
+                event["error"] = str(error)
+            try:
+                on_event(event)
+            except Exception as e:
+                # Progress reporting must never break provisioning
+                print(f"⚠️  Step event callback failed for '{name}': {e}")
+        return emit
+
+    def _timing(self, deps, step_times, graph_start, wall_ms, restored=(), deadline=None):
+        """Per-step timings plus the longest dependency chain by duration"""
+        steps = {}
+        for name, (started, finished) in step_times.items():
+            steps[name] = {
+                "started_ms": int((started - graph_start) * 1000),
+                "finished_ms": int((finished - graph_start) * 1000),
+                "duration_ms": int((finished - started) * 1000)
+            }
+
+        # Longest path through the DAG, weighted by each step's duration
+        path_ms = {}
+        previous = {}
+        for name in self._topological_order(deps):
+            if name not in steps:
+                continue
+            best = max((d for d in deps[name] if d in path_ms), key=lambda d: path_ms[d], default=None)
+            path_ms[name] = steps[name]["duration_ms"] + (path_ms[best] if best else 0)
+            previous[name] = best
+
+        critical_path = []
+        node = max(path_ms, key=lambda n: path_ms[n], default=None)
+        critical_path_ms = path_ms.get(node, 0)
+        while node:
+            critical_path.insert(0, node)
+            node = previous[node]
+
+        return {
+            "wall_ms": wall_ms,
+            "serial_ms": sum(step["duration_ms"] for step in steps.values()),
+            "critical_path": critical_path,
+            "critical_path_ms": critical_path_ms,
+            "steps": steps,
+            "skipped": [name for name in self.steps if name in restored],
+            "deferred": [name for name in self.steps if deadline is not None and name in deadline.deferred]
+        }
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Prompt Templates
+Compile prompt template files once and render them in a single pass
+"""
+
+import os
+import re
+import threading
+
+from .config import TEMPLATE_FILES
+
+# Template placeholders and the company_data key that fills each one
+TEMPLATE_VARIABLES = {
+    'Company_Name': 'company_name',
+    'Assistant_Name': 'assistant_name',
+    'Time_Zone': 'time_zone',
+    'Time_Place': 'time_place',
+    'Business_Hours': 'business_hours',
+    'Office_Address': 'office_address'
+}
+
+# Innermost {{Name}} tokens only. Retell runtime variables such as
+# {{current_time_America/{{Time_Place}}}} contain '/', so only their inner
+# {{Time_Place}} is substituted and the outer braces pass through untouched.
+PLACEHOLDER_PATTERN = re.compile(r'\{\{([A-Za-z][A-Za-z0-9_]*)\}\}')
+
+
+class TemplateError(Exception):
+    """A template could not be rendered"""
+    pass
+
+
+class CompiledTemplate:
+    """
+    A template split into literal text and placeholder names
+
+    parts alternates literal, name, literal, ..., literal, so rendering is a
+    single join instead of one str.replace pass per placeholder.
+    """
+
+    def __init__(self, name, text):
+        self.name = name
+        self.parts = PLACEHOLDER_PATTERN.split(text)
+        self.placeholders = frozenset(self.parts[1::2])
+        self.unknown_placeholders = sorted(self.placeholders - TEMPLATE_VARIABLES.keys())
+
+    def render(self, company_data):
+        """Fill known placeholders from company_data; unknown ones are left as written"""
+        values = {}
+        missing = []
+        for placeholder in self.placeholders:
+            key = TEMPLATE_VARIABLES.get(placeholder)
+            if key is None:
+                values[placeholder] = f"{{{{{placeholder}}}}}"
+            elif company_data.get(key) is None:
+                missing.append(f"{placeholder} ({key})")
+            else:
+                values[placeholder] = str(company_data[key])
+
+        if missing:
+            raise TemplateError(f"Template '{self.name}' is missing values for: {', '.join(sorted(missing))}")
+
+        return "".join(values[part] if index % 2 else part for index, part in enumerate(self.parts))
+
+
+class TemplateCache:
+    """Compiled templates keyed by path, recompiled only when the file's mtime or size changes"""
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def get(self, name, path):
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        cached = self._templates.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        with self._lock:
+            cached = self._templates.get(path)
+            if cached and cached[0] == version:
+                return cached[1]
+
+            with open(path, 'r', encoding='utf-8') as f:
+                template = CompiledTemplate(name, f.read())
+            if template.unknown_placeholders:
+                print(f"⚠️  Template '{name}' has unknown placeholders left as-is: "
+                      f"{', '.join(template.unknown_placeholders)}")
+            self._templates[path] = (version, template)
+            return template
+
+
+_cache = TemplateCache()
+
+
+def load_template(name):
+    """Return the compiled template for a TEMPLATE_FILES key"""
+    return _cache.get(name, TEMPLATE_FILES[name])
+
+
+def render_template(name, company_data):
+    """Render a TEMPLATE_FILES template with company-specific data"""
+    return load_template(name).render(company_data)
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Tenant Import / Export
+Move tenant configuration (companies with their agent config and prompts) in bulk with COPY
+
+Usage:
+    python -m agent_system.tenant_transfer export tenants.jsonl
+    python -m agent_system.tenant_transfer import tenants.jsonl --on-conflict update
+
+Each tenant is one flat record: the company's columns, its latest agent config
+and its prompts (see TENANT_FIELDS). Export streams COPY output straight to a
+.jsonl or .csv file. Import reads the file in chunks, COPYs each chunk into a
+temporary staging table and merges it into the three tables with one statement,
+matching tenants by company_name. Both run in constant memory.
+"""
+
+import argparse
+import io
+import json
+import time
+
+from .config import TENANT_IMPORT_CHUNK_SIZE
+from .database import get_db_connection
+from .bulk_onboarding import iter_company_records
+
+# (field, Postgres type) per table; company id and timestamps are handled separately
+COMPANY_FIELDS = (
+    ("company_name", "text"), ("office_address", "text"), ("business_hours", "jsonb"),
+    ("contact_number", "text"), ("area_code", "text"), ("website_url", "text"), ("time_zone", "text"),
+    ("knowledge_base_id", "text"), ("needs_prompt_regeneration", "boolean"),
+    ("post_call_summary_sms", "boolean"), ("post_call_summary_email", "boolean"),
+    ("summary_sms_number", "text"), ("summary_email_address", "text")
+)
+
+AGENT_CONFIG_FIELDS = (
+    ("llm_id_oh", "text"), ("llm_id_ah", "text"), ("agent_id_oh", "text"), ("agent_id_ah", "text"),
+    ("agent_id_mr", "text"), ("conversation_flow_id", "text"), ("retell_phone_number", "text"),
+    ("retell_phone_number_id", "text"), ("dashboard_email", "text"), ("dashboard_password", "text"),
+    ("status", "text")
+)
+
+PROMPTS_FIELDS = (
+    ("global_prompt", "text"), ("office_hours_prompt", "text"), ("after_hours_prompt", "text")
+)
+
+TENANT_FIELDS = (
+    (("id", "uuid"),) + COMPANY_FIELDS + (("created_at", "timestamp"), ("updated_at", "timestamp"))
+    + AGENT_CONFIG_FIELDS + PROMPTS_FIELDS
+)
+
+EXPORT_SQL = """
+    SELECT c.id, {company}, c.created_at, c.updated_at, {agent_config}, {prompts}
+    FROM companies c
+    LEFT JOIN LATERAL (
+        SELECT * FROM company_agent_configs
+        WHERE company_id = c.id
+        ORDER BY updated_at DESC NULLS LAST
+        LIMIT 1
+    ) ac ON true
+    LEFT JOIN company_prompts cp ON cp.company_id = c.id
+    ORDER BY c.company_name
+""".format(
+    company=", ".join(f"c.{name}" for name, _ in COMPANY_FIELDS),
+    agent_config=", ".join(f"ac.{name}" for name, _ in AGENT_CONFIG_FIELDS),
+    prompts=", ".join(f"cp.{name}" for name, _ in PROMPTS_FIELDS)
+)
+
+STAGING_TABLE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS tenant_import (
+        line bigint,
+        {columns}
+    ) ON COMMIT DELETE ROWS
+""".format(columns=",\n        ".join(f"{name} {pg_type}" for name, pg_type in TENANT_FIELDS))
+
+CONFLICT_MODES = ('skip', 'update', 'error')
+
+
+def merge_sql(on_conflict):
+    """
+    One statement merging the staged chunk into companies, company_agent_configs and company_prompts
+
+    on_conflict decides what happens to a tenant whose company_name exists:
+    'skip' leaves it alone, 'update' overwrites it, 'error' fails the import.
+    Returns one row: (staged, inserted, updated).
+    """
+    company_names = [name for name, _ in COMPANY_FIELDS]
+    config_names = [name for name, _ in AGENT_CONFIG_FIELDS]
+    prompt_names = [name for name, _ in PROMPTS_FIELDS]
+    conflict = {
+        'skip': "ON CONFLICT (company_name) DO NOTHING",
+        'update': "ON CONFLICT (company_name) DO UPDATE SET "
+                  + ", ".join(f"{name} = EXCLUDED.{name}" for name in company_names if name != 'company_name')
+                  + ", updated_at = now()",
+        'error': ""
+    }[on_conflict]
+
+    return f"""
+        WITH staged AS (
+            -- The last record wins when a chunk names a company twice
+            SELECT DISTINCT ON (company_name) * FROM tenant_import ORDER BY company_name, line DESC
+        ), company AS (
+            INSERT INTO companies (id, {', '.join(company_names)}, created_at, updated_at)
+            SELECT CASE WHEN s.id IS NULL OR EXISTS (SELECT 1 FROM companies WHERE id = s.id)
+                        THEN uuid_generate_v7() ELSE s.id END,
+                   {', '.join(f's.{name}' for name in company_names)},
+                   coalesce(s.created_at, now()), now()
+            FROM staged s
+            {conflict}
+            RETURNING id, company_name, (xmax = 0) AS inserted
+        ), config_update AS (
+            UPDATE company_agent_configs ac
+            SET {', '.join(f'{name} = s.{name}' for name in config_names)}, updated_at = now()
+            FROM company JOIN staged s USING (company_name)
+            WHERE ac.company_id = company.id AND s.status IS NOT NULL
+        ), config_insert AS (
+            INSERT INTO company_agent_configs (company_id, {', '.join(config_names)}, created_at, updated_at)
+            SELECT company.id, {', '.join(f's.{name}' for name in config_names)}, now(), now()
+            FROM company JOIN staged s USING (company_name)
+            WHERE s.status IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM company_agent_configs ac WHERE ac.company_id = company.id)
+        ), prompts AS (
+            INSERT INTO company_prompts (company_id, {', '.join(prompt_names)}, created_at, updated_at)
+            SELECT company.id, {', '.join(f's.{name}' for name in prompt_names)}, now(), now()
+            FROM company JOIN staged s USING (company_name)
+            WHERE s.global_prompt IS NOT NULL
+            ON CONFLICT (company_id) DO UPDATE SET
+                {', '.join(f'{name} = EXCLUDED.{name}' for name in prompt_names)}, updated_at = now()
+        )
+        SELECT (SELECT count(*) FROM staged),
+               count(*) FILTER (WHERE inserted),
+               count(*) FILTER (WHERE NOT inserted)
+        FROM company
+    """
+
+
+class JsonLinesWriter:
+    """
+    File-like COPY TO target turning text-format rows of row_to_json into JSON lines
+
+    JSON escapes every control character, so the only COPY escaping left in a
+    row is doubled backslashes; complete lines are unescaped and written out.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.rows = 0
+        self._partial = b''
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        lines = (self._partial + data).split(b'\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.out.write(line.replace(b'\\\\', b'\\') + b'\n')
+        self.rows += len(lines)
+
+
+def export_tenants(path):
+    """
+    Write every tenant to path (.csv with a header row, or .jsonl) with COPY
+
+    Returns:
+        int: tenants written
+    """
+    as_csv = path.lower().endswith('.csv')
+    started = time.perf_counter()
+    print(f"📤 Exporting tenants to {path}")
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur, open(path, 'wb') as f:
+            if as_csv:
+                cur.copy_expert(f"COPY ({EXPORT_SQL}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+                rows = cur.rowcount
+            else:
+                writer = JsonLinesWriter(f)
+                cur.copy_expert(f"COPY (SELECT row_to_json(tenant) FROM ({EXPORT_SQL}) tenant) TO STDOUT", writer)
+                rows = writer.rows
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"✅ Exported {rows} tenants in {time.perf_counter() - started:.1f}s")
+    return rows
+
+
+def copy_text_value(value, from_csv=False):
+    """A record value in COPY text format (NULL is \\N; CSV's empty fields count as NULL)"""
+    if value is None or (from_csv and value == ''):
+        return r'\N'
+    if isinstance(value, bool):
+        value = 't' if value else 'f'
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def import_chunk(conn, records, on_conflict, from_csv=False):
+    """COPY (line, record) pairs into the staging table and merge them; returns (staged, inserted, updated)"""
+    buffer = io.StringIO()
+    for line, record in records:
+        buffer.write('\t'.join(
+            [str(line)] + [copy_text_value(record.get(name), from_csv) for name, _ in TENANT_FIELDS]
+        ) + '\n')
+    buffer.seek(0)
+
+    try:
+        with conn.cursor() as cur:
+            cur.execute(STAGING_TABLE_SQL)
+            cur.copy_expert(
+                f"COPY tenant_import (line, {', '.join(name for name, _ in TENANT_FIELDS)}) FROM STDIN", buffer
+            )
+            cur.execute(merge_sql(on_conflict))
+            result = cur.fetchone()
+        conn.commit()
+        return result
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def import_tenants(path, on_conflict='skip', chunk_size=TENANT_IMPORT_CHUNK_SIZE):
+    """
+    Load tenants from a .csv or .jsonl export into the database, chunk_size records per transaction
+
+    Tenants are matched by company_name; see merge_sql for on_conflict. Records
+    without a company_name are skipped as invalid. A failing chunk stops the
+    import; the chunks before it stay committed, so a rerun with 'skip' or
+    'update' picks up where it stopped.
+
+    Returns:
+        dict: counts of inserted, updated, skipped and invalid tenants
+    """
+    if on_conflict not in CONFLICT_MODES:
+        raise ValueError(f"on_conflict must be one of {', '.join(CONFLICT_MODES)}")
+    from_csv = path.lower().endswith('.csv')
+    summary = {"inserted": 0, "updated": 0, "skipped": 0, "invalid": 0}
+    started = time.perf_counter()
+    print(f"📥 Importing tenants from {path} ({chunk_size} per chunk, on conflict: {on_conflict})")
+
+    conn = get_db_connection()
+    try:
+        chunk = []
+
+        def flush():
+            staged, inserted, updated = import_chunk(conn, chunk, on_conflict, from_csv)
+            summary["inserted"] += inserted
+            summary["updated"] += updated
+            summary["skipped"] += len(chunk) - inserted - updated
+            print(f"   … {chunk[-1][0]} records read: {summary['inserted']} inserted, "
+                  f"{summary['updated']} updated, {summary['skipped']} skipped")
+            chunk.clear()
+
+        for line, record in iter_company_records(path):
+            if '_parse_error' in record or not (record.get('company_name') or '').strip():
+                summary["invalid"] += 1
+                print(f"⚠️  Record {line}: {record.get('_parse_error', 'missing company_name')}")
+                continue
+            chunk.append((line, record))
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+    finally:
+        conn.close()
+
+    print(f"✅ Imported tenants in {time.perf_counter() - started:.1f}s: {summary['inserted']} inserted, "
+          f"{summary['updated']} updated, {summary['skipped']} skipped, {summary['invalid']} invalid")
+    return summary
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Bulk export or import tenant configuration with COPY")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="write every tenant to a file")
+    export_parser.add_argument("output", help=".jsonl or .csv file to write")
+
+    import_parser = commands.add_parser("import", help="load tenants from an export file")
+    import_parser.add_argument("input", help=".jsonl or .csv file written by export")
+    import_parser.add_argument("--on-conflict", choices=CONFLICT_MODES, default='skip',
+                               help="what to do with tenants whose company_name exists (default skip)")
+    import_parser.add_argument("--chunk-size", type=int, default=TENANT_IMPORT_CHUNK_SIZE,
+                               help=f"records per transaction (default {TENANT_IMPORT_CHUNK_SIZE})")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_tenants(args.output)
+        return 0
+    summary = import_tenants(args.input, args.on_conflict, args.chunk_size)
+    return 0 if summary['invalid'] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
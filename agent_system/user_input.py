@@ -92,4 +92,171 @@ def collect_user_input():
         'post_call_summary_email': post_call_summary_email,
         'summary_sms_number': summary_sms_number,
         'summary_email_address': summary_email_address
-    }
\ No newline at end of file
+    }
+
+def parse_yes_no(value):
+    """Interpret y/yes/true/1 (any case) as True; anything else as False"""
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('y', 'yes', 'true', '1')
+
+
+def resolve_time_zone(value):
+    """Map a menu number, place name or zone label to (time_place, time_zone)"""
+    value = str(value or '').strip()
+    if value in TIMEZONE_OPTIONS:
+        return TIMEZONE_OPTIONS[value]
+    
+    normalized = value.lower().replace(' ', '_')
+    for place, zone in TIMEZONE_OPTIONS.values():
+        if normalized in (place.lower(), zone.lower().replace(' ', '_'), f"america/{place.lower()}"):
+            return place, zone
+    return None
+
+
+def build_company_data(record):
+    """
+    Validate a non-interactive company record and build company_data
+    
+    Accepts the same fields collect_user_input() asks for; time_zone may be a
+    menu number (1-4), a place name (New_York) or a zone label (Eastern Time).
+    
+    Raises:
+        ValueError: listing every invalid or missing field
+    """
+    errors = []
+    
+    def field(name):
+        value = record.get(name)
+        return value.strip() if isinstance(value, str) else value
+    
+    company_name = field('company_name')
+    if not company_name:
+        errors.append("company_name is required")
+    
+    website_url = field('website_url')
+    if not website_url:
+        errors.append("website_url is required")
+    elif not website_url.startswith(('http://', 'https://')):
+        website_url = 'https://' + website_url
+    
+    time_zone_option = resolve_time_zone(field('time_zone') or field('time_place'))
+    if not time_zone_option:
+        errors.append(f"time_zone '{field('time_zone') or ''}' is not one of {[p for p, _ in TIMEZONE_OPTIONS.values()]}")
+    
+    contact_number = validate_us_canada_phone(str(field('contact_number') or ''))
+    area_code = extract_area_code(contact_number) if contact_number else None
+    if not contact_number or not area_code:
+        errors.append(f"contact_number '{field('contact_number') or ''}' is not a valid US/Canada phone number")
+    
+    post_call_summary_sms = parse_yes_no(field('post_call_summary_sms'))
+    summary_sms_number = None
+    if post_call_summary_sms:
+        summary_sms_number = validate_us_canada_phone(str(field('summary_sms_number') or ''))
+        if not summary_sms_number:
+            errors.append("summary_sms_number must be a valid US/Canada phone number when post_call_summary_sms is set")
+    
+    post_call_summary_email = parse_yes_no(field('post_call_summary_email'))
+    summary_email_address = None
+    if post_call_summary_email:
+        summary_email_address = field('summary_email_address')
+        if not summary_email_address or not validate_email_format(summary_email_address):
+            errors.append("summary_email_address must be a valid email when post_call_summary_email is set")
+    
+    if errors:
+        raise ValueError("; ".join(errors))
+    
+    time_place, time_zone = time_zone_option
+    return {
+        'company_name': company_name,
+        'office_address': field('office_address') or '',
+        'time_place': time_place,
+        'time_zone': time_zone,
+        'business_hours': field('business_hours') or '',
+        'contact_number': contact_number,
+        'area_code': area_code,
+        'website_url': website_url,
+        'assistant_name': field('assistant_name') or "Clara",
+        'post_call_summary_sms': post_call_summary_sms,
+        'post_call_summary_email': post_call_summary_email,
+        'summary_sms_number': summary_sms_number,
+        'summary_email_address': summary_email_address
+    }
+
+
+def transform_form_data(form_data):
+    """Transform web form data to agent system format"""
+
+    # Support both camelCase and snake_case field names
+    company_name = form_data.get('companyName') or form_data.get('company_name', '')
+    office_address = form_data.get('officeAddress') or form_data.get('business_address', '')
+    contact_number = form_data.get('contactNumber') or form_data.get('primary_phone_number', '')
+    time_zone = form_data.get('timeZone') or form_data.get('timezone', 'Eastern')
+    assistant_name = form_data.get('assistantName') or form_data.get('assistant_name', 'Clara')
+
+    # Extract website URL from websites array or use first one
+    website_url = form_data.get('websiteUrl') or form_data.get('website_url', '')
+    websites = form_data.get('websites', [])
+    if not website_url and websites:
+        website_url = websites[0]
+
+    # Parse area code from contact number
+    area_code = form_data.get('preferred_area_code') or extract_form_area_code(contact_number)
+
+    # Transform business days and hours
+    business_days = form_data.get('businessDays', [])
+    if isinstance(business_days, list):
+        business_days_str = ', '.join(business_days)
+    else:
+        business_days_str = str(business_days)
+
+    business_hours = form_data.get('businessHours') or form_data.get('business_hours', '')
+
+    # Map timezone to time_place for Retell API
+    timezone_mapping = {
+        'Eastern': 'New_York',
+        'Central': 'Chicago', 
+        'Mountain': 'Denver',
+        'Pacific': 'Los_Angeles',
+        'Alaska': 'Anchorage',
+        'Hawaii': 'Honolulu'
+    }
+
+    time_place = timezone_mapping.get(time_zone, 'New_York')
+
+    return {
+        'company_name': company_name,
+        'office_address': office_address,
+        'website_url': website_url,
+        'websites': websites,
+        'time_zone': time_zone,
+        'time_place': time_place,
+        'business_days': business_days_str,
+        'start_time': form_data.get('startTime', '09:00'),
+        'end_time': form_data.get('endTime', '17:00'),
+        'business_hours': business_hours,
+        'contact_number': contact_number,
+        'area_code': area_code,
+        'assistant_name': assistant_name,
+        'post_call_summary_sms': form_data.get('postCallSummarySMS', False),
+        'post_call_summary_email': form_data.get('postCallSummaryEmail', False),
+        'summary_sms_number': form_data.get('smsNumbers', [None])[0] if form_data.get('smsNumbers') else None,
+        'summary_email_address': form_data.get('primaryEmail', ''),
+        'primary_email': form_data.get('primaryEmail', ''),
+        'cc_emails': form_data.get('ccEmails', []),
+        'sms_numbers': form_data.get('smsNumbers', []),
+        'uploaded_files': form_data.get('uploadedFiles', [])
+    }
+
+
+def extract_form_area_code(phone_number):
+    """Area code from a web form phone number, or 555 if it has no usable one"""
+    digits = ''.join(filter(str.isdigit, phone_number))
+
+    if len(digits) >= 10:
+        if len(digits) == 11 and digits.startswith('1'):
+            return digits[1:4]
+        elif len(digits) == 10:
+            return digits[:3]
+
+    return '555'
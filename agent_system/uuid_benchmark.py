@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+UUID Primary Key Benchmark
+Compare insert throughput and index size of random (v4) and time-ordered (v7) keys
+
+Usage:
+    python -m agent_system.uuid_benchmark
+    python -m agent_system.uuid_benchmark --rows 1000000 --batch-size 10000
+
+Each key kind gets its own scratch table shaped like companies (uuid primary key,
+a unique text column, a timestamp). Rows are COPYed in batches with keys generated
+in Python, the way save_company_data makes them, one commit per batch. The report
+gives the overall rate, the rate over the last tenth of the rows (once the index
+has outgrown the cache, where random keys hurt most) and the size of the primary
+key index. The scratch tables are dropped afterwards unless --keep is given.
+"""
+
+import argparse
+import io
+import time
+import uuid
+
+from .database import get_db_connection, uuid7
+
+KEY_GENERATORS = {
+    'v4': uuid.uuid4,
+    'v7': uuid7
+}
+
+TABLE_SQL = """
+    DROP TABLE IF EXISTS {table};
+    CREATE TABLE {table} (
+        id uuid NOT NULL,
+        company_name text NOT NULL,
+        created_at timestamp without time zone DEFAULT now(),
+        CONSTRAINT {table}_pkey PRIMARY KEY (id),
+        CONSTRAINT {table}_company_name_key UNIQUE (company_name)
+    )
+"""
+
+
+def run_benchmark(kind, rows, batch_size, keep=False):
+    """
+    Insert rows with keys of one kind into a fresh scratch table
+
+    Returns:
+        dict: kind, rows, seconds, rows_per_second, tail_rows_per_second,
+              index_bytes and table_bytes
+    """
+    table = f"uuid_benchmark_{kind}"
+    new_key = KEY_GENERATORS[kind]
+    tail_start = rows - max(rows // 10, 1)
+    elapsed = tail_elapsed = 0.0
+    tail_rows = 0
+
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(TABLE_SQL.format(table=table))
+            conn.commit()
+
+            for start in range(0, rows, batch_size):
+                count = min(batch_size, rows - start)
+                buffer = io.StringIO()
+                for n in range(start, start + count):
+                    buffer.write(f"{new_key()}\tcompany {n}\n")
+                buffer.seek(0)
+
+                started = time.perf_counter()
+                cur.copy_expert(f"COPY {table} (id, company_name) FROM STDIN", buffer)
+                conn.commit()
+                seconds = time.perf_counter() - started
+                elapsed += seconds
+                if start >= tail_start:
+                    tail_elapsed += seconds
+                    tail_rows += count
+
+            cur.execute("SELECT pg_relation_size(%s), pg_relation_size(%s)", (f"{table}_pkey", table))
+            index_bytes, table_bytes = cur.fetchone()
+            if not keep:
+                cur.execute(f"DROP TABLE {table}")
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        "kind": kind,
+        "rows": rows,
+        "seconds": elapsed,
+        "rows_per_second": rows / elapsed if elapsed else 0.0,
+        "tail_rows_per_second": tail_rows / tail_elapsed if tail_elapsed else 0.0,
+        "index_bytes": index_bytes,
+        "table_bytes": table_bytes
+    }
+
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compare UUIDv4 and UUIDv7 primary key insert performance")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows per key kind (default 1000000)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="rows per COPY and commit (default 10000)")
+    parser.add_argument("--keep", action="store_true", help="leave the scratch tables in place")
+    args = parser.parse_args()
+
+    print(f"🧪 Inserting {args.rows} rows per key kind, {args.batch_size} per batch")
+    results = []
+    for kind in KEY_GENERATORS:
+        result = run_benchmark(kind, args.rows, args.batch_size, args.keep)
+        results.append(result)
+        print(f"   {kind}: {result['seconds']:.1f}s, {result['rows_per_second']:,.0f} rows/s "
+              f"(last 10%: {result['tail_rows_per_second']:,.0f} rows/s), "
+              f"primary key index {result['index_bytes'] / 1024 / 1024:.1f} MB")
+
+    v4, v7 = results
+    if v4['rows_per_second'] and v4['index_bytes']:
+        speed = v7['rows_per_second'] / v4['rows_per_second']
+        size = v7['index_bytes'] / v4['index_bytes']
+        icon = "✅" if speed >= 1 and size <= 1 else "⚠️ "
+        print(f"{icon} v7 vs v4: {speed:.2f}x the insert rate, {size:.2f}x the primary key index size")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
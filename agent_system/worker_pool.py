@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Bounded Worker Pool
+Run provisioning jobs on a fixed number of threads behind a bounded queue
+"""
+
+import math
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .config import LOCAL_SERVER_WORKERS, LOCAL_SERVER_MAX_QUEUE, LOCAL_SERVER_RETRY_AFTER
+
+
+class QueueFull(Exception):
+    """The pool's queue is full; retry_after is a suggested wait in seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Provisioning queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class BoundedWorkerPool:
+    """
+    Fixed worker threads fed from a bounded queue
+
+    submit() never blocks: once max_queue jobs are waiting it raises QueueFull,
+    so a burst of requests is turned away instead of piling up threads and
+    upstream API calls.
+    """
+
+    def __init__(self, workers=LOCAL_SERVER_WORKERS, max_queue=LOCAL_SERVER_MAX_QUEUE, name="worker"):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._total_duration = 0.0
+
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{index}", daemon=True)
+            for index in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return a Future; raises QueueFull when full"""
+        future = Future()
+        try:
+            self._queue.put_nowait((future, func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                self._rejected += 1
+            raise QueueFull(self.retry_after())
+        return future
+
+    def _run(self):
+        while True:
+            future, func, args, kwargs = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                self._queue.task_done()
+                continue
+
+            with self._lock:
+                self._busy += 1
+            started = time.monotonic()
+            try:
+                future.set_result(func(*args, **kwargs))
+                failed = False
+            except BaseException as e:
+                future.set_exception(e)
+                failed = True
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._total_duration += time.monotonic() - started
+                    self._completed += 1
+                    self._failed += failed
+                self._queue.task_done()
+
+    def retry_after(self):
+        """Seconds until a queue slot is likely to free up, from the average job duration"""
+        with self._lock:
+            if not self._completed:
+                return LOCAL_SERVER_RETRY_AFTER
+            average = self._total_duration / self._completed
+        # Workers drain the queue in parallel, so one slot opens every average / workers seconds
+        return max(1, math.ceil(average / self.workers))
+
+    def stats(self):
+        """Queue depth, worker use and job counters"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "busy_workers": self._busy,
+                "idle_workers": self.workers - self._busy,
+                "queued": self._queue.qsize(),
+                "max_queue": self.max_queue,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "average_job_seconds": round(self._total_duration / self._completed, 1) if self._completed else None
+            }
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Area Code Index
+O(1) lookups of nearby North American area codes from a precomputed index
+
+_data/area_code_index.json is generated by `python -m agent_system.area_codes --rebuild`
+from agent_system/data/nanp_area_codes.csv; do not edit it by hand.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '_data', 'area_code_index.json')
+INDEX_FIELDS = ["region", "country", "time_zone", "nearby"]
+
+_codes: Optional[Dict[str, list]] = None
+
+
+def load_area_code_index() -> Dict[str, list]:
+    """Load the index once per function instance"""
+    global _codes
+    if _codes is None:
+        with open(INDEX_FILE, encoding='utf-8') as f:
+            _codes = json.load(f)["codes"]
+    return _codes
+
+
+def get_area_code_info(area_code: str) -> Optional[Dict]:
+    """Region, country, time zone and nearby codes for an area code, or None if unknown"""
+    entry = load_area_code_index().get(str(area_code))
+    if entry is None:
+        return None
+    return {"area_code": str(area_code), **dict(zip(INDEX_FIELDS, entry))}
+
+
+def get_nearby_area_codes(area_code: str, limit: int = 5) -> List[str]:
+    """Closest area codes to area_code, nearest first; empty if the code is unknown"""
+    entry = load_area_code_index().get(str(area_code))
+    return entry[3][:limit] if entry else []
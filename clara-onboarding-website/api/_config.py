@@ -32,6 +32,49 @@ class ProductionConfig:
             'password': self._get_optional_env('DB_PASSWORD', 'Admin123')
         }
         
+        # Connection pool reused across warm invocations of a function instance (see _database):
+        # connections kept open, the most open at once and seconds to wait for a free one;
+        # idle connections are checked with SELECT 1 after db_pool_check_after seconds and
+        # closed (down to the minimum) after db_pool_max_idle
+        self.db_pool_min_size = int(self._get_optional_env('DB_POOL_MIN_SIZE', '1'))
+        self.db_pool_max_size = int(self._get_optional_env('DB_POOL_MAX_SIZE', '4'))
+        self.db_pool_acquire_timeout = float(self._get_optional_env('DB_POOL_ACQUIRE_TIMEOUT', '10'))
+        self.db_pool_check_after = float(self._get_optional_env('DB_POOL_CHECK_AFTER', '30'))
+        self.db_pool_max_idle = float(self._get_optional_env('DB_POOL_MAX_IDLE', '300'))
+        
+        # In-process company cache (see _database.CompanyCache): seconds a company's configuration
+        # or completed status is reused, seconds a still-onboarding status is, and the most
+        # companies kept. Writes through DatabaseManager clear the company at once
+        self.company_cache_ttl = float(self._get_optional_env('COMPANY_CACHE_TTL', '60'))
+        self.company_status_pending_ttl = float(self._get_optional_env('COMPANY_STATUS_PENDING_TTL', '2'))
+        self.company_cache_max_entries = int(self._get_optional_env('COMPANY_CACHE_MAX_ENTRIES', '1000'))
+        
+        # Where create-agent.py sends jobs: 'direct' calls process-creation.py, 'postgres'
+        # queues them in provisioning_jobs for agent_system.provisioning_queue workers
+        self.provisioning_queue_backend = self._get_optional_env('PROVISIONING_QUEUE_BACKEND', 'direct').lower()
+        
+        # Creation IDs are an HMAC of the request's idempotency key (see _creation_jobs),
+        # so a job's ID can't be derived from company details alone
+        self.idempotency_secret = self._get_optional_env('IDEMPOTENCY_SECRET') or self.retell_api_token
+        
+        # Seconds a queued or in_progress creation job may go without an update before another
+        # request or process-creation invocation takes it over. Kept above the functions'
+        # maxDuration (300s in vercel.json), so only a job whose invocation died is taken over
+        self.creation_job_lease = float(self._get_optional_env('CREATION_JOB_LEASE', '330'))
+        
+        # Shared secret create-agent.py sends to process-creation.py, which runs jobs for no
+        # one else; set a dedicated one, or the idempotency secret is used
+        self.process_creation_secret = self._get_optional_env('PROCESS_CREATION_SECRET') or self.idempotency_secret
+        
+        # Seconds a job may stay queued before a status poll triggers process-creation.py
+        # again, in case create-agent.py's fire-and-forget trigger never arrived
+        self.creation_job_pickup_after = float(self._get_optional_env('CREATION_JOB_PICKUP_AFTER', '15'))
+        
+        # Status streams (creation-status/[creation_id]/events.py): seconds one stream stays
+        # open, kept under the function's maxDuration, and how often it re-reads the job
+        self.status_stream_timeout = int(self._get_optional_env('STATUS_STREAM_TIMEOUT', '25'))
+        self.status_stream_poll_interval = float(self._get_optional_env('STATUS_STREAM_POLL_INTERVAL', '1.0'))
+        
         # API URLs
         self.retell_urls = {
             'sitemap': "https://api.retellai.com/list-sitemap",
@@ -42,6 +85,17 @@ class ProductionConfig:
             'phone_number': "https://api.retellai.com/create-phone-number"
         }
         
+        # Retell (connect, read) timeouts in seconds, keyed by endpoint path
+        self.retell_timeouts = {
+            'default': (5, 30),
+            'list-sitemap': (5, 60),
+            'create-knowledge-base': (5, 60),
+            'create-retell-llm': (5, 30),
+            'create-agent': (5, 30),
+            'create-conversation-flow': (5, 30),
+            'create-phone-number': (5, 30)
+        }
+        
         # Voice Configuration Defaults
         self.voice_defaults = {
             'voice_id': '11labs-Rachel',
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Creation Job Store
+Agent creation jobs in the creation_jobs table, shared by every function instance
+
+create-agent.py enqueues a job once, process-creation.py claims and runs it (or,
+with PROVISIONING_QUEUE_BACKEND=postgres, agent_system.provisioning_queue workers
+do), and creation-status/[creation_id].py reads the stored progress, triggering
+process-creation.py again for a job left queued too long.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from _config import config
+from _database import db
+
+# Fields kept on the job but never returned to status polls
+PRIVATE_FIELDS = ('request', 'response')
+
+# Job statuses after which nothing changes
+FINAL_STATUSES = ('completed', 'error')
+
+# Longest Idempotency-Key header accepted
+MAX_KEY_LENGTH = 255
+
+# Header carrying config.process_creation_secret to process-creation.py
+PROCESS_SECRET_HEADER = 'X-Process-Creation-Secret'
+
+# The processor keeps running after this short read timeout gives up on its response
+PROCESS_TRIGGER_TIMEOUT = (3.05, 1)
+
+
+def idempotency_key(header_value: Optional[str], request_data: Dict) -> str:
+    """
+    The request's Idempotency-Key header, else a SHA-256 of its normalized data
+
+    Case and whitespace are folded away first, so a double-clicked submit and a
+    client retry of the same form map to the same key.
+    """
+    if header_value and header_value.strip():
+        key = header_value.strip()
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValueError(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters")
+        return f"header:{key}"
+
+    def normalize(value):
+        if isinstance(value, str):
+            return re.sub(r'\s+', ' ', value).strip().casefold()
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [normalize(v) for v in value]
+        return value
+
+    canonical = json.dumps(normalize(request_data), sort_keys=True, separators=(',', ':'))
+    return f"request:{hashlib.sha256(canonical.encode('utf-8')).hexdigest()}"
+
+
+def job_id_for_key(key: str, prefix: str = 'creation') -> str:
+    """Job ID for an idempotency key: the same key always maps to the same job"""
+    digest = hmac.new(config.idempotency_secret.encode('utf-8'), key.encode('utf-8'), hashlib.sha256).hexdigest()
+    return f"{prefix}_{digest[:32]}"
+
+
+class CreationJobStore:
+    """Creation job records keyed by creation_id (see database_setup.sql)"""
+
+    def create(self, creation_id: str, request_data: Dict) -> Tuple[Dict, bool]:
+        """
+        Store a queued job for request_data unless one is already live under creation_id
+
+        Returns (record, created). A duplicate request gets the existing job's public
+        record and False. Jobs that ended in error are replaced so a retry runs again,
+        and so are queued or in_progress jobs left without an update for longer than
+        config.creation_job_lease (their trigger failed or their invocation was killed).
+        The check and the write are one statement, so of several concurrent
+        duplicates exactly one creates the job.
+        """
+        record = {
+            'status': 'queued',
+            'progress': 0,
+            'message': 'Agent creation queued...',
+            'request': request_data,
+            'timestamp': time.time()
+        }
+        created = db.execute_query("""
+            INSERT INTO creation_jobs (id, data, updated_at) VALUES (%s, %s::jsonb, now())
+            ON CONFLICT (id) DO UPDATE SET data = EXCLUDED.data, updated_at = now()
+            WHERE creation_jobs.data->>'status' = 'error'
+               OR (creation_jobs.data->>'status' IN ('queued', 'in_progress')
+                   AND creation_jobs.updated_at < now() - make_interval(secs => %s))
+            RETURNING id
+        """, (creation_id, json.dumps(record), config.creation_job_lease), fetch=True)
+        if created:
+            return {k: v for k, v in record.items() if k not in PRIVATE_FIELDS}, True
+        return self.get(creation_id), False
+
+    def start(self, job_id: str) -> None:
+        """Store an in_progress job for work that runs in the current invocation"""
+        record = {
+            'status': 'in_progress',
+            'progress': 0,
+            'message': 'Starting onboarding...',
+            'timestamp': time.time()
+        }
+        db.execute_query("""
+            INSERT INTO creation_jobs (id, data, updated_at) VALUES (%s, %s::jsonb, now())
+            ON CONFLICT (id) DO UPDATE SET data = EXCLUDED.data, updated_at = now()
+        """, (job_id, json.dumps(record)))
+
+    def enqueue_provisioning(self, creation_id: str, request_data: Dict) -> None:
+        """Queue the job in provisioning_jobs for agent_system.provisioning_queue workers"""
+        db.execute_query("""
+            INSERT INTO provisioning_jobs (id, payload)
+            VALUES (%s, %s::jsonb)
+            ON CONFLICT (id) DO UPDATE
+            SET status = 'queued', payload = EXCLUDED.payload, attempts = 0, run_after = now(),
+                last_error = NULL, result = NULL, updated_at = now()
+            WHERE provisioning_jobs.status = 'failed'
+        """, (creation_id, json.dumps({'form': request_data})))
+
+    def claim(self, creation_id: str) -> Optional[Dict]:
+        """
+        Move a queued job to in_progress and return its request data
+
+        An in_progress job not updated for config.creation_job_lease seconds lost
+        its invocation and is claimed again, starting over. The status check and
+        the update are one statement, so when several invocations race for the
+        same job exactly one gets it; the rest get None.
+        """
+        result = db.execute_query("""
+            UPDATE creation_jobs
+            SET data = data || %s::jsonb, updated_at = now()
+            WHERE id = %s
+              AND (data->>'status' = 'queued'
+                   OR (data->>'status' = 'in_progress' AND updated_at < now() - make_interval(secs => %s)))
+            RETURNING data->'request' AS request
+        """, (json.dumps({
+            'status': 'in_progress',
+            'progress': 0,
+            'message': 'Starting agent creation...',
+            'steps': {},
+            'running_steps': [],
+            'resources': {},
+            'timestamp': time.time()
+        }), creation_id, config.creation_job_lease), fetch=True)
+        return result[0]['request'] if result else None
+
+    def pick_up(self, creation_id: str) -> bool:
+        """
+        Mark a job queued for longer than config.creation_job_pickup_after as picked up
+
+        Returns True for the one caller that should trigger process-creation.py again.
+        Only updated_at moves, so concurrent polls of an orphaned job trigger it once
+        per pickup interval and claim() still decides who runs it.
+        """
+        result = db.execute_query("""
+            UPDATE creation_jobs SET updated_at = now()
+            WHERE id = %s AND data->>'status' = 'queued'
+              AND updated_at < now() - make_interval(secs => %s)
+            RETURNING id
+        """, (creation_id, config.creation_job_pickup_after), fetch=True)
+        return bool(result)
+
+    def update(self, creation_id: str, **fields) -> None:
+        """Merge fields into the job's record"""
+        db.execute_query(
+            "UPDATE creation_jobs SET data = data || %s::jsonb, updated_at = now() WHERE id = %s",
+            (json.dumps(dict(fields, timestamp=time.time())), creation_id)
+        )
+
+    def get(self, creation_id: str, include_private: bool = False) -> Optional[Dict]:
+        """Return the job's record by primary key, or None if unknown; private fields only on request"""
+        result = db.execute_query(
+            "SELECT data - %s::text[] AS data FROM creation_jobs WHERE id = %s",
+            ([] if include_private else list(PRIVATE_FIELDS), creation_id),
+            fetch=True
+        )
+        return result[0]['data'] if result else None
+
+    def wait_until_final(self, creation_id: str, timeout: float, interval: float = 1.0) -> Optional[Dict]:
+        """Re-read the job until it completes or fails, or timeout seconds pass; returns the record"""
+        deadline = time.monotonic() + timeout
+        job = self.get(creation_id, include_private=True)
+        while job is not None and job['status'] not in FINAL_STATUSES and time.monotonic() < deadline:
+            time.sleep(interval)
+            job = self.get(creation_id, include_private=True)
+        return job
+
+
+def status_response(job: Optional[Dict]) -> Dict:
+    """Shape a job record (or None for an unknown job) as a creation-status response"""
+    if job is None:
+        return {
+            'success': False,
+            'status': 'error',
+            'progress': 0,
+            'message': 'Creation ID not found',
+            'error': 'Creation ID not found'
+        }
+    return {
+        'success': job['status'] != 'error',
+        'status': job['status'],
+        'progress': job.get('progress', 0),
+        'message': job.get('message'),
+        'result': job.get('result'),
+        'error': job.get('error'),
+        'troubleshooting_tips': job.get('troubleshooting_tips'),
+        'steps': job.get('steps', {}),
+        'running_steps': job.get('running_steps', []),
+        'resources': job.get('resources', {})
+    }
+
+
+class ProgressRecorder:
+    """
+    Progress callback (see _progress.StepProgress) that stores step events on a job
+
+    The job record gains per-step status and timing (steps), the steps running
+    right now (running_steps) and the resource IDs created so far (resources).
+    """
+
+    def __init__(self, job_id: str, store: Optional[CreationJobStore] = None):
+        self.job_id = job_id
+        self.store = store or creation_jobs
+        self.steps: Dict[str, Dict] = {}
+
+    def __call__(self, event: Dict) -> None:
+        name = event['step']
+        if event['phase'] == 'started':
+            self.steps[name] = {'status': 'running', 'started_ms': event['elapsed_ms']}
+            message = f"Running step: {name.replace('_', ' ')}..."
+        else:
+            self.steps[name] = dict(
+                self.steps.get(name, {}),
+                status='completed' if event['phase'] == 'finished' else 'failed',
+                finished_ms=event['elapsed_ms'],
+                duration_ms=event['duration_ms']
+            )
+            if 'error' in event:
+                self.steps[name]['error'] = event['error']
+            message = f"{'Finished' if event['phase'] == 'finished' else 'Failed'} step: {name.replace('_', ' ')}"
+
+        try:
+            self.store.update(
+                self.job_id,
+                progress=event['progress'],
+                message=message,
+                steps=self.steps,
+                running_steps=self.running_steps(),
+                resources=event['resources']
+            )
+        except Exception as e:
+            print(f"⚠️  Could not record progress for {self.job_id}: {e}")
+
+    def running_steps(self) -> List[str]:
+        return [name for name, step in self.steps.items() if step['status'] == 'running']
+
+
+# Global creation job store instance
+creation_jobs = CreationJobStore()
+
+
+def deployment_url(headers) -> str:
+    """Public URL of this deployment, for calling sibling functions"""
+    host = headers.get('X-Forwarded-Host') or headers.get('Host') or os.environ.get('VERCEL_URL', 'localhost')
+    proto = headers.get('X-Forwarded-Proto', 'https')
+    return f"{proto}://{host}"
+
+
+def trigger_creation_job(base_url: str, creation_id: str) -> None:
+    """Start process-creation.py for a queued job without waiting for it to finish"""
+    try:
+        requests.post(
+            f"{base_url}/api/process-creation",
+            params={'creation_id': creation_id},
+            headers={PROCESS_SECRET_HEADER: config.process_creation_secret},
+            timeout=PROCESS_TRIGGER_TIMEOUT
+        )
+    except requests.exceptions.ReadTimeout:
+        pass  # Expected: provisioning takes minutes
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Could not start creation job {creation_id}: {e}")
+
+
+def pick_up_orphaned_job(creation_id: str, job: Optional[Dict], base_url: str) -> None:
+    """Trigger process-creation.py again for a job still queued after the pickup interval"""
+    if job is None or job['status'] != 'queued' or config.provisioning_queue_backend == 'postgres':
+        return
+    if creation_jobs.pick_up(creation_id):
+        if config.diagnostics_enabled:
+            print(f"🔁 Creation job {creation_id} still queued, triggering it again")
+        trigger_creation_job(base_url, creation_id)
@@ -2,13 +2,24 @@
 """
 Simplified Database Connection Module
 Works with existing PostgreSQL schema only
+
+Queries borrow connections from a pool kept at module level, so the queries of one
+invocation, and later invocations on the same warm function instance, reuse an open
+connection instead of paying a new TLS and auth handshake each. Company configuration
+and status reads go through a short-lived in-process cache (CompanyCache) that
+DatabaseManager clears for a company whenever it writes that company.
 """
 
+import os
+import threading
+import time
+import uuid
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, Union
 from contextlib import contextmanager
 from _config import config
 
@@ -16,41 +27,231 @@ class DatabaseError(Exception):
     """Database operation error"""
     pass
 
+class ConnectionPool:
+    """
+    Thread-safe pool of Postgres connections with a size limit and health checks
+    
+    Mirrors agent_system.database.ConnectionPool: the most recently returned
+    connection is reused (after a SELECT 1 if it sat idle for check_after seconds),
+    new ones are opened up to max_size, and beyond that acquire() waits up to
+    acquire_timeout. Returned connections are rolled back; idle ones beyond min_size
+    are closed after max_idle seconds. A forked child starts with an empty pool.
+    """
+    
+    def __init__(self, db_config: Dict, min_size: int, max_size: int, acquire_timeout: float,
+                 check_after: float, max_idle: float):
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.check_after = check_after
+        self.max_idle = max_idle
+        self._cond = threading.Condition()
+        self._inherited: List = []
+        self._reset()
+    
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._idle: List[Tuple[Any, float]] = []  # (connection, returned at), most recent last
+        self._size = 0
+    
+    def _check_fork(self) -> None:
+        if self._pid != os.getpid():
+            # Closing these would end the parent's sessions too; keep them referenced instead
+            self._inherited.extend(conn for conn, _ in self._idle)
+            self._reset()
+    
+    def acquire(self):
+        """Take a connection; give it back with release(). Raises DatabaseError when none comes free"""
+        give_up = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                self._check_fork()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = give_up - time.monotonic()
+                    if remaining <= 0:
+                        raise DatabaseError(f"No database connection free after waiting "
+                                            f"{self.acquire_timeout:g}s ({self.max_size} in use)")
+                    self._cond.wait(remaining)
+                    self._check_fork()
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                else:
+                    conn, returned_at = None, None
+                    self._size += 1
+            
+            if conn is None:
+                try:
+                    conn = psycopg2.connect(**self.db_config)
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                conn.autocommit = False
+                return conn
+            if self._healthy(conn, returned_at):
+                return conn
+            self._discard(conn)
+    
+    def _healthy(self, conn, returned_at: float) -> bool:
+        if conn.closed:
+            return False
+        if time.monotonic() - returned_at < self.check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def _discard(self, conn) -> None:
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+    
+    def release(self, conn) -> None:
+        """Roll back and return a connection taken with acquire()"""
+        if self._pid != os.getpid():
+            self._inherited.append(conn)
+            return
+        try:
+            if conn.closed:
+                raise psycopg2.InterfaceError("connection already closed")
+            if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+        
+        now = time.monotonic()
+        stale = []
+        with self._cond:
+            self._idle.append((conn, now))
+            while self._size - len(stale) > self.min_size and self._idle and now - self._idle[0][1] > self.max_idle:
+                stale.append(self._idle.pop(0)[0])
+            self._cond.notify()
+        for idle_conn in stale:
+            self._discard(idle_conn)
+
+_uuid7_lock = threading.Lock()
+_uuid7_last = (0, 0)  # (Unix milliseconds, rand_a) of the last key handed out
+
+def uuid7() -> uuid.UUID:
+    """
+    Time-ordered UUID (RFC 9562 version 7) for new primary keys
+    
+    Mirrors agent_system.database.uuid7: a 48-bit Unix millisecond timestamp, then
+    a 12-bit counter that keeps keys from this process increasing within a
+    millisecond, then random bits. New rows go to the right edge of the index.
+    """
+    global _uuid7_last
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        last_ms, counter = _uuid7_last
+        if ms > last_ms:
+            counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        else:
+            ms, counter = last_ms, counter + 1
+            if counter > 0xFFF:
+                ms, counter = last_ms + 1, 0
+        _uuid7_last = (ms, counter)
+    
+    rand_b = int.from_bytes(os.urandom(8), 'big') & 0x3FFFFFFFFFFFFFFF
+    return uuid.UUID(int=(ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+class CompanyCache:
+    """
+    Thread-safe read-through cache of per-company query results with expiry
+    
+    Entries are keyed by (kind, company_id) and live for the ttl given to set().
+    invalidate() drops every kind cached for a company. Writes made by another
+    function instance aren't seen here, so the ttl bounds how stale a read can be.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+    
+    def get(self, kind: str, company_id: str) -> Optional[Dict]:
+        """The cached row, or None when missing or expired"""
+        key = (kind, str(company_id))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+    
+    def set(self, kind: str, company_id: str, row: Dict, ttl: float) -> None:
+        """Cache row for ttl seconds (not at all when ttl <= 0)"""
+        if ttl <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries = {key: entry for key, entry in self._entries.items() if entry[0] > now}
+                while len(self._entries) >= self.max_entries:
+                    # Still full of live entries: drop the oldest inserted
+                    del self._entries[next(iter(self._entries))]
+            self._entries[(kind, str(company_id))] = (now + ttl, row)
+    
+    def invalidate(self, company_id: str) -> None:
+        """Forget everything cached for company_id"""
+        company_id = str(company_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[1] == company_id]:
+                del self._entries[key]
+
 class DatabaseManager:
     """Simplified database manager using existing schema only"""
     
     def __init__(self):
         self.db_config = config.db_config
+        self.pool = ConnectionPool(
+            self.db_config,
+            min_size=config.db_pool_min_size,
+            max_size=config.db_pool_max_size,
+            acquire_timeout=config.db_pool_acquire_timeout,
+            check_after=config.db_pool_check_after,
+            max_idle=config.db_pool_max_idle
+        )
+        self.cache = CompanyCache(config.company_cache_max_entries)
         
     @contextmanager
     def get_connection(self):
-        """Get database connection with proper cleanup"""
+        """Borrow a pooled connection, rolled back on error and returned afterwards"""
         conn = None
         try:
-            conn = psycopg2.connect(**self.db_config)
-            conn.autocommit = False
+            conn = self.pool.acquire()
             yield conn
         except Exception as e:
-            if conn:
-                conn.rollback()
             raise DatabaseError(f"Database connection error: {str(e)}")
         finally:
+            # release() rolls back whatever the error left open
             if conn:
-                conn.close()
+                self.pool.release(conn)
     
-    def execute_query(self, query: str, params: tuple = None, fetch: bool = False) -> Optional[List[Dict]]:
+    def execute_query(self, query: str, params: Union[tuple, Dict] = None, fetch: bool = False) -> Optional[List[Dict]]:
         """Execute query with proper error handling"""
         with self.get_connection() as conn:
             try:
                 with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                     cursor.execute(query, params)
                     
-                    if fetch:
-                        result = cursor.fetchall()
-                        return [dict(row) for row in result]
-                    else:
-                        conn.commit()
-                        return None
+                    # Commit before returning rows too, so INSERT/UPDATE ... RETURNING persist
+                    result = [dict(row) for row in cursor.fetchall()] if fetch else None
+                    conn.commit()
+                    return result
                         
             except Exception as e:
                 conn.rollback()
@@ -60,9 +261,9 @@ class DatabaseManager:
         """Create company record using existing schema"""
         query = """
         INSERT INTO companies (
-            company_name, office_address, business_hours, 
+            id, company_name, office_address, business_hours, 
             contact_number, area_code, website_url, time_zone
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         ON CONFLICT (company_name) DO UPDATE SET
             updated_at = NOW(),
             office_address = EXCLUDED.office_address,
@@ -80,7 +281,9 @@ class DatabaseManager:
             "timezone": company_data['timezone']
         }
         
+        # A time-ordered key; an existing company keeps its ID (see ON CONFLICT)
         result = self.execute_query(query, (
+            str(uuid7()),
             company_data['company_name'],
             company_data['business_address'],
             json.dumps(business_hours_json),
@@ -90,77 +293,74 @@ class DatabaseManager:
             company_data['timezone']
         ), fetch=True)
         
-        return str(result[0]['id'])
+        company_id = str(result[0]['id'])
+        # An existing company's row may just have been updated
+        self.cache.invalidate(company_id)
+        return company_id
     
-    def update_company_kb(self, company_id: str, knowledge_base_id: str):
-        """Update company with knowledge base ID"""
-        query = """
-        UPDATE companies 
-        SET knowledge_base_id = %s, updated_at = NOW()
-        WHERE id = %s
+    def save_onboarding(self, company_id: str, knowledge_base_id: str, prompts: Dict, config_data: Dict) -> str:
         """
+        Store an onboarding's knowledge base, prompts and agent configuration in one statement
         
-        self.execute_query(query, (knowledge_base_id, company_id))
-    
-    def create_agent_config(self, company_id: str, config_data: Dict) -> str:
-        """Create agent configuration using existing schema"""
-        query = """
-        INSERT INTO company_agent_configs (
-            company_id, llm_id_oh, llm_id_ah, agent_id_oh, agent_id_ah, agent_id_mr,
-            conversation_flow_id, retell_phone_number, retell_phone_number_id,
-            dashboard_email, dashboard_password
-        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (company_id) DO UPDATE SET
-            llm_id_oh = EXCLUDED.llm_id_oh,
-            llm_id_ah = EXCLUDED.llm_id_ah,
-            agent_id_oh = EXCLUDED.agent_id_oh,
-            agent_id_ah = EXCLUDED.agent_id_ah,
-            agent_id_mr = EXCLUDED.agent_id_mr,
-            conversation_flow_id = EXCLUDED.conversation_flow_id,
-            retell_phone_number = EXCLUDED.retell_phone_number,
-            retell_phone_number_id = EXCLUDED.retell_phone_number_id,
-            dashboard_email = EXCLUDED.dashboard_email,
-            dashboard_password = EXCLUDED.dashboard_password,
-            updated_at = NOW()
-        RETURNING id
+        The company row update, the prompts upsert and the agent configuration write run
+        in a single round trip and commit or fail together. company_agent_configs has no
+        unique key on company_id, so the configuration is updated when the company has
+        one and inserted otherwise. Returns the agent configuration ID.
+        """
+        config_columns = [
+            'llm_id_oh', 'llm_id_ah', 'agent_id_oh', 'agent_id_ah', 'agent_id_mr',
+            'conversation_flow_id', 'retell_phone_number', 'retell_phone_number_id',
+            'dashboard_email', 'dashboard_password'
+        ]
+        query = f"""
+        WITH company AS (
+            UPDATE companies 
+            SET knowledge_base_id = %(knowledge_base_id)s, updated_at = NOW()
+            WHERE id = %(company_id)s
+            RETURNING id
+        ), prompts AS (
+            INSERT INTO company_prompts (
+                company_id, global_prompt, office_hours_prompt, after_hours_prompt
+            )
+            SELECT id, %(global_prompt)s, %(office_hours_prompt)s, %(after_hours_prompt)s FROM company
+            ON CONFLICT (company_id) DO UPDATE SET
+                global_prompt = EXCLUDED.global_prompt,
+                office_hours_prompt = EXCLUDED.office_hours_prompt,
+                after_hours_prompt = EXCLUDED.after_hours_prompt,
+                updated_at = NOW()
+        ), config_update AS (
+            UPDATE company_agent_configs ac
+            SET {', '.join(f'{name} = %({name})s' for name in config_columns)}, updated_at = NOW()
+            FROM company
+            WHERE ac.company_id = company.id
+            RETURNING ac.id
+        ), config_insert AS (
+            INSERT INTO company_agent_configs (company_id, {', '.join(config_columns)})
+            SELECT id, {', '.join(f'%({name})s' for name in config_columns)} FROM company
+            WHERE NOT EXISTS (SELECT 1 FROM config_update)
+            RETURNING id
+        )
+        SELECT id FROM config_update
+        UNION ALL
+        SELECT id FROM config_insert
+        LIMIT 1
         """
         
-        result = self.execute_query(query, (
-            company_id,
-            config_data.get('llm_id_oh'),
-            config_data.get('llm_id_ah'),
-            config_data.get('agent_id_oh'),
-            config_data.get('agent_id_ah'),
-            config_data.get('agent_id_mr'),
-            config_data.get('conversation_flow_id'),
-            config_data.get('retell_phone_number'),
-            config_data.get('retell_phone_number_id'),
-            config_data.get('dashboard_email'),
-            config_data.get('dashboard_password')
-        ), fetch=True)
+        params = {name: config_data.get(name) for name in config_columns}
+        params.update(
+            knowledge_base_id=knowledge_base_id,
+            company_id=company_id,
+            global_prompt=prompts['global_prompt'],
+            office_hours_prompt=prompts['office_hours_prompt'],
+            after_hours_prompt=prompts['after_hours_prompt']
+        )
+        result = self.execute_query(query, params, fetch=True)
         
+        self.cache.invalidate(company_id)
+        if not result:
+            raise DatabaseError(f"Company {company_id} not found")
         return str(result[0]['id'])
     
-    def create_prompts(self, company_id: str, prompts: Dict):
-        """Create prompts using existing schema"""
-        query = """
-        INSERT INTO company_prompts (
-            company_id, global_prompt, office_hours_prompt, after_hours_prompt
-        ) VALUES (%s, %s, %s, %s)
-        ON CONFLICT (company_id) DO UPDATE SET
-            global_prompt = EXCLUDED.global_prompt,
-            office_hours_prompt = EXCLUDED.office_hours_prompt,
-            after_hours_prompt = EXCLUDED.after_hours_prompt,
-            updated_at = NOW()
-        """
-        
-        self.execute_query(query, (
-            company_id,
-            prompts['global_prompt'],
-            prompts['office_hours_prompt'],
-            prompts['after_hours_prompt']
-        ))
-    
     def get_company_by_name(self, company_name: str) -> Optional[Dict]:
         """Get company by name"""
         query = """
@@ -171,7 +371,11 @@ class DatabaseManager:
         return result[0] if result else None
     
     def get_company_config(self, company_id: str) -> Optional[Dict]:
-        """Get company agent configuration"""
+        """Get company agent configuration (cached for company_cache_ttl seconds)"""
+        cached = self.cache.get('config', company_id)
+        if cached is not None:
+            return cached
+        
         query = """
         SELECT c.*, ac.*, cp.global_prompt, cp.office_hours_prompt, cp.after_hours_prompt
         FROM companies c
@@ -181,7 +385,47 @@ class DatabaseManager:
         """
         
         result = self.execute_query(query, (company_id,), fetch=True)
-        return result[0] if result else None
+        if not result:
+            return None
+        self.cache.set('config', company_id, result[0], config.company_cache_ttl)
+        return result[0]
+    
+    def get_company_status(self, company_id: str) -> Optional[Dict]:
+        """
+        The few columns a status poll needs: name, timestamps and the provisioned resource IDs
+        
+        Skips the prompt texts and the rest of the configuration. Completed companies
+        are cached for company_cache_ttl seconds, ones still onboarding only for
+        company_status_pending_ttl, so a poll sees another instance's final save soon.
+        """
+        cached = self.cache.get('status', company_id)
+        if cached is not None:
+            return cached
+        
+        query = """
+        SELECT c.company_name, c.created_at, greatest(c.updated_at, ac.updated_at) AS updated_at,
+               ac.llm_id_oh, ac.agent_id_oh, ac.retell_phone_number, ac.dashboard_email
+        FROM companies c
+        LEFT JOIN LATERAL (
+            SELECT llm_id_oh, agent_id_oh, retell_phone_number, dashboard_email, updated_at
+            FROM company_agent_configs
+            WHERE company_id = c.id
+            ORDER BY updated_at DESC NULLS LAST
+            LIMIT 1
+        ) ac ON true
+        WHERE c.id = %s
+        """
+        
+        result = self.execute_query(query, (company_id,), fetch=True)
+        if not result:
+            return None
+        row = result[0]
+        row['is_complete'] = all(
+            row.get(name) for name in ('llm_id_oh', 'agent_id_oh', 'retell_phone_number', 'dashboard_email')
+        )
+        ttl = config.company_cache_ttl if row['is_complete'] else config.company_status_pending_ttl
+        self.cache.set('status', company_id, row, ttl)
+        return row
 
 # Global database manager instance
 db = DatabaseManager()
\ No newline at end of file
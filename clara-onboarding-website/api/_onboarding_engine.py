@@ -13,6 +13,10 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 from _config import config
 from _database import db, DatabaseError
+from _retell_client import RetellClient
+from _area_codes import get_nearby_area_codes
+from _creation_jobs import creation_jobs
+from _progress import StepProgress, ProgressCallback
 
 class OnboardingError(Exception):
     """Onboarding workflow error"""
@@ -22,10 +26,8 @@ class OnboardingEngine:
     """Simplified onboarding engine using existing database schema"""
     
     def __init__(self):
-        self.retell_headers = {
-            "Authorization": f"Bearer {config.retell_api_token}",
-            "Content-Type": "application/json"
-        }
+        self.retell = RetellClient(config.retell_api_token, config.org_id, config.retell_timeouts)
+        self.retell.warm()
     
     def start_onboarding(self, input_data: Dict) -> str:
         """Start new onboarding workflow - returns company_id as session_id"""
@@ -40,10 +42,16 @@ class OnboardingEngine:
         
         return company_id
     
-    def execute_full_onboarding(self, company_id: str, input_data: Dict) -> Dict:
-        """Execute complete onboarding workflow in one go"""
+    def execute_full_onboarding(self, company_id: str, input_data: Dict,
+                                progress: Optional[ProgressCallback] = None) -> Dict:
+        """
+        Execute complete onboarding workflow in one go
+        
+        progress, if given, is called at the start and end of every step (see _progress).
+        """
         start_time = time.time()
         results = {}
+        steps = StepProgress(progress, total_steps=7)
         
         try:
             if config.diagnostics_enabled:
@@ -52,56 +60,73 @@ class OnboardingEngine:
             # Step 1: Create Knowledge Base
             if config.diagnostics_enabled:
                 print("📚 Creating knowledge base...")
-            kb_result = self._create_knowledge_base(company_id, input_data)
-            results['knowledge_base'] = kb_result
+            with steps.step('knowledge_base') as resources:
+                kb_result = self._create_knowledge_base(company_id, input_data)
+                results['knowledge_base'] = kb_result
+                resources['knowledge_base_id'] = kb_result['knowledge_base_id']
             
             # Step 2: Generate Prompts
             if config.diagnostics_enabled:
                 print("📝 Generating prompts...")
-            prompts = self._generate_prompts(company_id, input_data)
-            results['prompts'] = prompts
+            with steps.step('prompts'):
+                prompts = self._generate_prompts(company_id, input_data)
+                results['prompts'] = prompts
             
             # Step 3: Create LLMs
             if config.diagnostics_enabled:
                 print("🧠 Creating LLMs...")
-            llms = self._create_llms(company_id, input_data, prompts, kb_result['knowledge_base_id'])
-            results['llms'] = llms
+            with steps.step('llms') as resources:
+                llms = self._create_llms(company_id, input_data, prompts, kb_result['knowledge_base_id'])
+                results['llms'] = llms
+                resources.update({f'{role}_llm_id': llm_id for role, llm_id in llms.items()})
             
             # Step 4: Create Agents
             if config.diagnostics_enabled:
                 print("🤖 Creating agents...")
-            agents = self._create_agents(company_id, input_data, llms)
-            results['agents'] = agents
+            with steps.step('agents') as resources:
+                agents = self._create_agents(company_id, input_data, llms)
+                results['agents'] = agents
+                resources.update({f'{role}_agent_id': agent_id for role, agent_id in agents.items()})
             
             # Step 5: Purchase Phone Number
             if config.diagnostics_enabled:
                 print("📞 Purchasing phone number...")
-            phone_result = self._purchase_phone_number(company_id, input_data, agents['main_router'])
-            results['phone'] = phone_result
+            with steps.step('phone_number') as resources:
+                phone_result = self._purchase_phone_number(company_id, input_data, agents['main_router'])
+                results['phone'] = phone_result
+                resources['phone_number'] = phone_result['phone_number']
+                resources['phone_number_id'] = phone_result['phone_number_id']
             
             # Step 6: Create Dashboard Account
             if config.diagnostics_enabled:
                 print("🔐 Creating dashboard account...")
-            dashboard = self._create_dashboard_account(company_id, input_data)
-            results['dashboard'] = dashboard
+            with steps.step('dashboard') as resources:
+                dashboard = self._create_dashboard_account(company_id, input_data)
+                results['dashboard'] = dashboard
+                resources['dashboard_email'] = dashboard['dashboard_email']
             
             # Step 7: Save Complete Configuration
             if config.diagnostics_enabled:
                 print("💾 Saving configuration...")
-            config_data = {
-                'llm_id_oh': llms['office_hours'],
-                'llm_id_ah': llms['after_hours'],
-                'agent_id_oh': agents['office_hours'],
-                'agent_id_ah': agents['after_hours'],
-                'agent_id_mr': agents['main_router'],
-                'retell_phone_number': phone_result['phone_number'],
-                'retell_phone_number_id': phone_result['phone_number_id'],
-                'dashboard_email': dashboard['dashboard_email'],
-                'dashboard_password': dashboard['dashboard_password']
-            }
-            
-            agent_config_id = db.create_agent_config(company_id, config_data)
-            results['agent_config_id'] = agent_config_id
+            with steps.step('database') as resources:
+                config_data = {
+                    'llm_id_oh': llms['office_hours'],
+                    'llm_id_ah': llms['after_hours'],
+                    'agent_id_oh': agents['office_hours'],
+                    'agent_id_ah': agents['after_hours'],
+                    'agent_id_mr': agents['main_router'],
+                    'retell_phone_number': phone_result['phone_number'],
+                    'retell_phone_number_id': phone_result['phone_number_id'],
+                    'dashboard_email': dashboard['dashboard_email'],
+                    'dashboard_password': dashboard['dashboard_password']
+                }
+                
+                # Knowledge base, prompts and agent configuration in one round trip
+                agent_config_id = db.save_onboarding(
+                    company_id, kb_result['knowledge_base_id'], prompts, config_data
+                )
+                results['agent_config_id'] = agent_config_id
+                resources['agent_config_id'] = agent_config_id
             
             # Calculate total duration
             duration_ms = int((time.time() - start_time) * 1000)
@@ -113,6 +138,7 @@ class OnboardingEngine:
                 'success': True,
                 'company_id': company_id,
                 'duration_ms': duration_ms,
+                'steps': steps.steps,
                 'results': results
             }
             
@@ -128,6 +154,7 @@ class OnboardingEngine:
                 'company_id': company_id,
                 'error': error_message,
                 'duration_ms': duration_ms,
+                'steps': steps.steps,
                 'partial_results': results
             }
     
@@ -170,12 +197,7 @@ class OnboardingEngine:
                 "website_url": website_url
             }
             
-            response = requests.post(
-                config.retell_urls['knowledge_base'],
-                headers=self.retell_headers,
-                json=kb_data,
-                timeout=60
-            )
+            response = self.retell.post(config.retell_urls['knowledge_base'], json=kb_data)
             
             if response.status_code in [200, 201]:
                 result = response.json()
@@ -184,9 +206,6 @@ class OnboardingEngine:
                 if not knowledge_base_id:
                     raise OnboardingError("No knowledge_base_id returned from API")
                 
-                # Update company record
-                db.update_company_kb(company_id, knowledge_base_id)
-                
                 return {
                     'knowledge_base_id': knowledge_base_id,
                     'website_url': website_url,
@@ -247,16 +266,12 @@ AFTER HOURS MODE:
 - {"Offer emergency transfer if critical situation" if allow_emergency else "Advise on emergency procedures"}
 - Promise callback during next business hours"""
 
-        prompts = {
+        # Stored with the rest of the configuration in the final save step
+        return {
             'global_prompt': global_prompt,
             'office_hours_prompt': office_hours_prompt,
             'after_hours_prompt': after_hours_prompt
         }
-        
-        # Store prompts in database
-        db.create_prompts(company_id, prompts)
-        
-        return prompts
     
     def _create_llms(self, company_id: str, data: Dict, prompts: Dict, knowledge_base_id: str) -> Dict:
         """Create LLMs with generated prompts"""
@@ -272,12 +287,7 @@ AFTER HOURS MODE:
                 "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
             }
             
-            response = requests.post(
-                config.retell_urls['llm'],
-                headers=self.retell_headers,
-                json=office_llm_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['llm'], json=office_llm_data)
             
             if response.status_code in [200, 201]:
                 llms['office_hours'] = response.json().get('llm_id')
@@ -292,12 +302,7 @@ AFTER HOURS MODE:
                 "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
             }
             
-            response = requests.post(
-                config.retell_urls['llm'],
-                headers=self.retell_headers,
-                json=after_llm_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['llm'], json=after_llm_data)
             
             if response.status_code in [200, 201]:
                 llms['after_hours'] = response.json().get('llm_id')
@@ -312,12 +317,7 @@ AFTER HOURS MODE:
                 "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
             }
             
-            response = requests.post(
-                config.retell_urls['llm'],
-                headers=self.retell_headers,
-                json=router_llm_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['llm'], json=router_llm_data)
             
             if response.status_code in [200, 201]:
                 llms['main_router'] = response.json().get('llm_id')
@@ -349,12 +349,7 @@ AFTER HOURS MODE:
                 }
             }
             
-            response = requests.post(
-                config.retell_urls['agent'],
-                headers=self.retell_headers,
-                json=office_agent_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['agent'], json=office_agent_data)
             
             if response.status_code in [200, 201]:
                 agents['office_hours'] = response.json().get('agent_id')
@@ -371,12 +366,7 @@ AFTER HOURS MODE:
                 }
             }
             
-            response = requests.post(
-                config.retell_urls['agent'],
-                headers=self.retell_headers,
-                json=after_agent_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['agent'], json=after_agent_data)
             
             if response.status_code in [200, 201]:
                 agents['after_hours'] = response.json().get('agent_id')
@@ -393,12 +383,7 @@ AFTER HOURS MODE:
                 }
             }
             
-            response = requests.post(
-                config.retell_urls['agent'],
-                headers=self.retell_headers,
-                json=router_agent_data,
-                timeout=30
-            )
+            response = self.retell.post(config.retell_urls['agent'], json=router_agent_data)
             
             if response.status_code in [200, 201]:
                 agents['main_router'] = response.json().get('agent_id')
@@ -417,10 +402,14 @@ AFTER HOURS MODE:
         try:
             company_name = data['company_name']
             preferred_area_code = data['preferred_area_code']
-            fallback_codes = data.get('fallback_area_codes', config.area_code_fallbacks['default'])
+            fallback_codes = (
+                data.get('fallback_area_codes')
+                or get_nearby_area_codes(preferred_area_code)
+                or config.area_code_fallbacks['default']
+            )
             
-            # Try area codes in order
-            area_codes_to_try = [preferred_area_code] + fallback_codes
+            # Try area codes in order, nearest first
+            area_codes_to_try = list(dict.fromkeys([preferred_area_code] + fallback_codes))
             
             for area_code in area_codes_to_try:
                 try:
@@ -434,12 +423,7 @@ AFTER HOURS MODE:
                         "inbound_agent_version": 0
                     }
                     
-                    response = requests.post(
-                        config.retell_urls['phone_number'],
-                        headers=self.retell_headers,
-                        json=payload,
-                        timeout=30
-                    )
+                    response = self.retell.post(config.retell_urls['phone_number'], json=payload)
                     
                     if response.status_code in [200, 201]:
                         phone_data = response.json()
@@ -483,30 +467,40 @@ AFTER HOURS MODE:
     def get_company_status(self, company_id: str) -> Dict:
         """Get company onboarding status"""
         try:
-            company_config = db.get_company_config(company_id)
-            if not company_config:
+            company_status = db.get_company_status(company_id)
+            if not company_status:
                 return {'error': 'Company not found'}
             
-            # Check if onboarding is complete
-            is_complete = all([
-                company_config.get('llm_id_oh'),
-                company_config.get('agent_id_oh'),
-                company_config.get('retell_phone_number'),
-                company_config.get('dashboard_email')
-            ])
+            is_complete = company_status['is_complete']
+            
+            # Step progress and timing recorded by execute_full_onboarding; a completed
+            # company's status needs none, so polls for it never reach Postgres
+            job = {} if is_complete else self._job_progress(company_id)
             
             return {
                 'company_id': company_id,
-                'company_name': company_config.get('company_name'),
+                'company_name': company_status.get('company_name'),
                 'status': 'completed' if is_complete else 'in_progress',
-                'phone_number': company_config.get('retell_phone_number'),
-                'dashboard_email': company_config.get('dashboard_email'),
-                'created_at': company_config.get('created_at').isoformat() if company_config.get('created_at') else None,
-                'updated_at': company_config.get('updated_at').isoformat() if company_config.get('updated_at') else None
+                'progress': 100 if is_complete else job.get('progress', 0),
+                'steps': job.get('steps', {}),
+                'running_steps': job.get('running_steps', []),
+                'resources': job.get('resources', {}),
+                'phone_number': company_status.get('retell_phone_number'),
+                'dashboard_email': company_status.get('dashboard_email'),
+                'created_at': company_status['created_at'].isoformat() if company_status.get('created_at') else None,
+                'updated_at': company_status['updated_at'].isoformat() if company_status.get('updated_at') else None
             }
             
         except Exception as e:
             return {'error': f'Failed to get company status: {str(e)}'}
+    
+    def _job_progress(self, company_id: str) -> Dict:
+        """The onboarding's creation job record, cached for company_status_pending_ttl seconds"""
+        job = db.cache.get('job', company_id)
+        if job is None:
+            job = creation_jobs.get(company_id) or {}
+            db.cache.set('job', company_id, job, config.company_status_pending_ttl)
+        return job
 
 # Global onboarding engine instance
 onboarding_engine = OnboardingEngine()
\ No newline at end of file
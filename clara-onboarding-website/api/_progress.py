@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Step Progress
+Report the start and end of each onboarding step to a progress callback
+
+Events match agent_system's StepGraph progress events: step, phase ("started",
+"finished" or "failed"), elapsed_ms since the run started, duration_ms once the
+step ends, completed_steps, total_steps, progress (percent) and the resource
+IDs created so far.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+ProgressCallback = Callable[[Dict], None]
+
+
+class StepProgress:
+    """Times a sequence of steps and reports each one to an optional callback"""
+
+    def __init__(self, progress: Optional[ProgressCallback], total_steps: int):
+        self.progress = progress
+        self.total_steps = total_steps
+        self.completed_steps = 0
+        self.resources: Dict = {}
+        self.steps: Dict[str, Dict] = {}
+        self.started_at = time.time()
+
+    @contextmanager
+    def step(self, name: str):
+        """
+        Run the body as step name; yields the resources dict for the body to fill in
+
+            with steps.step('knowledge_base') as resources:
+                resources['knowledge_base_id'] = create_knowledge_base(...)
+        """
+        step_started = time.time()
+        self.steps[name] = {'status': 'running', 'started_ms': self._ms(step_started)}
+        self._emit(name, 'started', self._ms(step_started))
+        try:
+            yield self.resources
+        except Exception as e:
+            self._finish(name, step_started, 'failed')
+            self._emit(name, 'failed', self._ms(time.time()), error=str(e)[:200])
+            raise
+        self.completed_steps += 1
+        self._finish(name, step_started, 'completed')
+        self._emit(name, 'finished', self._ms(time.time()))
+
+    def _ms(self, moment: float) -> int:
+        return int((moment - self.started_at) * 1000)
+
+    def _finish(self, name: str, step_started: float, status: str) -> None:
+        self.steps[name]['status'] = status
+        self.steps[name]['duration_ms'] = int((time.time() - step_started) * 1000)
+
+    def _emit(self, name: str, phase: str, elapsed_ms: int, error: Optional[str] = None) -> None:
+        if self.progress is None:
+            return
+        event = {'step': name, 'phase': phase, 'elapsed_ms': elapsed_ms}
+        if phase != 'started':
+            event['duration_ms'] = self.steps[name]['duration_ms']
+        if error is not None:
+            event['error'] = error
+        event.update({
+            'completed_steps': self.completed_steps,
+            'total_steps': self.total_steps,
+            'progress': int(self.completed_steps * 100 / self.total_steps),
+            'resources': dict(self.resources)
+        })
+        try:
+            self.progress(event)
+        except Exception as e:
+            # Progress reporting must never break provisioning
+            print(f"⚠️  Progress callback failed for '{name}': {e}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Shared Retell HTTP Client
+One keep-alive connection pool per function instance for every Retell call
+"""
+
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+RETELL_API_BASE = "https://api.retellai.com"
+
+# (connect, read) timeouts in seconds, keyed by Retell endpoint path
+DEFAULT_TIMEOUTS: Dict[str, Tuple[float, float]] = {
+    'default': (5, 30),
+    'list-sitemap': (5, 60),
+    'create-knowledge-base': (5, 60),
+    'create-retell-llm': (5, 30),
+    'create-agent': (5, 30),
+    'create-conversation-flow': (5, 30),
+    'create-phone-number': (5, 30)
+}
+
+
+class RetellClient:
+    """Pooled Retell API client with reusable auth headers and per-endpoint timeouts"""
+
+    def __init__(self, api_token: str, org_id: Optional[str] = None,
+                 timeouts: Optional[Dict[str, Tuple[float, float]]] = None, pool_maxsize: int = 10):
+        self.headers = {
+            "Authorization": f"Bearer {(api_token or '').strip()}",
+            "Content-Type": "application/json"
+        }
+        if org_id:
+            self.headers["orgid"] = org_id
+        self.timeouts = dict(timeouts or DEFAULT_TIMEOUTS)
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def timeout_for(self, url: str) -> Tuple[float, float]:
+        """Default (connect, read) timeout for a Retell URL"""
+        endpoint = urlsplit(url).path.strip('/')
+        return self.timeouts.get(endpoint, self.timeouts['default'])
+
+    def post(self, url: str, json: Optional[Dict] = None, timeout=None, **kwargs) -> requests.Response:
+        """POST to a Retell URL over the pooled session"""
+        return self.session.post(url, json=json, timeout=timeout or self.timeout_for(url), **kwargs)
+
+    def warm(self, background: bool = True) -> None:
+        """Open a keep-alive connection to Retell before the first real call"""
+        def touch():
+            try:
+                self.session.head(f"{RETELL_API_BASE}/", timeout=self.timeouts['default'], allow_redirects=False)
+            except requests.RequestException:
+                pass
+
+        if background:
+            threading.Thread(target=touch, name="retell-warm", daemon=True).start()
+        else:
+            touch()
@@ -10,9 +10,7 @@ os.environ.setdefault('PYTHONPATH', os.path.dirname(__file__))
 
 from http.server import BaseHTTPRequestHandler
 import json
-import time
 import re
-import base64
 import sys
 import traceback
 
@@ -29,6 +27,10 @@ except ImportError:
             self.diagnostics_enabled = os.environ.get('DIAGNOSTICS', '').lower() == 'true'
     config = FallbackConfig()
 
+from _creation_jobs import (
+    creation_jobs, idempotency_key, job_id_for_key, deployment_url, trigger_creation_job, MAX_KEY_LENGTH
+)
+
 def sanitize_company_name(company_name):
     """Remove spaces and convert to lowercase for credential generation"""
     if not company_name:
@@ -37,6 +39,12 @@ def sanitize_company_name(company_name):
 
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
+        # A bad Idempotency-Key is the client's error; reject it before the 200 goes out
+        idempotency_header = self.headers.get('Idempotency-Key')
+        if idempotency_header and len(idempotency_header.strip()) > MAX_KEY_LENGTH:
+            self.send_error_response(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters", 400)
+            return
+        
         try:
             # Set CORS headers first
             self.send_response(200)
@@ -94,28 +102,28 @@ class handler(BaseHTTPRequestHandler):
                 'assistantName': data.get('assistantName', 'Clara').strip()
             }
             
-            # Create safe creation_id with error handling
-            try:
-                # Create a simplified data structure for encoding
-                safe_data = {
-                    'name': company_data['companyName'][:30],  # Limit length
-                    'url': company_data['websiteUrl'][:50],
-                    'assistant': company_data['assistantName'][:20]
-                }
-                json_str = json.dumps(safe_data)
-                encoded_data = base64.b64encode(json_str.encode('utf-8')).decode('ascii')
-                # Limit total length to prevent URL issues
-                if len(encoded_data) > 150:
-                    encoded_data = encoded_data[:150]
-                creation_id = f"real_{int(time.time())}_{encoded_data}"
-            except Exception:
-                # Fallback to simple creation_id
-                creation_id = f"real_{int(time.time())}"
+            # Enqueue the job once per idempotency key; a double-clicked submit or a
+            # client retry gets the existing job back instead of provisioning again
+            creation_id = job_id_for_key(idempotency_key(idempotency_header, company_data))
+            job, created = creation_jobs.create(creation_id, company_data)
+            queue_backend = getattr(config, 'provisioning_queue_backend', 'direct')
+            if not created:
+                if config.diagnostics_enabled:
+                    print(f"🔁 Duplicate request attached to {creation_id} ({job['status']})")
+                # The first trigger may have failed; claim() makes a second one harmless
+                if job['status'] == 'queued' and queue_backend != 'postgres':
+                    trigger_creation_job(deployment_url(self.headers), creation_id)
+            elif queue_backend == 'postgres':
+                creation_jobs.enqueue_provisioning(creation_id, company_data)
+            else:
+                trigger_creation_job(deployment_url(self.headers), creation_id)
             
             response_data = {
                 'success': True,
                 'creation_id': creation_id,
-                'message': 'Agent creation started - this will take 2-3 minutes',
+                'message': 'Agent creation started - this will take 2-3 minutes' if created else 'Agent creation already requested',
+                'status': job['status'],
+                'replayed': not created,
                 'demo_mode': False
             }
             
@@ -135,7 +143,7 @@ class handler(BaseHTTPRequestHandler):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key')
         self.end_headers()
     
     def send_error_response(self, message, status_code):
@@ -1,17 +1,12 @@
 from http.server import BaseHTTPRequestHandler
 import json
-import time
-import random
-import re
-import base64
 import os
 import sys
 import traceback
-import requests
 from urllib.parse import urlparse, parse_qs
 
-# Add current directory to path for imports
-sys.path.append(os.path.dirname(__file__))
+# Add the api directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 try:
     from _config import config
@@ -23,648 +18,7 @@ except ImportError:
             self.diagnostics_enabled = os.environ.get('DIAGNOSTICS', '').lower() == 'true'
     config = FallbackConfig()
 
-def sanitize_company_name(company_name):
-    """Remove spaces and convert to lowercase for credential generation"""
-    if not company_name:
-        return 'company'
-    return re.sub(r'\s+', '', company_name.lower())
-
-def generate_credentials(company_name):
-    """Generate deterministic email and password based on company name"""
-    sanitized_name = sanitize_company_name(company_name)
-    email = f"support{sanitized_name}@justclara.ai"
-    password = f"{sanitized_name}@321"
-    return email, password
-
-def create_knowledge_base(website_url, company_name, retell_token):
-    """Create knowledge base via Retell API"""
-    try:
-        if not website_url or not website_url.strip():
-            return {'success': False, 'error': 'No website URL provided'}
-        
-        if not website_url.startswith(('http://', 'https://')):
-            website_url = f"https://{website_url}"
-        
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        kb_data = {
-            "knowledge_base_name": f"{company_name[:30]} KB",
-            "website_url": website_url
-        }
-        
-        response = requests.post(
-            "https://api.retellai.com/create-knowledge-base",
-            headers=headers,
-            json=kb_data,
-            timeout=45
-        )
-        
-        if response.status_code in [200, 201]:
-            result = response.json()
-            return {
-                'success': True,
-                'knowledge_base_id': result.get('knowledge_base_id')
-            }
-        else:
-            return {
-                'success': False,
-                'error': f"KB API returned {response.status_code}: {response.text[:100]}"
-            }
-            
-    except Exception as e:
-        return {'success': False, 'error': f'KB creation error: {str(e)[:100]}'}
-
-def create_multiple_llms(company_data, knowledge_base_id, retell_token):
-    """Create multiple LLMs for different purposes"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        assistant_name = company_data.get('assistantName', 'Clara')[:20]
-        
-        llms = {}
-        
-        # Office Hours LLM
-        office_llm_data = {
-            "model": "gpt-4o-mini",
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, a professional AI assistant for {company_name}. Handle office hours calls professionally.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=office_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['office_hours'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"Office Hours LLM creation failed: {response.status_code}")
-        
-        # After Hours LLM
-        after_llm_data = {
-            "model": "gpt-4o-mini", 
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, handling after-hours calls for {company_name}. Take messages and handle emergencies.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=after_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['after_hours'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"After Hours LLM creation failed: {response.status_code}")
-        
-        # Main Router LLM
-        router_llm_data = {
-            "model": "gpt-4o-mini",
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, the main router for {company_name}. Route calls appropriately based on business hours.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=router_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['main_router'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"Main Router LLM creation failed: {response.status_code}")
-        
-        return {'success': True, **llms}
-        
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_multiple_agents(company_data, llm_data, retell_token):
-    """Create multiple agents for different purposes"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        agents = {}
-        
-        # Office Hours Agent
-        office_agent_data = {
-            "agent_name": f"{company_name} Office Hours Assistant",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": llm_data['office_hours']['llm_id']
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=office_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            agents['office_hours'] = {'agent_id': response.json().get('agent_id')}
-        else:
-            raise Exception(f"Office Hours Agent creation failed: {response.status_code}")
-        
-        # After Hours Agent
-        after_agent_data = {
-            "agent_name": f"{company_name} After Hours Assistant",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": llm_data['after_hours']['llm_id']
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=after_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            agents['after_hours'] = {'agent_id': response.json().get('agent_id')}
-        else:
-            raise Exception(f"After Hours Agent creation failed: {response.status_code}")
-        
-        return {'success': True, **agents}
-        
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_conversation_flow(company_data, llm_data, office_agent_id, after_agent_id, retell_token):
-    """Create conversation flow for routing"""
-    try:
-        # This would create the conversation flow in a real implementation
-        # For now, return a placeholder ID
-        return f"flow_{int(time.time())}"
-    except Exception as e:
-        return None
-
-def create_main_router_agent(company_data, conversation_flow_id, router_llm_id, retell_token):
-    """Create main router agent"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        
-        router_agent_data = {
-            "agent_name": f"{company_name} Main Router",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": router_llm_id
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=router_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            return {
-                'success': True,
-                'agent_id': response.json().get('agent_id')
-            }
-        else:
-            return {
-                'success': False,
-                'error': f"Router Agent creation failed: {response.status_code}"
-            }
-            
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_dashboard_account(company_name, agent_id):
-    """Create dashboard account (simulated for Vercel)"""
-    try:
-        # This would call the actual dashboard API in a real implementation
-        # For now, return success
-        return {
-            'success': True,
-            'message': 'Dashboard account created successfully'
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:100]}
-
-def purchase_phone_number_real(company_name, area_code, main_router_agent_id, retell_token):
-    """Purchase a real phone number with area code fallback logic"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        nickname = f"{company_name} Number"
-        
-        # Area code fallback logic (simplified for Vercel)
-        area_codes_to_try = [area_code, "212", "415", "213", "312", "617"]  # Primary + major cities
-        
-        print(f"📞 Purchasing phone number for {company_name}")
-        print(f"   Trying area codes: {area_codes_to_try}")
-        
-        for attempt_area_code in area_codes_to_try:
-            print(f"   Attempting area code: {attempt_area_code}")
-            
-            payload = {
-                "nickname": nickname,
-                "area_code": int(attempt_area_code),
-                "country_code": "US",
-                "number_provider": "twilio",
-                "inbound_allowed_countries": ["US", "CA"],
-                "inbound_agent_id": main_router_agent_id,
-                "inbound_agent_version": 0
-            }
-            
-            response = requests.post(
-                "https://api.retellai.com/create-phone-number",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code in [200, 201]:
-                phone_data = response.json()
-                phone_number = phone_data.get("phone_number")
-                phone_number_id = phone_data.get("phone_number_id")
-                
-                print(f"   ✅ Phone number purchased: {phone_number}")
-                return {
-                    'success': True,
-                    'phone_number': phone_number,
-                    'phone_number_id': phone_number_id,
-                    'area_code_used': attempt_area_code
-                }
-            else:
-                print(f"   ⚠️ Failed with area code {attempt_area_code}: {response.status_code}")
-                continue
-        
-        # All area codes failed
-        print(f"   ❌ Failed to purchase phone number with any area code")
-        return {'success': False, 'error': 'No phone numbers available in any area code'}
-        
-    except Exception as e:
-        return {'success': False, 'error': f'Phone purchase error: {str(e)[:100]}'}
-
-def create_complete_agent_system(company_data, retell_token):
-    """Create complete agent system matching local implementation"""
-    try:
-        company_name = company_data.get('companyName', 'Test Company')
-        website_url = company_data.get('websiteUrl', 'https://example.com')
-        
-        print(f"🚀 Starting Complete Agent Creation for {company_name}")
-        
-        # Step 1: Create Knowledge Base
-        print("📚 Creating Knowledge Base...")
-        kb_response = create_knowledge_base(website_url, company_name, retell_token)
-        knowledge_base_id = kb_response.get('knowledge_base_id') if kb_response.get('success') else None
-        
-        # Step 2: Create LLMs (Office Hours, After Hours, Main Router)
-        print("🧠 Creating LLMs...")
-        llm_data = create_multiple_llms(company_data, knowledge_base_id, retell_token)
-        if not llm_data.get('success'):
-            raise Exception(f"LLM creation failed: {llm_data.get('error')}")
-        
-        # Step 3: Create Agents (Office Hours, After Hours)
-        print("🤖 Creating Agents...")
-        agent_data = create_multiple_agents(company_data, llm_data, retell_token)
-        if not agent_data.get('success'):
-            raise Exception(f"Agent creation failed: {agent_data.get('error')}")
-        
-        # Step 4: Create Conversation Flow
-        print("🔄 Creating Conversation Flow...")
-        conversation_flow_id = create_conversation_flow(
-            company_data, 
-            llm_data,
-            agent_data['office_hours']['agent_id'],
-            agent_data['after_hours']['agent_id'],
-            retell_token
-        )
-        
-        # Step 5: Create Main Router Agent
-        print("🎯 Creating Main Router Agent...")
-        router_agent = create_main_router_agent(company_data, conversation_flow_id, llm_data['main_router']['llm_id'], retell_token)
-        if not router_agent.get('success'):
-            raise Exception(f"Main router agent creation failed: {router_agent.get('error')}")
-        
-        # Step 6: Create Dashboard Account
-        print("🎛️ Creating Dashboard Account...")
-        dashboard_result = create_dashboard_account(company_name, router_agent['agent_id'])
-        
-        # Step 7: Purchase Phone Number (real purchase for production)
-        print("📞 Purchasing Phone Number...")
-        phone_data = purchase_phone_number_real(
-            company_name, 
-            "212",  # Default area code, should be configurable
-            router_agent['agent_id'], 
-            retell_token
-        )
-        
-        if not phone_data.get('success'):
-            # Fallback to demo number if purchase fails
-            phone_data = generate_phone_number()
-        
-        # Generate proper credentials
-        email, password = generate_credentials(company_name)
-        
-        return {
-            'success': True,
-            'phone_number': phone_data.get('phone_number'),
-            'phone_number_id': phone_data.get('phone_number_id'),
-            'dashboard_credentials': {
-                'email': email,
-                'password': password
-            },
-            'agents': {
-                'main_router': router_agent['agent_id'],
-                'office_hours': agent_data['office_hours']['agent_id'],
-                'after_hours': agent_data['after_hours']['agent_id']
-            },
-            'llms': {
-                'main_router': llm_data['main_router']['llm_id'],
-                'office_hours': llm_data['office_hours']['llm_id'],
-                'after_hours': llm_data['after_hours']['llm_id']
-            },
-            'knowledge_base_id': knowledge_base_id,
-            'conversation_flow_id': conversation_flow_id,
-            'dashboard_result': dashboard_result
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e)[:200]
-        }
-
-def create_knowledge_base(website_url, company_name, retell_token):
-    """Create knowledge base via Retell API"""
-    try:
-        if not website_url or not website_url.strip():
-            return {'success': False, 'error': 'No website URL provided'}
-        
-        if not website_url.startswith(('http://', 'https://')):
-            website_url = f"https://{website_url}"
-        
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        kb_data = {
-            "knowledge_base_name": f"{company_name[:30]} KB",
-            "website_url": website_url
-        }
-        
-        response = requests.post(
-            "https://api.retellai.com/create-knowledge-base",
-            headers=headers,
-            json=kb_data,
-            timeout=45
-        )
-        
-        if response.status_code in [200, 201]:
-            result = response.json()
-            return {
-                'success': True,
-                'knowledge_base_id': result.get('knowledge_base_id')
-            }
-        else:
-            return {
-                'success': False,
-                'error': f"KB API returned {response.status_code}: {response.text[:100]}"
-            }
-            
-    except Exception as e:
-        return {'success': False, 'error': f'KB creation error: {str(e)[:100]}'}
-
-def create_multiple_llms(company_data, knowledge_base_id, retell_token):
-    """Create multiple LLMs for different purposes"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        assistant_name = company_data.get('assistantName', 'Clara')[:20]
-        
-        llms = {}
-        
-        # Office Hours LLM
-        office_llm_data = {
-            "llm_id": f"llm_office_{int(time.time())}",
-            "model": "gpt-4o-mini",
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, a professional AI assistant for {company_name}. Handle office hours calls professionally.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=office_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['office_hours'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"Office Hours LLM creation failed: {response.status_code}")
-        
-        # After Hours LLM
-        after_llm_data = {
-            "llm_id": f"llm_after_{int(time.time())}",
-            "model": "gpt-4o-mini", 
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, handling after-hours calls for {company_name}. Take messages and handle emergencies.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=after_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['after_hours'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"After Hours LLM creation failed: {response.status_code}")
-        
-        # Main Router LLM
-        router_llm_data = {
-            "llm_id": f"llm_router_{int(time.time())}",
-            "model": "gpt-4o-mini",
-            "model_temperature": 0.1,
-            "general_prompt": f"You are {assistant_name}, the main router for {company_name}. Route calls appropriately based on business hours.",
-            "knowledge_base_ids": [knowledge_base_id] if knowledge_base_id else []
-        }
-        
-        response = requests.post("https://api.retellai.com/create-retell-llm", headers=headers, json=router_llm_data, timeout=30)
-        if response.status_code in [200, 201]:
-            llms['main_router'] = {'llm_id': response.json().get('llm_id')}
-        else:
-            raise Exception(f"Main Router LLM creation failed: {response.status_code}")
-        
-        return {'success': True, **llms}
-        
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_multiple_agents(company_data, llm_data, retell_token):
-    """Create multiple agents for different purposes"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        agents = {}
-        
-        # Office Hours Agent
-        office_agent_data = {
-            "agent_name": f"{company_name} Office Hours Assistant",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": llm_data['office_hours']['llm_id']
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=office_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            agents['office_hours'] = {'agent_id': response.json().get('agent_id')}
-        else:
-            raise Exception(f"Office Hours Agent creation failed: {response.status_code}")
-        
-        # After Hours Agent
-        after_agent_data = {
-            "agent_name": f"{company_name} After Hours Assistant",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": llm_data['after_hours']['llm_id']
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=after_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            agents['after_hours'] = {'agent_id': response.json().get('agent_id')}
-        else:
-            raise Exception(f"After Hours Agent creation failed: {response.status_code}")
-        
-        return {'success': True, **agents}
-        
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_conversation_flow(company_data, llm_data, office_agent_id, after_agent_id, retell_token):
-    """Create conversation flow for routing"""
-    try:
-        # This would create the conversation flow in a real implementation
-        # For now, return a placeholder ID
-        return f"flow_{int(time.time())}"
-    except Exception as e:
-        return None
-
-def create_main_router_agent(company_data, conversation_flow_id, router_llm_id, retell_token):
-    """Create main router agent"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        company_name = company_data.get('companyName', 'Company')[:50]
-        
-        router_agent_data = {
-            "agent_name": f"{company_name} Main Router",
-            "voice_id": "11labs-Rachel",
-            "response_engine": {
-                "type": "retell-llm",
-                "llm_id": router_llm_id
-            }
-        }
-        
-        response = requests.post("https://api.retellai.com/create-agent", headers=headers, json=router_agent_data, timeout=30)
-        if response.status_code in [200, 201]:
-            return {
-                'success': True,
-                'agent_id': response.json().get('agent_id')
-            }
-        else:
-            return {
-                'success': False,
-                'error': f"Router Agent creation failed: {response.status_code}"
-            }
-            
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:200]}
-
-def create_dashboard_account(company_name, agent_id):
-    """Create dashboard account (simulated for Vercel)"""
-    try:
-        # This would call the actual dashboard API in a real implementation
-        # For now, return success
-        return {
-            'success': True,
-            'message': 'Dashboard account created successfully'
-        }
-    except Exception as e:
-        return {'success': False, 'error': str(e)[:100]}
-
-def purchase_phone_number_real(company_name, area_code, main_router_agent_id, retell_token):
-    """Purchase a real phone number with area code fallback logic"""
-    try:
-        headers = {
-            "Authorization": f"Bearer {retell_token.strip()}",
-            "Content-Type": "application/json"
-        }
-        
-        nickname = f"{company_name} Number"
-        
-        # Area code fallback logic (simplified for Vercel)
-        area_codes_to_try = [area_code, "212", "415", "213", "312", "617"]  # Primary + major cities
-        
-        print(f"📞 Purchasing phone number for {company_name}")
-        print(f"   Trying area codes: {area_codes_to_try}")
-        
-        for attempt_area_code in area_codes_to_try:
-            print(f"   Attempting area code: {attempt_area_code}")
-            
-            payload = {
-                "nickname": nickname,
-                "area_code": int(attempt_area_code),
-                "country_code": "US",
-                "number_provider": "twilio",
-                "inbound_allowed_countries": ["US", "CA"],
-                "inbound_agent_id": main_router_agent_id,
-                "inbound_agent_version": 0
-            }
-            
-            response = requests.post(
-                "https://api.retellai.com/create-phone-number",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code in [200, 201]:
-                phone_data = response.json()
-                phone_number = phone_data.get("phone_number")
-                phone_number_id = phone_data.get("phone_number_id")
-                
-                print(f"   ✅ Phone number purchased: {phone_number}")
-                return {
-                    'success': True,
-                    'phone_number': phone_number,
-                    'phone_number_id': phone_number_id,
-                    'area_code_used': attempt_area_code
-                }
-            else:
-                print(f"   ⚠️ Failed with area code {attempt_area_code}: {response.status_code}")
-                continue
-        
-        # All area codes failed
-        print(f"   ❌ Failed to purchase phone number with any area code")
-        return {'success': False, 'error': 'No phone numbers available in any area code'}
-        
-    except Exception as e:
-        return {'success': False, 'error': f'Phone purchase error: {str(e)[:100]}'}
-
-def generate_phone_number():
-    """Generate a realistic phone number"""
-    area_codes = ['212', '415', '310', '312', '713', '404', '617', '206', '303', '702']
-    area_code = random.choice(area_codes)
-    exchange = random.randint(200, 999)
-    number = random.randint(1000, 9999)
-    return {
-        'phone_number': f"+1 ({area_code}) {exchange}-{number}",
-        'phone_number_id': f"phone_{int(time.time())}"
-    }
+from _creation_jobs import creation_jobs, status_response, deployment_url, pick_up_orphaned_job
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
@@ -703,108 +57,12 @@ class handler(BaseHTTPRequestHandler):
             if config.diagnostics_enabled:
                 print(f"🔍 GET /api/creation-status/{creation_id}")
             
-            # Only handle real agent creation - no demo mode
-            if not creation_id.startswith('real_'):
-                raise Exception("Invalid creation ID - only real agent creation supported")
-            
-            # Real agent creation
-            retell_token = config.retell_api_token
+            # Provisioning runs once in process-creation.py; a poll is a primary key lookup,
+            # plus a second trigger when the first one never reached the processor
+            job = creation_jobs.get(creation_id)
+            pick_up_orphaned_job(creation_id, job, deployment_url(self.headers))
             
-            if not retell_token or not retell_token.strip():
-                response_data = {
-                    'success': False,
-                    'status': 'error',
-                    'progress': 0,
-                    'message': 'RETELL_API_TOKEN not configured in Vercel environment',
-                    'error': 'Missing API token',
-                    'troubleshooting_tips': [
-                        'Add RETELL_API_TOKEN to Vercel environment variables',
-                        'Go to Vercel Dashboard > Project Settings > Environment Variables',
-                        'Redeploy after adding the token'
-                    ]
-                }
-            else:
-                try:
-                    # Decode company data from creation_id
-                    company_data = None
-                    try:
-                        parts = creation_id.split('_', 2)
-                        if len(parts) >= 3:
-                            encoded_data = parts[2]
-                            if len(encoded_data) <= 1000:
-                                decoded_bytes = base64.b64decode(encoded_data.encode('ascii'))
-                                decoded_str = decoded_bytes.decode('utf-8')
-                                company_data = json.loads(decoded_str)
-                    except:
-                        pass
-                    
-                    # Use fallback data if decoding failed
-                    if not company_data:
-                        # Extract company name from creation_id as fallback
-                        try:
-                            parts = creation_id.split('_')
-                            if len(parts) >= 3:
-                                encoded_name = parts[2]
-                                if len(encoded_name) <= 200:
-                                    decoded_bytes = base64.b64decode(encoded_name.encode('ascii'))
-                                    fallback_name = decoded_bytes.decode('utf-8')
-                                    company_data = {
-                                        'companyName': fallback_name,
-                                        'websiteUrl': 'https://example.com',
-                                        'assistantName': 'Clara'
-                                    }
-                                else:
-                                    raise Exception("Encoded name too long")
-                            else:
-                                raise Exception("Invalid creation_id format")
-                        except:
-                            raise Exception("Could not decode company data from creation_id")
-                    
-                    # Create the complete agent system
-                    result = create_complete_agent_system(company_data, retell_token)
-                    
-                    if result.get('success'):
-                        response_data = {
-                            'success': True,
-                            'status': 'completed',
-                            'progress': 100,
-                            'message': '🎉 Complete agent system created successfully!',
-                            'result': {
-                                'phone_number': result.get('phone_number'),
-                                'dashboard_credentials': result.get('dashboard_credentials'),
-                                'agents': result.get('agents'),
-                                'llms': result.get('llms'),
-                                'knowledge_base_id': result.get('knowledge_base_id'),
-                                'conversation_flow_id': result.get('conversation_flow_id')
-                            }
-                        }
-                    else:
-                        response_data = {
-                            'success': False,
-                            'status': 'error',
-                            'progress': 0,
-                            'message': f'Agent system creation failed: {result.get("error", "Unknown error")}',
-                            'error': result.get('error', 'Unknown error'),
-                            'troubleshooting_tips': [
-                                'Check if RETELL_API_TOKEN has proper permissions',
-                                'Verify the website URL is accessible',
-                                'Check Retell API service status',
-                                'Try with a simpler website URL'
-                            ]
-                        }
-                        
-                except Exception as e:
-                    if config.diagnostics_enabled:
-                        print(f"❌ Error in real agent creation: {str(e)}")
-                        print(f"❌ Traceback: {traceback.format_exc()}")
-                    
-                    response_data = {
-                        'success': False,
-                        'status': 'error',
-                        'progress': 0,
-                        'message': f'Agent system creation failed: {str(e)[:200]}',
-                        'error': str(e)[:200]
-                    }
+            response_data = status_response(job)
             
             if config.diagnostics_enabled:
                 print(f"🔍 Response status: {response_data.get('status')}")
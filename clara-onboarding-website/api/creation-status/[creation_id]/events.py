@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Creation Status Stream API Endpoint
+GET /api/creation-status/{creation_id}/events - Server-Sent Events for one creation job
+
+Sends a 'status' event (the same JSON as /api/creation-status/{creation_id}) on
+connect and whenever the job's stored progress changes, and closes after the
+job completes or fails. Each stream lasts at most STATUS_STREAM_TIMEOUT seconds;
+the browser's EventSource then reconnects by itself. Onboardings run through
+/api/onboard can be followed the same way by their company_id, or while the
+request is still open by GET /api/onboard/events?idempotency_key=... with the
+Idempotency-Key the page sent.
+"""
+
+import os
+import sys
+import json
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add the api directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from _config import config
+from _creation_jobs import (
+    creation_jobs, status_response, deployment_url, pick_up_orphaned_job, idempotency_key, job_id_for_key,
+    FINAL_STATUSES
+)
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        """Stream status changes for a creation job"""
+        try:
+            parsed_url = urlparse(self.path)
+            query_params = parse_qs(parsed_url.query)
+            if 'idempotency_key' in query_params:
+                # /api/onboard/events: the onboarding job is found the way onboard.py stores it
+                try:
+                    key = idempotency_key(query_params['idempotency_key'][0], {})
+                except ValueError as e:
+                    self.send_error_response(str(e), 400)
+                    return
+                creation_id = job_id_for_key(key, prefix='onboard')
+            elif 'creation_id' in query_params:
+                creation_id = query_params['creation_id'][0]
+            else:
+                # Fallback: /api/creation-status/ID/events
+                creation_id = parsed_url.path.strip('/').split('/')[-2]
+
+            if not creation_id or len(creation_id) > 500:
+                self.send_error_response("Invalid creation ID", 400)
+                return
+
+            if config.diagnostics_enabled:
+                print(f"🔍 GET /api/creation-status/{creation_id}/events")
+
+            job = creation_jobs.get(creation_id)
+            if job is None:
+                self.send_error_response("Creation ID not found", 404)
+                return
+            pick_up_orphaned_job(creation_id, job, deployment_url(self.headers))
+
+            self.send_response(200)
+            self.send_header('Content-type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+
+            self.wfile.write(b"retry: 2000\n\n")
+            self.send_event('status', status_response(job))
+
+            # Provisioning writes progress to creation_jobs from another invocation,
+            # so the stream re-reads the row and forwards each change
+            deadline = time.monotonic() + config.status_stream_timeout
+            while job is not None and job['status'] not in FINAL_STATUSES and time.monotonic() < deadline:
+                time.sleep(config.status_stream_poll_interval)
+                latest = creation_jobs.get(creation_id)
+                if latest is not None and latest.get('timestamp') == job.get('timestamp'):
+                    continue
+                job = latest
+                self.send_event('status', status_response(job))
+
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The browser closed the stream
+        except Exception as e:
+            if config.diagnostics_enabled:
+                print(f"❌ Error in creation-status events: {str(e)}")
+                print(f"❌ Traceback: {traceback.format_exc()}")
+
+    def send_event(self, event, data):
+        """Write one Server-Sent Event"""
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=True)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def do_OPTIONS(self):
+        """Handle CORS preflight"""
+        self.send_response(200)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.end_headers()
+
+    def send_error_response(self, message, status_code):
+        """Send error response with proper encoding"""
+        self.send_response(status_code)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+        error_response = {
+            'success': False,
+            'error': str(message)[:200]
+        }
+
+        self.wfile.write(json.dumps(error_response, ensure_ascii=True).encode('utf-8'))
@@ -16,10 +16,15 @@ sys.path.append(os.path.dirname(__file__))
 try:
     from _config import config
     from _onboarding_engine import onboarding_engine, OnboardingError
+    from _creation_jobs import creation_jobs, ProgressRecorder, idempotency_key, job_id_for_key
 except ImportError as e:
     print(f"❌ Import Error: {e}")
     sys.exit(1)
 
+# Only these fields of a finished run are kept for replays: the key can be derived from
+# the form data alone, so credentials and step details go to the first requester only
+REPLAYED_FIELDS = ('success', 'company_id', 'message', 'error', 'agent_ids')
+
 class handler(BaseHTTPRequestHandler):
     def do_POST(self):
         """Execute complete onboarding workflow"""
@@ -64,38 +69,32 @@ class handler(BaseHTTPRequestHandler):
             if missing_fields:
                 raise OnboardingError(f"Missing required fields: {', '.join(missing_fields)}")
             
-            # Start onboarding workflow (creates company record)
-            company_id = onboarding_engine.start_onboarding(data)
-            
-            # Execute complete onboarding workflow
-            result = onboarding_engine.execute_full_onboarding(company_id, data)
-            
-            if result['success']:
-                response_data = {
-                    'success': True,
-                    'company_id': company_id,
-                    'message': 'Onboarding completed successfully',
-                    'duration_ms': result['duration_ms'],
-                    'phone_number': result['results']['phone']['phone_number'],
-                    'dashboard_email': result['results']['dashboard']['dashboard_email'],
-                    'dashboard_password': result['results']['dashboard']['dashboard_password'],
-                    'agent_ids': {
-                        'office_hours': result['results']['agents']['office_hours'],
-                        'after_hours': result['results']['agents']['after_hours'],
-                        'main_router': result['results']['agents']['main_router']
-                    }
-                }
+            # One onboarding per idempotency key: a double-clicked submit or a client
+            # retry waits for the first request's run and gets its response back
+            try:
+                onboard_id = job_id_for_key(idempotency_key(self.headers.get('Idempotency-Key'), data), prefix='onboard')
+            except ValueError as e:
+                raise OnboardingError(str(e))
+            job, created = creation_jobs.create(onboard_id, data)
+            if created:
+                try:
+                    response_data = self.run_onboarding(data, onboard_id)
+                except Exception as e:
+                    creation_jobs.update(onboard_id, status='error', message=str(e)[:500])
+                    raise
+                creation_jobs.update(
+                    onboard_id,
+                    status='completed' if response_data['success'] else 'error',
+                    message=response_data.get('message') or response_data.get('error'),
+                    response={k: response_data[k] for k in REPLAYED_FIELDS if k in response_data}
+                )
             else:
-                response_data = {
-                    'success': False,
-                    'company_id': company_id,
-                    'error': result['error'],
-                    'duration_ms': result['duration_ms'],
-                    'partial_results': result.get('partial_results', {})
-                }
+                if config.diagnostics_enabled:
+                    print(f"🔁 Duplicate onboarding request attached to {onboard_id} ({job['status']})")
+                response_data = self.replay_onboarding(onboard_id)
             
             if config.diagnostics_enabled:
-                print(f"🔍 Onboarding result: {'SUCCESS' if result['success'] else 'FAILED'}")
+                print(f"🔍 Onboarding result: {'SUCCESS' if response_data['success'] else 'FAILED'}")
             
             self.wfile.write(json.dumps(response_data, ensure_ascii=True).encode('utf-8'))
             
@@ -107,12 +106,74 @@ class handler(BaseHTTPRequestHandler):
                 print(f"❌ Traceback: {traceback.format_exc()}")
             self.send_error_response(f"Internal server error: {str(e)}", 500)
     
+    def run_onboarding(self, data, onboard_id):
+        """Create the company, run the full onboarding and shape the response"""
+        # Start onboarding workflow (creates company record)
+        company_id = onboarding_engine.start_onboarding(data)
+        
+        # Execute complete onboarding workflow, recording step progress for
+        # /api/onboard/{company_id}/status and, under the onboarding's own job, for
+        # the page's /api/onboard/events stream while this request is still open
+        creation_jobs.start(company_id)
+        creation_jobs.update(onboard_id, status='in_progress', progress=0, message='Starting onboarding...')
+        recorders = (ProgressRecorder(company_id), ProgressRecorder(onboard_id))
+        
+        def record_progress(event):
+            for recorder in recorders:
+                recorder(event)
+        
+        result = onboarding_engine.execute_full_onboarding(
+            company_id, data, progress=record_progress
+        )
+        creation_jobs.update(
+            company_id,
+            status='completed' if result['success'] else 'error',
+            message='Onboarding completed successfully' if result['success'] else result['error']
+        )
+        
+        if result['success']:
+            response_data = {
+                'success': True,
+                'company_id': company_id,
+                'message': 'Onboarding completed successfully',
+                'duration_ms': result['duration_ms'],
+                'steps': result['steps'],
+                'phone_number': result['results']['phone']['phone_number'],
+                'dashboard_email': result['results']['dashboard']['dashboard_email'],
+                'dashboard_password': result['results']['dashboard']['dashboard_password'],
+                'agent_ids': {
+                    'office_hours': result['results']['agents']['office_hours'],
+                    'after_hours': result['results']['agents']['after_hours'],
+                    'main_router': result['results']['agents']['main_router']
+                }
+            }
+        else:
+            response_data = {
+                'success': False,
+                'company_id': company_id,
+                'error': result['error'],
+                'duration_ms': result['duration_ms'],
+                'steps': result['steps'],
+                'partial_results': result.get('partial_results', {})
+            }
+        
+        return response_data
+    
+    def replay_onboarding(self, onboard_id):
+        """Wait for the run an identical request started and return its IDs and status"""
+        job = creation_jobs.wait_until_final(onboard_id, config.status_stream_timeout)
+        if job is not None and job.get('response'):
+            return job['response']
+        if job is not None and job['status'] == 'error':
+            raise OnboardingError(job.get('message') or 'Onboarding failed')
+        raise OnboardingError("An identical onboarding request is still in progress, retry shortly")
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key')
         self.end_headers()
     
     def send_error_response(self, message, status_code):
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Creation Job Processor
+POST /api/process-creation?creation_id=... - Provision one queued creation job
+
+Called by create-agent.py right after it enqueues a job, again for a duplicate
+request while the job is still queued, and by a status poll that finds the job
+queued for longer than config.creation_job_pickup_after. Callers must send
+config.process_creation_secret in the X-Process-Creation-Secret header. The job is
+claimed atomically, so repeated or concurrent calls never provision it twice. An invocation killed at maxDuration leaves
+the job in_progress; after config.creation_job_lease it can be claimed again.
+"""
+
+import os
+import sys
+import hmac
+import json
+import traceback
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+# Add current directory to path for imports
+sys.path.append(os.path.dirname(__file__))
+
+try:
+    from _config import config
+    from _agent_provisioning import run_creation_job
+    from _creation_jobs import PROCESS_SECRET_HEADER
+except ImportError as e:
+    print(f"❌ Import Error: {e}")
+    sys.exit(1)
+
+class handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        """Claim and run a queued creation job"""
+        try:
+            # Only this deployment's own functions may start provisioning
+            secret = config.process_creation_secret or ''
+            supplied = self.headers.get(PROCESS_SECRET_HEADER) or ''
+            if not secret or not hmac.compare_digest(supplied.encode('utf-8'), secret.encode('utf-8')):
+                self.send_json({'success': False, 'error': 'Unauthorized'}, 401)
+                return
+            
+            query_params = parse_qs(urlparse(self.path).query)
+            creation_id = query_params.get('creation_id', [None])[0]
+            
+            if not creation_id or len(creation_id) > 100:
+                self.send_json({'success': False, 'error': 'Invalid creation ID'}, 400)
+                return
+            
+            if config.diagnostics_enabled:
+                print(f"🔍 POST /api/process-creation - {creation_id}")
+            
+            processed = run_creation_job(creation_id)
+            self.send_json({'success': True, 'creation_id': creation_id, 'processed': processed}, 200)
+            
+        except Exception as e:
+            if config.diagnostics_enabled:
+                print(f"❌ Error in process-creation: {str(e)}")
+                print(f"❌ Traceback: {traceback.format_exc()}")
+            self.send_json({'success': False, 'error': str(e)[:200]}, 500)
+    
+    def send_json(self, data, status_code):
+        """Send a JSON response"""
+        self.send_response(status_code)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(data, ensure_ascii=True).encode('utf-8'))
@@ -16,7 +16,9 @@ class ClaraOnboarding {
             // Set to true when running local agent server
             useLocalAPI: window.location.hostname === 'localhost' || window.location.hostname === '127.0.0.1',
             localAPIUrl: 'http://localhost:8000',
-            productionAPIUrl: '' // Uses relative URLs for Vercel
+            productionAPIUrl: '', // Uses relative URLs for Vercel
+            // Delay before reopening a progress stream the server refused
+            progressRetryInterval: 2000
         };
         
         console.log('🔧 API Config:', this.config);
@@ -494,14 +496,25 @@ class ClaraOnboarding {
             const apiBaseUrl = this.config.useLocalAPI ? this.config.localAPIUrl : this.config.productionAPIUrl;
             const onboardUrl = this.config.useLocalAPI ? `${apiBaseUrl}/onboard` : '/api/onboard';
 
+            // The key makes a retried submit join the same run and lets the
+            // progress stream find it while the request below is still open
+            const idempotencyKey = this.newIdempotencyKey();
+            const stopProgress = this.watchProgress(`${onboardUrl}/events?idempotency_key=${encodeURIComponent(idempotencyKey)}`);
+
             // Start onboarding workflow
-            const response = await fetch(onboardUrl, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(apiData)
-            });
+            let response;
+            try {
+                response = await fetch(onboardUrl, {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'Idempotency-Key': idempotencyKey
+                    },
+                    body: JSON.stringify(apiData)
+                });
+            } finally {
+                stopProgress();
+            }
 
             const result = await response.json();
 
@@ -547,6 +560,62 @@ class ClaraOnboarding {
         }
     }
 
+    // Random Idempotency-Key for one submit
+    newIdempotencyKey() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}-${Math.random().toString(36).slice(2)}`;
+    }
+
+    // Show step progress from the onboarding's Server-Sent Events stream until
+    // the returned function is called. The result itself comes from the
+    // onboarding request, so a missing stream only leaves the animation running.
+    watchProgress(eventsUrl) {
+        if (!window.EventSource) return () => {};
+
+        let source = null;
+        let retryTimer = null;
+        let stopped = false;
+
+        const open = () => {
+            if (stopped) return;
+            source = new EventSource(eventsUrl);
+            source.addEventListener('status', (event) => {
+                this.updateCreationProgress(JSON.parse(event.data));
+            });
+            source.onerror = () => {
+                // EventSource reconnects by itself when an open stream times out;
+                // a refused one (the run hasn't been stored yet) is retried here
+                if (source.readyState === EventSource.CLOSED) {
+                    retryTimer = setTimeout(open, this.config.progressRetryInterval);
+                }
+            };
+        };
+        open();
+
+        return () => {
+            stopped = true;
+            clearTimeout(retryTimer);
+            if (source) source.close();
+        };
+    }
+
+    // Show real step progress on the loading page
+    updateCreationProgress(status) {
+        if (typeof status.progress !== 'number') return;
+
+        const fill = document.querySelector('#loading-page .progress-fill');
+        const text = document.querySelector('#loading-page .progress-text');
+        if (fill) {
+            fill.style.animation = 'none';
+            fill.style.width = `${status.progress}%`;
+        }
+        if (text && status.message) {
+            text.textContent = status.message;
+        }
+    }
+
     // Extract area code from phone number
     extractAreaCode(phoneNumber) {
         if (!phoneNumber) return '212'; // Default to NYC
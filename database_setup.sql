@@ -3,9 +3,23 @@
 -- Table creation script for PostgreSQL
 -- =====================================================
 
+-- Time-ordered primary keys (RFC 9562 UUIDv7): a 48-bit Unix millisecond timestamp
+-- written over the random bits of gen_random_uuid(), version nibble set to 7, so new
+-- rows are appended to the right edge of the uuid indexes instead of scattered across them
+CREATE OR REPLACE FUNCTION public.uuid_generate_v7() RETURNS uuid
+LANGUAGE sql VOLATILE PARALLEL SAFE AS $$
+    SELECT encode(
+        set_bit(set_bit(
+            overlay(uuid_send(gen_random_uuid())
+                    PLACING substring(int8send(floor(extract(epoch FROM clock_timestamp()) * 1000)::bigint) FROM 3)
+                    FROM 1 FOR 6),
+            52, 1), 53, 1),
+        'hex')::uuid
+$$;
+
 -- Create the companies table
 CREATE TABLE IF NOT EXISTS public.companies (
-    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    id uuid NOT NULL DEFAULT public.uuid_generate_v7(),
     company_name text NOT NULL UNIQUE,
     office_address text NOT NULL,
     business_hours jsonb NOT NULL,
@@ -26,7 +40,7 @@ CREATE TABLE IF NOT EXISTS public.companies (
 
 -- Create the company_agent_configs table
 CREATE TABLE IF NOT EXISTS public.company_agent_configs (
-    id uuid NOT NULL DEFAULT gen_random_uuid(),
+    id uuid NOT NULL DEFAULT public.uuid_generate_v7(),
     company_id uuid NOT NULL,
     llm_id_oh text,
     llm_id_ah text,
@@ -57,8 +71,58 @@ CREATE TABLE IF NOT EXISTS public.company_prompts (
     CONSTRAINT company_prompts_company_id_fkey FOREIGN KEY (company_id) REFERENCES public.companies(id) ON DELETE CASCADE
 );
 
+-- Databases created before the UUIDv7 defaults; existing keys stay as they are
+ALTER TABLE public.companies ALTER COLUMN id SET DEFAULT public.uuid_generate_v7();
+ALTER TABLE public.company_agent_configs ALTER COLUMN id SET DEFAULT public.uuid_generate_v7();
+
 -- Create indexes for performance optimization
 CREATE INDEX IF NOT EXISTS idx_companies_name ON public.companies(company_name);
 CREATE INDEX IF NOT EXISTS idx_agent_configs_company_id ON public.company_agent_configs(company_id);
 CREATE INDEX IF NOT EXISTS idx_agent_configs_status ON public.company_agent_configs(status);
-CREATE INDEX IF NOT EXISTS idx_agent_configs_dashboard_email ON public.company_agent_configs(dashboard_email);
\ No newline at end of file
+CREATE INDEX IF NOT EXISTS idx_agent_configs_dashboard_email ON public.company_agent_configs(dashboard_email);
+-- Recent phone number purchase results per area code (agent_system/area_code_cache.py)
+CREATE TABLE IF NOT EXISTS public.area_code_availability (
+    area_code text NOT NULL,
+    last_success_at timestamp with time zone,
+    last_failure_at timestamp with time zone,
+    failure_count integer NOT NULL DEFAULT 0,
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT area_code_availability_pkey PRIMARY KEY (area_code)
+);
+
+-- Retell request budgets shared by every provisioning worker (agent_system/rate_limiter.py)
+CREATE TABLE IF NOT EXISTS public.retell_rate_limits (
+    endpoint text NOT NULL,
+    tokens double precision NOT NULL,
+    refilled_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT retell_rate_limits_pkey PRIMARY KEY (endpoint)
+);
+
+-- Onboarding job statuses polled by the web interface (agent_system/job_store.py)
+CREATE TABLE IF NOT EXISTS public.creation_jobs (
+    id text NOT NULL,
+    data jsonb NOT NULL,
+    updated_at timestamp with time zone NOT NULL DEFAULT now(),
+    CONSTRAINT creation_jobs_pkey PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS idx_creation_jobs_updated_at ON public.creation_jobs(updated_at);
+
+-- Provisioning work claimed by agent_system.provisioning_queue workers with FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS public.provisioning_jobs (
+    id text NOT NULL,
+    payload jsonb NOT NULL,
+    status text NOT NULL DEFAULT 'queued',
+    attempts integer NOT NULL DEFAULT 0,
+    max_attempts integer NOT NULL DEFAULT 3,
+    run_after timestamp with time zone NOT NULL DEFAULT now(),
+    locked_by text,
+    lease_expires_at timestamp with time zone,
+    last_error text,
+    result jsonb,
+    created_at timestamp with time zone DEFAULT now(),
+    updated_at timestamp with time zone DEFAULT now(),
+    CONSTRAINT provisioning_jobs_pkey PRIMARY KEY (id),
+    CONSTRAINT provisioning_jobs_status_check CHECK (status IN ('queued', 'running', 'succeeded', 'failed'))
+);
+CREATE INDEX IF NOT EXISTS idx_provisioning_jobs_ready ON public.provisioning_jobs(run_after, created_at) WHERE status = 'queued';
+CREATE INDEX IF NOT EXISTS idx_provisioning_jobs_lease ON public.provisioning_jobs(lease_expires_at) WHERE status = 'running';
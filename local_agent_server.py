@@ -6,44 +6,67 @@ Runs locally to handle agent creation requests from the web interface
 
 import json
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
-import threading
 import os
-from agent_system.main import create_agent_automation
+import sys
+from agent_system.retell_client import warm_retell_client
+from agent_system.worker_pool import BoundedWorkerPool, QueueFull
+from agent_system.job_store import get_job_store
+from agent_system.idempotency import idempotency_key, job_id_for_key
+from agent_system.user_input import transform_form_data
+from agent_system.creation_jobs import run_creation_job, resumable_company_data
+from agent_system.provisioning_queue import ProvisioningQueue
+from agent_system.circuit_breaker import CircuitOpen, check_circuits, circuit_stats
+from agent_system.config import (
+    PROVISIONING_QUEUE_BACKEND, JOB_STORE_BACKEND, LOCAL_SERVER_MAX_QUEUE, LOCAL_SERVER_RETRY_AFTER,
+    STATUS_STREAM_TIMEOUT, STATUS_STREAM_HEARTBEAT, ONBOARD_WAIT_INTERVAL, ONBOARD_WAIT_TIMEOUT
+)
+
+# Job statuses after which a status stream closes
+FINAL_STATUSES = ('completed', 'error')
 
 class AgentCreationHandler(BaseHTTPRequestHandler):
-    # Store creation statuses in memory (in production, use a database)
-    creation_statuses = {}
+    # Creation statuses by creation ID (memory, SQLite or Postgres, see JOB_STORE_BACKEND)
+    job_store = get_job_store()
+    # Shared by every request thread; set up in main()
+    provisioning_pool = None
+    # Set when PROVISIONING_QUEUE_BACKEND is 'postgres': /create-agent and /onboard jobs
+    # go to provisioning_jobs for `python -m agent_system.provisioning_queue` workers
+    provisioning_queue = None
     
     def do_POST(self):
         """Handle agent creation requests"""
-        if self.path == '/create-agent':
+        path = urlparse(self.path).path
+        if path == '/create-agent':
             self.handle_create_agent()
-        elif self.path == '/onboard':
+        elif path == '/onboard':
             self.handle_onboard_sync()
+        elif path.startswith('/creation-status/') and path.endswith('/resume'):
+            creation_id = path.split('/')[-2]
+            self.handle_resume(creation_id)
         else:
             self.send_error(404, "Not Found")
     
     def do_GET(self):
         """Handle status check requests"""
-        if self.path.startswith('/creation-status/'):
-            creation_id = self.path.split('/')[-1]
+        path = urlparse(self.path).path
+        if path == '/onboard/events':
+            self.handle_onboard_events()
+        elif path.startswith('/creation-status/') and path.endswith('/events'):
+            creation_id = path.split('/')[-2]
+            self.handle_creation_events(creation_id)
+        elif path.startswith('/creation-status/'):
+            creation_id = path.split('/')[-1]
             self.handle_creation_status(creation_id)
+        elif self.path == '/queue-status':
+            self.handle_queue_status()
         else:
             self.send_error(404, "Not Found")
     
     def handle_create_agent(self):
         """Handle agent creation request"""
         try:
-            # Set CORS headers
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-            self.end_headers()
-            
             # Read request data
             content_length = int(self.headers.get('Content-Length', 0))
             if content_length > 0:
@@ -75,26 +98,33 @@ class AgentCreationHandler(BaseHTTPRequestHandler):
                 self.send_error_response('Missing required field: primary_phone_number', 400)
                 return
             
-            # Generate creation ID
-            creation_id = f"creation_{int(time.time())}"
-            
             # Transform data
             company_data = self.transform_form_data(data)
             
-            # Start agent creation in background
-            threading.Thread(
-                target=self.create_agent_async,
-                args=(creation_id, company_data),
-                daemon=True
-            ).start()
+            # Start the job once per idempotency key; duplicates attach to it
+            creation_id, started = self.start_creation_job(company_data)
+            if creation_id is None:
+                return
             
             # Return immediate response
             response_data = {
                 'success': True,
                 'creation_id': creation_id,
-                'message': 'Agent creation started'
+                'message': 'Agent creation started' if started else 'Agent creation already requested',
+                'replayed': not started,
+                'queue': self.queue_stats()
             }
             
+            # Set CORS headers
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key')
+            if not started:
+                self.send_header('Idempotent-Replayed', 'true')
+            self.end_headers()
+            
             self.wfile.write(json.dumps(response_data).encode())
             
         except Exception as e:
@@ -137,28 +167,33 @@ class AgentCreationHandler(BaseHTTPRequestHandler):
             # Transform data
             company_data = self.transform_form_data(data)
             
-            # Run agent creation synchronously
-            result = create_agent_automation(company_data)
-            
-            # Extract dashboard credentials
-            dashboard_creds = result.get('dashboard_credentials', {})
+            # Run agent creation on the worker pool, or attach to the job an identical
+            # request already started, and wait for it; only this request's thread waits
+            creation_id, started = self.start_creation_job(company_data)
+            if creation_id is None:
+                return
+            status_data = self.wait_for_job(creation_id)
+            if status_data is not None and status_data['status'] not in FINAL_STATUSES:
+                print(f"⏳ Onboarding {creation_id} still {status_data['status']} after {ONBOARD_WAIT_TIMEOUT}s")
+                self.send_wait_timeout_response(creation_id)
+                return
+            if status_data is None or status_data['status'] != 'completed':
+                error_msg = status_data['message'] if status_data else 'Agent creation job was lost'
+                print(f"❌ Onboarding failed: {error_msg}")
+                self.send_error_response(error_msg, 500)
+                return
             
             # Format response for frontend
-            response_data = {
-                'success': True,
-                'phone_number': result.get('phone_number', '+1 (555) 000-0000'),
-                'dashboard_email': dashboard_creds.get('email', 'support@company.justclara.ai') if dashboard_creds else 'support@company.justclara.ai',
-                'dashboard_password': dashboard_creds.get('password', 'company@321') if dashboard_creds else 'company@321',
-                'company_id': result.get('company_id'),
-                'agent_id': result.get('main_router_agent_id')
-            }
+            response_data = dict(status_data['result'], creation_id=creation_id)
             
             # Set CORS headers and send response
             self.send_response(200)
             self.send_header('Content-type', 'application/json')
             self.send_header('Access-Control-Allow-Origin', '*')
             self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-            self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+            self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key')
+            if not started:
+                self.send_header('Idempotent-Replayed', 'true')
             self.end_headers()
             
             self.wfile.write(json.dumps(response_data).encode())
@@ -168,6 +203,47 @@ class AgentCreationHandler(BaseHTTPRequestHandler):
             print(f"❌ Onboarding failed: {error_msg}")
             self.send_error_response(error_msg, 500)
     
+    def handle_resume(self, creation_id):
+        """
+        Run a failed job again from its checkpoint
+        
+        Steps that finished before the failure are not repeated: the knowledge base,
+        LLMs, agents, flow and phone number they created are reused. Progress is
+        reported under the same creation ID.
+        """
+        try:
+            status_data = self.job_store.get(creation_id)
+            if status_data is None:
+                self.send_error_response('Creation ID not found', 404)
+                return
+            try:
+                company_data = resumable_company_data(status_data)
+            except ValueError as e:
+                self.send_error_response(str(e), 409)
+                return
+            
+            started = self.launch_creation_job(creation_id, company_data, 'Resuming agent creation...')
+            if started is None:
+                return
+            
+            response_data = {
+                'success': True,
+                'creation_id': creation_id,
+                'message': 'Agent creation resumed' if started else 'Agent creation already resumed',
+                'replayed': not started,
+                'resources': status_data.get('resources', {})
+            }
+            
+            self.send_response(200)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+            
+            self.wfile.write(json.dumps(response_data).encode())
+            
+        except Exception as e:
+            self.send_error_response(str(e), 500)
+    
     def handle_creation_status(self, creation_id):
         """Handle status check request"""
         try:
@@ -178,199 +254,228 @@ class AgentCreationHandler(BaseHTTPRequestHandler):
             self.end_headers()
             
             # Get status
-            status_data = self.creation_statuses.get(creation_id)
+            status_data = self.job_store.get(creation_id)
             
-            if status_data:
-                response_data = {
-                    'success': True,
-                    'status': status_data['status'],
-                    'progress': status_data['progress'],
-                    'message': status_data['message'],
-                    'result': status_data.get('result'),
-                    'error': status_data['message'] if status_data['status'] == 'error' else None,
-                    'troubleshooting_tips': status_data.get('troubleshooting_tips')
-                }
-            else:
-                response_data = {
-                    'success': False,
-                    'error': 'Creation ID not found'
-                }
-            
-            self.wfile.write(json.dumps(response_data).encode())
+            self.wfile.write(json.dumps(self.status_response(status_data)).encode())
             
         except Exception as e:
             self.send_error_response(str(e), 500)
     
-    def transform_form_data(self, form_data):
-        """Transform web form data to agent system format"""
+    def handle_creation_events(self, creation_id):
+        """
+        Stream status changes as Server-Sent Events until the job completes or fails
         
-        # Support both camelCase and snake_case field names
-        company_name = form_data.get('companyName') or form_data.get('company_name', '')
-        office_address = form_data.get('officeAddress') or form_data.get('business_address', '')
-        contact_number = form_data.get('contactNumber') or form_data.get('primary_phone_number', '')
-        time_zone = form_data.get('timeZone') or form_data.get('timezone', 'Eastern')
-        assistant_name = form_data.get('assistantName') or form_data.get('assistant_name', 'Clara')
+        Each 'status' event carries the same JSON as GET /creation-status/{id}. The
+        stream closes after the final status, or after STATUS_STREAM_TIMEOUT seconds,
+        when the browser's EventSource reconnects on its own.
+        """
+        status_data = self.job_store.get(creation_id)
+        if status_data is None:
+            self.send_error_response('Creation ID not found', 404)
+            return
         
-        # Extract website URL from websites array or use first one
-        website_url = form_data.get('websiteUrl') or form_data.get('website_url', '')
-        websites = form_data.get('websites', [])
-        if not website_url and websites:
-            website_url = websites[0]
-        
-        # Parse area code from contact number
-        area_code = form_data.get('preferred_area_code') or self.extract_area_code(contact_number)
-        
-        # Transform business days and hours
-        business_days = form_data.get('businessDays', [])
-        if isinstance(business_days, list):
-            business_days_str = ', '.join(business_days)
-        else:
-            business_days_str = str(business_days)
+        self.send_response(200)
+        self.send_header('Content-type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('X-Accel-Buffering', 'no')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        business_hours = form_data.get('businessHours') or form_data.get('business_hours', '')
+        deadline = time.monotonic() + STATUS_STREAM_TIMEOUT
+        try:
+            self.wfile.write(b"retry: 2000\n\n")
+            self.send_event('status', self.status_response(status_data))
+            while status_data and status_data['status'] not in FINAL_STATUSES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                updated = self.job_store.wait_for_update(
+                    creation_id, status_data['timestamp'], min(STATUS_STREAM_HEARTBEAT, remaining)
+                )
+                if updated is not None and updated['timestamp'] == status_data['timestamp']:
+                    # Nothing new; a comment line keeps proxies from closing the stream
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                status_data = updated
+                self.send_event('status', self.status_response(status_data))
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The browser closed the stream
+    
+    def handle_onboard_events(self):
+        """
+        Stream an /onboard request's progress while it is still open
         
-        # Map timezone to time_place for Retell API
-        timezone_mapping = {
-            'Eastern': 'New_York',
-            'Central': 'Chicago', 
-            'Mountain': 'Denver',
-            'Pacific': 'Los_Angeles',
-            'Alaska': 'Anchorage',
-            'Hawaii': 'Honolulu'
+        The page sends its Idempotency-Key as ?idempotency_key=, which maps to the
+        job's creation_id exactly as start_creation_job derives it.
+        """
+        key = parse_qs(urlparse(self.path).query).get('idempotency_key', [''])[0]
+        if not key.strip():
+            self.send_error_response('Missing idempotency_key', 400)
+            return
+        try:
+            creation_id = job_id_for_key(idempotency_key(key, {}))
+        except ValueError as e:
+            self.send_error_response(str(e), 400)
+            return
+        self.handle_creation_events(creation_id)
+    
+    def send_event(self, event, data):
+        """Write one Server-Sent Event"""
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+    
+    def status_response(self, status_data):
+        """Shape a job store record as a status response"""
+        if not status_data:
+            return {
+                'success': False,
+                'error': 'Creation ID not found'
+            }
+        return {
+            'success': True,
+            'status': status_data['status'],
+            'progress': status_data['progress'],
+            'message': status_data['message'],
+            'result': status_data.get('result'),
+            'error': status_data['message'] if status_data['status'] == 'error' else None,
+            'troubleshooting_tips': status_data.get('troubleshooting_tips'),
+            'steps': status_data.get('steps', {}),
+            'running_steps': status_data.get('running_steps', []),
+            'resources': status_data.get('resources', {}),
+            'resumable': status_data['status'] == 'error' and bool(status_data.get('company_data'))
         }
+    
+    def handle_queue_status(self):
+        """Report provisioning queue depth and worker use"""
+        self.send_response(200)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        time_place = timezone_mapping.get(time_zone, 'New_York')
+        self.wfile.write(json.dumps({'success': True, 'queue': self.queue_stats()}).encode())
+    
+    def queue_stats(self):
+        """Local worker pool stats, plus provisioning_jobs counts when queueing to Postgres"""
+        stats = self.provisioning_pool.stats()
+        if self.provisioning_queue:
+            stats['postgres_jobs'] = self.provisioning_queue.stats()
+        stats['circuits'] = circuit_stats()
+        return stats
+    
+    def transform_form_data(self, form_data):
+        """Transform web form data to agent system format"""
+        return transform_form_data(form_data)
+    
+    def start_creation_job(self, company_data):
+        """
+        Start provisioning company_data once per idempotency key
         
-        return {
-            'company_name': company_name,
-            'office_address': office_address,
-            'website_url': website_url,
-            'websites': websites,
-            'time_zone': time_zone,
-            'time_place': time_place,
-            'business_days': business_days_str,
-            'start_time': form_data.get('startTime', '09:00'),
-            'end_time': form_data.get('endTime', '17:00'),
-            'business_hours': business_hours,
-            'contact_number': contact_number,
-            'area_code': area_code,
-            'assistant_name': assistant_name,
-            'post_call_summary_sms': form_data.get('postCallSummarySMS', False),
-            'post_call_summary_email': form_data.get('postCallSummaryEmail', False),
-            'summary_sms_number': form_data.get('smsNumbers', [None])[0] if form_data.get('smsNumbers') else None,
-            'summary_email_address': form_data.get('primaryEmail', ''),
-            'primary_email': form_data.get('primaryEmail', ''),
-            'cc_emails': form_data.get('ccEmails', []),
-            'sms_numbers': form_data.get('smsNumbers', []),
-            'uploaded_files': form_data.get('uploadedFiles', [])
-        }
+        Returns (creation_id, started); started is False when a duplicate request
+        attached to a job that is queued, running or completed. Returns (None, False)
+        after answering the request itself with a 400, 429 or 503.
+        """
+        try:
+            key = idempotency_key(self.headers.get('Idempotency-Key'), company_data)
+        except ValueError as e:
+            self.send_error_response(str(e), 400)
+            return None, False
+        creation_id = job_id_for_key(key)
+        started = self.launch_creation_job(creation_id, company_data, 'Waiting for a free worker...')
+        return (None, False) if started is None else (creation_id, started)
     
-    def extract_area_code(self, phone_number):
-        """Extract area code from phone number"""
-        digits = ''.join(filter(str.isdigit, phone_number))
+    def launch_creation_job(self, creation_id, company_data, message):
+        """
+        Queue creation_id for provisioning unless it is already queued, running or completed
+        
+        A job that failed is started again from its checkpoint. Returns True if
+        the job was started, False if it was live already, or None after answering
+        the request with a 429 (queue full) or 503 (an upstream's circuit is open).
+        """
+        # The status is recorded first so a fast worker can't have its
+        # in_progress update overwritten
+        status_data, started = self.job_store.start_once(creation_id, {
+            'status': 'queued',
+            'progress': 0,
+            'message': message,
+            'timestamp': time.time()
+        })
+        if not started:
+            print(f"🔁 Duplicate request attached to {creation_id} ({status_data['status']})")
+            return False
         
-        if len(digits) >= 10:
-            if len(digits) == 11 and digits.startswith('1'):
-                return digits[1:4]
-            elif len(digits) == 10:
-                return digits[:3]
+        try:
+            if self.provisioning_queue:
+                if self.provisioning_queue.queued_count() >= LOCAL_SERVER_MAX_QUEUE:
+                    raise QueueFull(LOCAL_SERVER_RETRY_AFTER)
+                self.provisioning_queue.enqueue({'company_data': company_data}, job_id=creation_id)
+            else:
+                # Postgres-queued jobs wait out an open circuit; local ones fail fast
+                check_circuits()
+                self.provisioning_pool.submit(self.create_agent_async, creation_id, company_data)
+        except CircuitOpen as e:
+            self.job_store.update(creation_id, status='error', message=str(e))
+            self.send_circuit_open_response(e)
+            return None
+        except QueueFull as e:
+            # Duplicates that attached meanwhile see the failure; a retry restarts the job
+            self.job_store.update(creation_id, status='error', message=str(e))
+            self.send_queue_full_response(e)
+            return None
+        return True
+    
+    def wait_for_job(self, creation_id):
+        """
+        Block until the job completes or fails, or ONBOARD_WAIT_TIMEOUT passes, and
+        return its latest record (None if it vanished)
+        """
+        deadline = time.monotonic() + ONBOARD_WAIT_TIMEOUT
+        status_data = self.job_store.get(creation_id)
+        while status_data is not None and status_data['status'] not in FINAL_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            status_data = self.job_store.wait_for_update(
+                creation_id, status_data['timestamp'], min(ONBOARD_WAIT_INTERVAL, remaining)
+            )
+        return status_data
+    
+    def send_wait_timeout_response(self, creation_id):
+        """Send 504 with the creation_id of a job that is still running, so the caller can poll it"""
+        self.send_response(504)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
         
-        return '555'
+        self.wfile.write(json.dumps({
+            'success': False,
+            'error': 'Agent creation is still running; poll the status URL for the result',
+            'creation_id': creation_id,
+            'status_url': f"/creation-status/{creation_id}"
+        }).encode())
     
     def create_agent_async(self, creation_id, company_data):
         """Create agent asynchronously"""
         try:
-            print(f"🚀 Starting agent creation for {creation_id}")
-            
-            # Store initial status
-            self.creation_statuses[creation_id] = {
-                'status': 'in_progress',
-                'progress': 0,
-                'message': 'Starting agent creation...',
-                'timestamp': time.time()
-            }
-            
-            # Run agent creation
-            result = create_agent_automation(company_data)
-            
-            # Extract dashboard credentials
-            dashboard_creds = result.get('dashboard_credentials', {})
-            
-            # Format response for frontend
-            formatted_result = {
-                'success': True,
-                'phone_number': result.get('phone_number', '+1 (555) 000-0000'),
-                'dashboard_email': dashboard_creds.get('email', 'support@company.justclara.ai') if dashboard_creds else 'support@company.justclara.ai',
-                'dashboard_password': dashboard_creds.get('password', 'company@321') if dashboard_creds else 'company@321',
-                'company_id': result.get('company_id'),
-                'agent_id': result.get('main_router_agent_id')
-            }
-            
-            # Store success result
-            self.creation_statuses[creation_id] = {
-                'status': 'completed',
-                'progress': 100,
-                'message': '🎉 Agent creation completed successfully!',
-                'result': formatted_result,
-                'timestamp': time.time()
-            }
-            
-            print(f"✅ Agent creation completed for {creation_id}")
-            
-        except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Agent creation failed for {creation_id}: {error_msg}")
-            
-            # Provide troubleshooting tips
-            troubleshooting_tips = []
-            if "too long" in error_msg.lower():
-                troubleshooting_tips = [
-                    "Use a shorter company name (max 50 characters)",
-                    "Remove special characters from company name",
-                    "Try using abbreviations or acronyms"
-                ]
-            elif "sitemap" in error_msg.lower():
-                troubleshooting_tips = [
-                    "Check if your website has a valid sitemap.xml",
-                    "Verify the website URL is accessible",
-                    "Try using a different website URL"
-                ]
-            elif "unauthorized" in error_msg.lower():
-                troubleshooting_tips = [
-                    "Check Retell API token configuration",
-                    "Verify API token has proper permissions",
-                    "Contact support for API access issues"
-                ]
-            else:
-                troubleshooting_tips = [
-                    "Check your internet connection",
-                    "Verify all form fields are filled correctly",
-                    "Try again in a few minutes",
-                    "Contact support if the problem persists"
-                ]
-            
-            # Store error result
-            self.creation_statuses[creation_id] = {
-                'status': 'error',
-                'progress': 0,
-                'message': error_msg,
-                'troubleshooting_tips': troubleshooting_tips,
-                'timestamp': time.time()
-            }
+            run_creation_job(creation_id, company_data, store=self.job_store)
+        except Exception:
+            pass  # Recorded in the job store with troubleshooting tips
     
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Idempotency-Key')
         self.end_headers()
     
-    def send_error_response(self, message, status_code):
+    def send_error_response(self, message, status_code, headers=None):
         """Send error response"""
         self.send_response(status_code)
         self.send_header('Content-type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         
         error_response = {
@@ -379,6 +484,23 @@ class AgentCreationHandler(BaseHTTPRequestHandler):
         }
         
         self.wfile.write(json.dumps(error_response).encode())
+    
+    def send_queue_full_response(self, error):
+        """Reject new work with 429 while the provisioning queue is full"""
+        print(f"⚠️  Provisioning queue full, rejecting request (retry in {error.retry_after}s)")
+        self.send_error_response(str(error), 429, {
+            'Retry-After': str(error.retry_after),
+            'Access-Control-Expose-Headers': 'Retry-After'
+        })
+    
+    def send_circuit_open_response(self, error):
+        """Reject new work with 503 while an upstream is failing"""
+        retry_after = int(error.retry_in) + 1
+        print(f"🔌 {error.host} circuit open, rejecting request (retry in {retry_after}s)")
+        self.send_error_response(str(error), 503, {
+            'Retry-After': str(retry_after),
+            'Access-Control-Expose-Headers': 'Retry-After'
+        })
 
 def main():
     """Start the local agent creation server"""
@@ -389,11 +511,31 @@ def main():
     print(f"📡 Server running at http://localhost:{port}")
     print(f"🔗 Agent creation endpoint: http://localhost:{port}/create-agent")
     print(f"📊 Status check endpoint: http://localhost:{port}/creation-status/{{id}}")
+    print(f"📡 Status stream endpoint: http://localhost:{port}/creation-status/{{id}}/events")
+    print(f"🔁 Resume endpoint: POST http://localhost:{port}/creation-status/{{id}}/resume")
+    print(f"📈 Queue status endpoint: http://localhost:{port}/queue-status")
     print(f"⏹️  Press Ctrl+C to stop the server")
     print("=" * 60)
     
+    # Open Retell connections before the first request arrives
+    warm_retell_client()
+    
+    # Requests are served on their own threads; provisioning runs on the bounded pool
+    pool = BoundedWorkerPool(name="provision")
+    AgentCreationHandler.provisioning_pool = pool
+    print(f"👷 Provisioning workers: {pool.workers} (queue limit {pool.max_queue})")
+    if PROVISIONING_QUEUE_BACKEND == 'postgres':
+        # Workers report progress to the job store, so a per-process store would never see it
+        if JOB_STORE_BACKEND != 'postgres':
+            print(f"❌ PROVISIONING_QUEUE_BACKEND=postgres needs JOB_STORE_BACKEND=postgres "
+                  f"(got '{JOB_STORE_BACKEND}'); queued jobs would stay 'queued' forever")
+            sys.exit(1)
+        AgentCreationHandler.provisioning_queue = ProvisioningQueue()
+        print(f"🗄️  /create-agent and /onboard jobs are queued in Postgres for agent_system.provisioning_queue workers")
+    
     try:
-        httpd = HTTPServer(server_address, AgentCreationHandler)
+        httpd = ThreadingHTTPServer(server_address, AgentCreationHandler)
+        httpd.daemon_threads = True
         httpd.serve_forever()
     except KeyboardInterrupt:
         print(f"\n🛑 Server stopped")